@@ -14,7 +14,10 @@ from services.recommender import (
 )
 
 # app.py
-from fastapi import FastAPI, HTTPException, Body
+import hmac
+import os
+
+from fastapi import FastAPI, HTTPException, Body, Header
 from fastapi.middleware.cors import CORSMiddleware
 
 from typing import Dict, List
@@ -25,7 +28,7 @@ from services.adaptive_engine import (
     start_session as mbti_start_session,
     capture_response as mbti_capture,
     get_next_question as mbti_next_question,
-    get_session_responses as mbti_get_responses,
+    get_session_result_inputs as mbti_get_result_inputs,
     end_session as mbti_end_session,
 )
 from services.mbti_inference import compute_final_result as mbti_compute
@@ -40,13 +43,24 @@ from services.riasec import (
 
 # ---- Career Cluster Recommender ----
 from services.recommender import (
+    CLUSTER_BATCH_MAX,
     CareerClusterRecommender,
     ClusterRecommendation,
+    start_table_watcher,
+    stop_table_watcher,
 )
 
+# ---- Session storage ----
+from services.session_store import session_stats, start_sweeper, stop_sweeper
+from services.result_store import start_writer, stop_writer
+from services.riasec_reliability import get_running_reliability
+
 
 app = FastAPI(title="IP_MBTI_HOLLAND API")
 
+# Shared secret for /api/v1/admin/* (sent as X-Admin-Token); unset = admin endpoints disabled
+ADMIN_TOKEN = os.getenv("IP_ADMIN_TOKEN", "")
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], allow_credentials=True,
@@ -57,6 +71,26 @@ app.add_middleware(
 
 cluster_recommender = CareerClusterRecommender(alpha=0.3, beta=0.7)
 
+@app.on_event("startup")
+def _start_background_tasks():
+    # Purge abandoned quiz sessions in the background (IP_SESSION_SWEEP_INTERVAL)
+    start_sweeper()
+    # Write result logs off the request path (IP_RESULT_STORE_FLUSH_INTERVAL)
+    start_writer()
+    # Load (or create) the shared reliability snapshot before serving results
+    get_running_reliability()
+    # Pick up edited recommender CSVs without a restart (IP_RECOMMENDER_RELOAD_INTERVAL)
+    start_table_watcher(cluster_recommender)
+
+
+@app.on_event("shutdown")
+def _stop_background_tasks():
+    stop_sweeper()
+    stop_table_watcher()
+    # Drain result rows still buffered in memory
+    stop_writer()
+
+
 # ============================================================
 # Health
 # ============================================================
@@ -65,6 +99,12 @@ def health():
     return {"ok": True, "message": "API up"}
 
 
+@app.get("/api/v1/sessions/stats")
+def sessions_stats():
+    """Live and evicted session counts per quiz engine."""
+    return session_stats()
+
+
 # ============================================================
 # MBTI
 # ============================================================
@@ -74,7 +114,6 @@ def mbti_session_start(user_id: str):
         payload = mbti_start_session(user_id)        # creates session
         session_id = payload["sessionID"]            # pull it out
         print("Session created:", session_id)
-        print("Sessions after create:", list(SESSIONS.keys()))
         return payload
     except Exception as e:
         raise HTTPException(500, str(e))
@@ -83,13 +122,11 @@ def mbti_session_start(user_id: str):
 @app.post("/api/v1/mbti/captureRes/{session_id}")
 def mbti_capture_res(session_id: str, payload: dict = Body(...)):
     print("Capture called with session_id:", session_id)
-    print("Sessions in memory:", list(SESSIONS.keys()))
-    print("Requested session_id:", session_id)
     try:
         qid = str(payload.get("questionID"))
         ans = str(payload.get("answer", "no"))
         print("About to capture:", session_id, qid, ans)
-        mbti_capture(session_id, qid, ans)          # record answer
+        session_id = mbti_capture(session_id, qid, ans)  # record answer (new token when stateless)
         print("Capture succeeded, now getting next question")
         return mbti_next_question(session_id)
     except KeyError as ke:
@@ -113,8 +150,8 @@ def mbti_get_ques(session_id: str):
 @app.post("/api/v1/mbti/result/{session_id}")
 def mbti_result(session_id: str):
     try:
-        resps = mbti_get_responses(session_id)
-        return mbti_compute(resps)
+        resps, features = mbti_get_result_inputs(session_id)
+        return mbti_compute(resps, features=features)
     except KeyError:
         raise HTTPException(404, "Session not found")
     except Exception as e:
@@ -197,6 +234,28 @@ class ClusterResponseItem(BaseModel):
     spark_interest: str = ""
 
 
+class ClusterBatchRequest(BaseModel):
+    profiles: List[ClusterRequest]  # e.g. one per student in a class
+    top_k: int = 3
+
+
+def _cluster_items(recs: List[ClusterRecommendation]) -> List[ClusterResponseItem]:
+    return [
+        ClusterResponseItem(
+            cluster=r.cluster,
+            probability=r.probability,
+            explanation=r.explanation,
+            icon=r.icon,
+            short_description=r.short_description,
+            why_it_fits=r.why_it_fits,
+            natural_skills=r.natural_skills,
+            growth_skills=r.growth_skills,
+            spark_interest=r.spark_interest,
+        )
+        for r in recs
+    ]
+
+
 
 
 
@@ -217,20 +276,53 @@ def cluster_recommend(payload: ClusterRequest):
             riasec_raw=payload.riasec_raw,
             top_k=3,
         )
-        return [
-            ClusterResponseItem(
-                cluster=r.cluster,
-                probability=r.probability,
-                explanation=r.explanation,
-                icon=r.icon,
-                short_description=r.short_description,
-                why_it_fits=r.why_it_fits,
-                natural_skills=r.natural_skills,
-                growth_skills=r.growth_skills,
-                spark_interest=r.spark_interest,
-            )
-            for r in recs
-        ]
+        return _cluster_items(recs)
+    except Exception as e:
+        raise HTTPException(500, str(e))
+
+
+@app.post("/api/v1/admin/cluster/reload")
+def cluster_reload(force: bool = False, x_admin_token: str = Header(default="")):
+    """
+    Reload the recommender tables from data/ now if any CSV changed (or
+    force=true). The new version is swapped in without dropping requests;
+    on a bad file the current version stays in service.
+    Disabled (403) unless IP_ADMIN_TOKEN is configured.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(403, "Admin endpoints are disabled (IP_ADMIN_TOKEN is not set)")
+    if not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(403, "Invalid admin token")
+    reloaded = cluster_recommender.reload_tables(force=force)
+    return {"reloaded": reloaded, **cluster_recommender.tables_info()}
+
+
+@app.get("/api/v1/cluster/cache/stats")
+def cluster_cache_stats():
+    """Hit/miss counters of the recommender's result cache."""
+    return cluster_recommender.cache_stats()
+
+
+@app.post(
+    "/api/v1/cluster/recommend/batch",
+    response_model=List[List[ClusterResponseItem]],
+)
+def cluster_recommend_batch(payload: ClusterBatchRequest):
+    """
+    Top-k career clusters for many (MBTI, RIASEC) profiles scored in one
+    pass, e.g. a whole class. Results are in request order.
+    """
+    if len(payload.profiles) > CLUSTER_BATCH_MAX:
+        raise HTTPException(413, f"At most {CLUSTER_BATCH_MAX} profiles per batch")
+    try:
+        recs = cluster_recommender.recommend_batch(
+            mbti_types=[p.mbti for p in payload.profiles],
+            riasec_raw=[p.riasec_raw for p in payload.profiles],
+            top_k=payload.top_k,
+        )
+        return [_cluster_items(r) for r in recs]
+    except ValueError as e:
+        raise HTTPException(400, str(e))
     except Exception as e:
         raise HTTPException(500, str(e))
 
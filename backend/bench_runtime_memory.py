@@ -0,0 +1,94 @@
+# backend/bench_runtime_memory.py
+"""
+Per-worker cost of loading the API: `import app` time, resident memory and
+loaded modules, each measured in a fresh interpreter (median of --runs).
+
+Scenarios:
+  artifact        the normal startup (IP_RUNTIME_ARTIFACT)
+  sources         no artifact: every table parsed with the csv/openpyxl readers
+  +pandas         pandas imported first, as every worker did while the loaders
+                  used it; the difference to `artifact` is what each worker sheds
+
+Usage (from backend/):
+  python bench_runtime_memory.py [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = r"""
+import json, sys, time
+preload = sys.argv[1]
+t0 = time.perf_counter()
+if preload:
+    __import__(preload)
+import app
+elapsed = time.perf_counter() - t0
+
+def status_kb(field):
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource  # no /proc: peak RSS only (KiB on Linux, bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+print("RESULT " + json.dumps({
+    "import_s": elapsed,
+    "rss_kb": status_kb("VmRSS"),
+    "peak_kb": status_kb("VmHWM"),
+    "modules": len(sys.modules),
+    "pandas": "pandas" in sys.modules,
+    "openpyxl": "openpyxl" in sys.modules,
+}))
+"""
+
+SCENARIOS = [
+    ("artifact", {}, ""),
+    ("sources", {"IP_RUNTIME_ARTIFACT": "artifacts/_missing_.npz"}, ""),
+    ("+pandas", {}, "pandas"),
+]
+
+
+def measure(env_overrides, preload, runs):
+    env = {**os.environ, **env_overrides}
+    results = []
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-c", PROBE, preload],
+            env=env, capture_output=True, text=True, check=True,
+        )
+        line = next(l for l in proc.stdout.splitlines() if l.startswith("RESULT "))
+        results.append(json.loads(line[len("RESULT "):]))
+    median = {k: statistics.median(r[k] for r in results) for k in ("import_s", "rss_kb", "peak_kb", "modules")}
+    median["pandas"], median["openpyxl"] = results[-1]["pandas"], results[-1]["openpyxl"]
+    return median
+
+
+def main():
+    parser = argparse.ArgumentParser("Per-worker import time and memory of the API")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'scenario':<10}{'import ms':>11}{'RSS MiB':>10}{'peak MiB':>10}{'modules':>9}  pandas  openpyxl")
+    rows = {}
+    for name, env, preload in SCENARIOS:
+        r = rows[name] = measure(env, preload, args.runs)
+        print(f"{name:<10}{r['import_s'] * 1000:11.1f}{r['rss_kb'] / 1024:10.1f}{r['peak_kb'] / 1024:10.1f}"
+              f"{r['modules']:9.0f}  {str(r['pandas']):<7} {r['openpyxl']}")
+
+    base, old = rows["artifact"], rows["+pandas"]
+    print(f"\nWithout pandas each worker saves {(old['rss_kb'] - base['rss_kb']) / 1024:.1f} MiB RSS "
+          f"and {old['modules'] - base['modules']:.0f} modules (median of {args.runs} runs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# backend/bench_session_codec.py
+"""
+Microbenchmark: session token size and encode/decode time,
+legacy JSON tokens (v0) vs the versioned binary codec (v1).
+
+Usage (from backend/):
+  python bench_session_codec.py [--iterations 20000]
+"""
+
+import argparse
+import random
+import timeit
+
+from services.session_store import (
+    _decode_session_v0,
+    _encode_session_v0,
+    decode_session,
+    encode_session,
+)
+
+
+def riasec_state(n_items=36):
+    return {
+        "k": "riasec",
+        "u": "student-0042",
+        "n": "riasec-student-0042-1a2b3c",
+        "seed": random.getrandbits(32),
+        "i": n_items,
+        "a": [random.randint(1, 5) for _ in range(n_items)],
+    }
+
+
+def mbti_state(n_questions=36):
+    return {
+        "k": "mbti",
+        "u": "student-0042",
+        "seed": random.getrandbits(32),
+        "c": n_questions,
+        "ac": [9, 9, 9, 9],
+        "tc": [5, 4, 3, 6, 7, 2, 4, 5],
+        "le": random.random(),
+        "la": 2,
+        "q": random.sample(range(n_questions), n_questions),
+        "a": [random.randint(0, 1) for _ in range(n_questions)],
+    }
+
+
+def bench(name, state, iterations):
+    codecs = [
+        ("json v0", _encode_session_v0, _decode_session_v0),
+        ("binary v1", lambda d: encode_session(d, compress=False), decode_session),
+        ("binary v1+zlib", encode_session, decode_session),
+    ]
+    print(f"\n{name}")
+    print(f"  {'codec':<16}{'bytes':>7}{'encode us':>12}{'decode us':>12}")
+    for label, enc, dec in codecs:
+        token = enc(state)
+        assert dec(token) == state, label
+        t_enc = timeit.timeit(lambda: enc(state), number=iterations) / iterations * 1e6
+        t_dec = timeit.timeit(lambda: dec(token), number=iterations) / iterations * 1e6
+        print(f"  {label:<16}{len(token):>7}{t_enc:>12.1f}{t_dec:>12.1f}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--iterations", type=int, default=20000)
+    args = ap.parse_args()
+    random.seed(1337)
+    bench("RIASEC (36 answered items)", riasec_state(), args.iterations)
+    bench("MBTI (36 answered questions)", mbti_state(), args.iterations)
+
+
+if __name__ == "__main__":
+    main()
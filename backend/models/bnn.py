@@ -3,10 +3,16 @@
 Standalone Bayesian MBTI Model with MC Dropout (NumPy Version).
 - Defines BayesianMBTIMLP (4 -> 32 -> 32 -> 4 with ReLU + Dropout + Sigmoid)
 - Exposes MBTIModel wrapper loading weights from artifacts/bnn_weights.json
+- PosteriorTable serves precomputed MC Dropout posteriors over a discrete feature grid
 """
 
 import os
 import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
 import numpy as np
 
 def relu(x):
@@ -15,6 +21,9 @@ def relu(x):
 def sigmoid(x):
     return 1 / (1 + np.exp(-x))
 
+# Shared generator for MC Dropout masks (float32 draws are ~4x cheaper than np.random.rand)
+_RNG = np.random.default_rng()
+
 def dropout(x, p=0.25, training=False):
     if not training:
         return x
@@ -29,12 +38,12 @@ class BayesianMBTIMLP:
     Output: 4 probabilities (for I, S, T, J)
     """
     def __init__(self, weights_dict):
-        self.w1 = np.array(weights_dict["l1_weight"]).T  # (4, 32)
-        self.b1 = np.array(weights_dict["l1_bias"])
-        self.w2 = np.array(weights_dict["l2_weight"]).T  # (32, 32)
-        self.b2 = np.array(weights_dict["l2_bias"])
-        self.w3 = np.array(weights_dict["l3_weight"]).T  # (32, 4)
-        self.b3 = np.array(weights_dict["l3_bias"])
+        self.w1 = np.array(weights_dict["l1_weight"], dtype=np.float32).T  # (4, 32)
+        self.b1 = np.array(weights_dict["l1_bias"], dtype=np.float32)
+        self.w2 = np.array(weights_dict["l2_weight"], dtype=np.float32).T  # (32, 32)
+        self.b2 = np.array(weights_dict["l2_bias"], dtype=np.float32)
+        self.w3 = np.array(weights_dict["l3_weight"], dtype=np.float32).T  # (32, 4)
+        self.b3 = np.array(weights_dict["l3_bias"], dtype=np.float32)
 
     def forward(self, x, training=False):
         # x shape: (batch, 4)
@@ -55,6 +64,45 @@ class BayesianMBTIMLP:
         
         return x
 
+    def mc_forward(self, x, n_samples, p=0.25, rng=None):
+        """
+        Vectorized MC Dropout: all stochastic passes for a batch in a single shot.
+        x shape: (batch, 4) -> returns (batch, n_samples, 4)
+
+        Layer 1 is deterministic up to its dropout, so it is evaluated once per
+        row and broadcast over the sample axis; layers 2-3 then run as one
+        (batch * n_samples, 32) computation. The dropout masks for both hidden
+        layers are drawn with a single RNG call (from `rng` if given).
+        """
+        x = np.atleast_2d(x)
+        n_samples = max(1, int(n_samples))
+        masks = self.dropout_masks(x.shape[0], n_samples, p=p, rng=rng)
+        return self.mc_forward_masked(x, masks)
+
+    def dropout_masks(self, batch, n_samples, p=0.25, rng=None):
+        """Inverted dropout masks for both hidden layers, already scaled by 1/(1-p): (batch, n_samples, 64)."""
+        rng = _RNG if rng is None else rng
+        masks = rng.random((batch, n_samples, self.w1.shape[1] + self.w2.shape[1]), dtype=np.float32) > p
+        return masks * np.float32(1.0 / (1 - p))
+
+    def mc_forward_masked(self, x, masks):
+        """mc_forward with explicit dropout masks from dropout_masks(); x (batch, 4) -> (batch, n_samples, 4)."""
+        batch, n_samples = masks.shape[:2]
+        h1_dim = self.w1.shape[1]
+        h2_dim = self.w2.shape[1]
+
+        # Layer 1
+        x = relu(np.dot(x, self.w1) + self.b1)                     # (batch, 32)
+        x = (x[:, None, :] * masks[:, :, :h1_dim]).reshape(-1, h1_dim)  # (batch * n_samples, 32)
+
+        # Layer 2
+        x = relu(np.dot(x, self.w2) + self.b2)
+        x = x * masks[:, :, h1_dim:].reshape(-1, h2_dim)
+
+        # Layer 3
+        x = sigmoid(np.dot(x, self.w3) + self.b3)
+        return x.reshape(batch, n_samples, -1)
+
 
 def mbti_from_probs(p: np.ndarray) -> str:
     """Convert 4D probs [p_I, p_S, p_T, p_J] to MBTI string."""
@@ -66,25 +114,33 @@ def mbti_from_probs(p: np.ndarray) -> str:
     ])
 
 
+def weights_path(model_path: str = None) -> str:
+    """Resolve the BNN weights file (IP_BNN_WEIGHTS, also tried under backend/)."""
+    # allow env override
+    path = model_path or os.getenv("IP_BNN_WEIGHTS", "artifacts/bnn_weights.json")
+    if not os.path.exists(path):
+        # Fallback to looking in current directory if artifacts/ is not found relative to cwd
+        if os.path.exists(os.path.join("backend", path)):
+            path = os.path.join("backend", path)
+    return path
+
+
 class MBTIModel:
     """
     Wrapper around BayesianMBTIMLP with MC Dropout inference.
-    - Loads weights from artifacts/bnn_weights.json
+    - Loads weights from artifacts/bnn_weights.json, unless already-parsed
+      `weights` (l1_weight ... l3_bias arrays) are passed in
     """
 
-    def __init__(self, model_path: str = None):
-        # allow env override
-        path = model_path or os.getenv("IP_BNN_WEIGHTS", "artifacts/bnn_weights.json")
-        if not os.path.exists(path):
-            # Fallback to looking in current directory if artifacts/ is not found relative to cwd
-            if os.path.exists(os.path.join("backend", path)):
-                path = os.path.join("backend", path)
-            elif not os.path.exists(path):
-                 raise RuntimeError(f"BNN weights not found at: {path}")
-
-        with open(path, "r") as f:
-            weights = json.load(f)
-            
+    def __init__(self, model_path: str = None, weights: Optional[Dict[str, np.ndarray]] = None):
+        if weights is None:
+            path = weights_path(model_path)
+            if not os.path.exists(path):
+                raise RuntimeError(f"BNN weights not found at: {path}")
+
+            with open(path, "r") as f:
+                weights = json.load(f)
+
         self.model = BayesianMBTIMLP(weights)
         self.meta = {}
 
@@ -105,19 +161,264 @@ class MBTIModel:
         # Batch dimension
         x = f.reshape(1, 4)
 
-        preds = []
-        # MC Dropout: run forward pass multiple times with training=True (to enable dropout)
-        for _ in range(max(1, int(n_samples))):
-            out = self.model.forward(x, training=True)
-            preds.append(out)
-
-        preds = np.array(preds).squeeze(axis=1)  # [n_samples, 4]
+        # MC Dropout: every stochastic pass evaluated in one vectorized forward
+        preds = self.model.mc_forward(x, n_samples)[0]  # [n_samples, 4]
         mean_probs = preds.mean(axis=0)
         std_probs = preds.std(axis=0)
         mbti = mbti_from_probs(mean_probs)
 
         return mbti, mean_probs, std_probs
 
+    def predict_batch(self, features: np.ndarray, n_samples: int = 50, chunk_size: int = 1024,
+                      rng: Optional[np.random.Generator] = None):
+        """
+        features: np.array shape (B, 4), one [IE, SN, TF, JP] row per session
+        returns:
+            mbti_types: list[str] of length B
+            mean_probs: np.array shape (B, 4)
+            std_probs:  np.array shape (B, 4)
+
+        Rows are processed chunk_size at a time so the (chunk * n_samples, 32)
+        hidden activations stay bounded for very large archives. Dropout masks
+        come from `rng` if given (reproducible bulk jobs), else the shared RNG.
+        """
+        f = np.asarray(features, dtype=np.float32)
+        if f.ndim != 2 or f.shape[1] != 4:
+            raise ValueError(f"Expected features of shape (B, 4) [IE,SN,TF,JP], got shape {f.shape}")
+        f = np.clip(f, 0.0, 1.0)
+
+        mean_probs = np.empty((f.shape[0], 4), dtype=np.float64)
+        std_probs = np.empty((f.shape[0], 4), dtype=np.float64)
+        step = max(1, int(chunk_size))
+        for start in range(0, f.shape[0], step):
+            preds = self.model.mc_forward(f[start:start + step], n_samples, rng=rng)  # [chunk, n_samples, 4]
+            mean_probs[start:start + step] = preds.mean(axis=1)
+            std_probs[start:start + step] = preds.std(axis=1)
+
+        mbti_types = [mbti_from_probs(p) for p in mean_probs]
+        return mbti_types, mean_probs, std_probs
+
+
+class PosteriorTable:
+    """
+    O(1) lookup of MC Dropout posteriors for a discrete feature space.
+
+    Every feature axis takes its values from `axis_values`, so a feature vector
+    lying on the grid maps to one integer key. build() computes every key's
+    posterior offline with a high sample count and an RNG seeded from
+    (seed, key); save() stores the result as float16 and the table at `path`
+    is loaded lazily on the first lookup.
+
+    If that artifact is missing or stale (built for other weights or another
+    grid), lookups fall back to a live `live_samples` MC pass per key, still
+    seeded from (seed, key), kept in an LRU of at most `cache_size` entries.
+    """
+
+    def __init__(self, model: MBTIModel, axis_values: Iterable[float],
+                 n_samples: int = 1000, seed: int = 0, path: Optional[str] = None,
+                 live_samples: int = 80, cache_size: int = 4096):
+        self.model = model
+        self.axis_values = np.array(sorted(set(np.float32(v) for v in axis_values)), dtype=np.float32)
+        self._axis_index = {float(v): i for i, v in enumerate(self.axis_values)}
+        self.n_samples = int(n_samples)
+        self.seed = int(seed)
+        self.size = len(self.axis_values) ** 4
+        self.path = path
+        self.live_samples = int(live_samples)
+        self.cache_size = int(cache_size)
+
+        # Dense full-grid float16 arrays, present after build() or a successful load
+        self._means: Optional[np.ndarray] = None
+        self._stds: Optional[np.ndarray] = None
+        self._load_attempted = path is None
+        # Fallback entries when there is no dense table: key -> (mbti, mean_probs, std_probs)
+        self._cache: "OrderedDict[int, Tuple[str, np.ndarray, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """True once the dense table is available (loads it on first access)."""
+        self._ensure_loaded()
+        return self._means is not None
+
+    def _ensure_loaded(self) -> None:
+        if self._load_attempted:
+            return
+        with self._lock:
+            if self._load_attempted:
+                return
+            try:
+                self.load(self.path)
+            except Exception as e:
+                print(f"[warn] BNN posterior table {self.path} unavailable ({e}); running MC Dropout "
+                      f"live ({self.live_samples} samples, LRU of {self.cache_size}). "
+                      "Rebuild it with `python -m models.build_posterior_table`.")
+            self._load_attempted = True
+
+    def weights_digest(self) -> str:
+        """sha256 of the model weights the table entries depend on."""
+        m = self.model.model
+        h = hashlib.sha256()
+        for arr in (m.w1, m.b1, m.w2, m.b2, m.w3, m.b3):
+            h.update(np.ascontiguousarray(arr, dtype=np.float32).tobytes())
+        return h.hexdigest()
+
+    def key(self, features: np.ndarray) -> Optional[int]:
+        """Grid key for a [IE, SN, TF, JP] vector, or None if it is off-grid."""
+        f = np.asarray(features, dtype=np.float32).reshape(-1)
+        if f.shape[0] != 4:
+            return None
+        g = len(self.axis_values)
+        key = 0
+        for v in f:
+            i = self._axis_index.get(float(v))
+            if i is None:
+                return None
+            key = key * g + i
+        return key
+
+    def keys(self, features: np.ndarray) -> np.ndarray:
+        """Grid keys for a (B, 4) feature matrix; -1 marks off-grid rows."""
+        f = np.asarray(features, dtype=np.float32).reshape(-1, 4)
+        g = len(self.axis_values)
+        idx = np.searchsorted(self.axis_values, f).clip(0, g - 1)
+        on_grid = (self.axis_values[idx] == f).all(axis=1)
+        keys = ((idx[:, 0] * g + idx[:, 1]) * g + idx[:, 2]) * g + idx[:, 3]
+        return np.where(on_grid, keys, -1).astype(np.int64)
+
+    def features_for_key(self, key: int) -> np.ndarray:
+        g = len(self.axis_values)
+        idx = []
+        for _ in range(4):
+            key, i = divmod(key, g)
+            idx.append(i)
+        return self.axis_values[idx[::-1]]
+
+    def _compute_keys(self, keys: Iterable[int], n_samples: int,
+                      chunk_size: int = 64) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (len(keys), 4) float32 mean/std posteriors, evaluated chunk_size keys at
+        a time; each key draws its masks from its own (seed, key) RNG, so the
+        chunking only affects float rounding.
+        """
+        mlp = self.model.model
+        keys = list(keys)
+        means = np.empty((len(keys), 4), dtype=np.float32)
+        stds = np.empty((len(keys), 4), dtype=np.float32)
+        step = max(1, int(chunk_size))
+        for start in range(0, len(keys), step):
+            chunk = keys[start:start + step]
+            x = np.stack([self.features_for_key(k) for k in chunk])
+            masks = np.concatenate([
+                mlp.dropout_masks(1, n_samples, rng=np.random.default_rng([self.seed, k]))
+                for k in chunk
+            ])
+            preds = mlp.mc_forward_masked(x, masks)  # [chunk, n_samples, 4]
+            means[start:start + len(chunk)] = preds.mean(axis=1)
+            stds[start:start + len(chunk)] = preds.std(axis=1)
+        return means, stds
+
+    def _cached(self, key: int) -> Tuple[str, np.ndarray, np.ndarray]:
+        """Fallback entry for `key` from the LRU, computed live on a miss."""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+                return entry
+        means, stds = self._compute_keys([key], self.live_samples)
+        mean_probs, std_probs = means[0], stds[0]
+        mean_probs.flags.writeable = False
+        std_probs.flags.writeable = False
+        entry = (mbti_from_probs(mean_probs), mean_probs, std_probs)
+        with self._lock:
+            self._cache[key] = entry
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return entry
+
+    def lookup(self, features: np.ndarray) -> Optional[Tuple[str, np.ndarray, np.ndarray]]:
+        """
+        returns (mbti, mean_probs, std_probs) for on-grid features, else None.
+        Returned arrays are float32 and must be treated as read-only.
+        """
+        key = self.key(features)
+        if key is None:
+            return None
+        self._ensure_loaded()
+        if self._means is None:
+            return self._cached(key)
+        mean_probs = self._means[key].astype(np.float32)
+        std_probs = self._stds[key].astype(np.float32)
+        return mbti_from_probs(mean_probs), mean_probs, std_probs
+
+    def lookup_batch(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Batched lookup for a (B, 4) feature matrix:
+        returns (hit, mean_probs, std_probs) where hit is a (B,) bool mask of
+        on-grid rows and the float32 (B, 4) rows are only meaningful where hit
+        is True. Without the dense table on-grid rows get the same values
+        lookup() would (computed here, not added to the LRU).
+        """
+        keys = self.keys(features)
+        hit = keys >= 0
+        mean_probs = np.zeros((len(keys), 4), dtype=np.float32)
+        std_probs = np.zeros((len(keys), 4), dtype=np.float32)
+        if hit.any():
+            self._ensure_loaded()
+            if self._means is not None:
+                mean_probs[hit] = self._means[keys[hit]]
+                std_probs[hit] = self._stds[keys[hit]]
+            else:
+                uniq, inverse = np.unique(keys[hit], return_inverse=True)
+                # one key per pass, exactly as _cached() evaluates them
+                means, stds = self._compute_keys(uniq.tolist(), self.live_samples, chunk_size=1)
+                mean_probs[hit] = means[inverse]
+                std_probs[hit] = stds[inverse]
+        return hit, mean_probs, std_probs
+
+    def build(self, chunk_size: int = 64) -> None:
+        """Fill the dense table for every grid point (offline; see models.build_posterior_table)."""
+        means, stds = self._compute_keys(range(self.size), self.n_samples, chunk_size)
+        self._set_dense(means.astype(np.float16), stds.astype(np.float16))
+
+    def _set_dense(self, means: np.ndarray, stds: np.ndarray) -> None:
+        means.flags.writeable = False
+        stds.flags.writeable = False
+        self._means, self._stds = means, stds
+        self._load_attempted = True
+        self._cache.clear()
+
+    def save(self, path: str) -> None:
+        """Write the dense table (float16, uncompressed so it loads in milliseconds)."""
+        if self._means is None:
+            raise RuntimeError("PosteriorTable.save() requires build() or load() first")
+        np.savez(
+            path,
+            axis_values=self.axis_values,
+            n_samples=np.int64(self.n_samples),
+            seed=np.int64(self.seed),
+            weights_sha256=np.array(self.weights_digest()),
+            means=self._means,
+            stds=self._stds,
+        )
+
+    def load(self, path: str) -> None:
+        with np.load(path, allow_pickle=False) as data:
+            if not np.array_equal(data["axis_values"], self.axis_values):
+                raise ValueError(f"Posterior table {path} was built for a different feature grid")
+            if "weights_sha256" not in data.files or str(data["weights_sha256"]) != self.weights_digest():
+                raise ValueError(f"Posterior table {path} was built for different BNN weights")
+            means = data["means"].astype(np.float16)
+            stds = data["stds"].astype(np.float16)
+            n_samples, seed = int(data["n_samples"]), int(data["seed"])
+        if means.shape != (self.size, 4) or stds.shape != (self.size, 4):
+            raise ValueError(f"Posterior table {path} has shape {means.shape}, expected {(self.size, 4)}")
+        self.n_samples, self.seed = n_samples, seed
+        self._set_dense(means, stds)
+
+    def __len__(self) -> int:
+        return self.size if self._means is not None else len(self._cache)
+
 
 # Optional: simple singleton getter to avoid re-loading on each import
 _model_singleton = None
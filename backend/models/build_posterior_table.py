@@ -0,0 +1,46 @@
+# backend/models/build_posterior_table.py
+"""
+Precompute the BNN posterior lookup table for every reachable MBTI feature vector.
+
+Writes a dense (grid**4, 4) float16 mean/std table that services.mbti_inference
+loads on the first lookup, so no MC Dropout runs on the request path. Without
+it (or after the BNN weights change, until it is rebuilt) the API logs a
+warning and serves live MC Dropout posteriors from a bounded LRU instead.
+
+Usage (from backend/):
+  python -m models.build_posterior_table --out artifacts/bnn_posterior_table.npz
+"""
+
+import argparse
+import time
+
+from services.mbti_inference import (
+    MAX_ANSWERS_PER_AXIS,
+    POSTERIOR_TABLE_FILE,
+    POSTERIOR_TABLE_SAMPLES,
+    bnn_model,
+    reachable_axis_values,
+)
+from .bnn import PosteriorTable
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--out", default=POSTERIOR_TABLE_FILE)
+    ap.add_argument("--n-samples", type=int, default=POSTERIOR_TABLE_SAMPLES)
+    ap.add_argument("--max-per-axis", type=int, default=MAX_ANSWERS_PER_AXIS)
+    args = ap.parse_args()
+
+    table = PosteriorTable(
+        bnn_model, reachable_axis_values(args.max_per_axis), n_samples=args.n_samples
+    )
+    print(f"Building {table.size} entries ({len(table.axis_values)} values per axis, "
+          f"{table.n_samples} MC samples each)...")
+    t0 = time.perf_counter()
+    table.build()
+    table.save(args.out)
+    print(f"Saved {args.out} in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# backend/profile_startup.py
+"""
+Cold-start profile of `import app`: wall time, the slowest modules from
+`python -X importtime`, and whether pandas/openpyxl were loaded. Each run
+is a fresh interpreter; the artifact run uses IP_RUNTIME_ARTIFACT as is,
+the source run points it at a missing file so every table is parsed.
+
+Usage (from backend/):
+  python -m services.runtime_data build      # compile the artifact first
+  python profile_startup.py [--runs 5] [--top 15]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+PROBE = (
+    "import sys, time\n"
+    "t0 = time.perf_counter()\n"
+    "import fastapi\n"
+    "t1 = time.perf_counter()\n"
+    "import app\n"
+    "t2 = time.perf_counter()\n"
+    "print('TIMES', t1 - t0, t2 - t1, 'pandas' in sys.modules, 'openpyxl' in sys.modules)\n"
+)
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def run_probe(env, importtime=False):
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", PROBE]
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True)
+    fields = next(l for l in proc.stdout.splitlines() if l.startswith("TIMES")).split()
+    return float(fields[1]), float(fields[2]), fields[3] == "True", fields[4] == "True", proc.stderr
+
+
+def top_modules(stderr, top, parent="app"):
+    """(cumulative us, self us, module) of the slowest imports made directly by `parent`."""
+    rows, children = [], []
+    for line in stderr.splitlines():
+        m = IMPORTTIME_LINE.match(line)
+        if not m:
+            continue
+        depth = (len(m.group(3)) - 1) // 2
+        if depth == 1:
+            children.append((int(m.group(2)), int(m.group(1)), m.group(4)))
+        elif depth == 0:
+            # importtime prints children before their parent
+            if m.group(4) == parent:
+                own = int(m.group(1))
+                rows = children + [(own, own, f"{parent} (module body)")]
+            children = []
+    return sorted(rows, reverse=True)[:top]
+
+
+def profile(label, env, runs, top):
+    fastapi_s, app_s = [], []
+    for _ in range(runs):
+        f, a, has_pandas, has_openpyxl, _ = run_probe(env)
+        fastapi_s.append(f)
+        app_s.append(a)
+    f_med, a_med = statistics.median(fastapi_s), statistics.median(app_s)
+    print(f"\n{label}")
+    print(f"  import fastapi      {f_med * 1000:7.1f} ms   (framework floor)")
+    print(f"  import app (rest)   {a_med * 1000:7.1f} ms")
+    print(f"  total               {(f_med + a_med) * 1000:7.1f} ms   (median of {runs})")
+    print(f"  pandas loaded: {has_pandas}   openpyxl loaded: {has_openpyxl}")
+
+    print(f"  slowest imports made by app.py (-X importtime):")
+    print(f"    {'cumulative ms':>13}{'self ms':>9}  module")
+    for cumulative, own, module in top_modules(run_probe(env, importtime=True)[4], top):
+        print(f"    {cumulative / 1000:13.1f}{own / 1000:9.1f}  {module}")
+    return f_med + a_med
+
+
+def main():
+    parser = argparse.ArgumentParser("Profile cold `import app`")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    artifact = env.get("IP_RUNTIME_ARTIFACT", "artifacts/runtime_data.npz")
+    if not os.path.exists(artifact):
+        print(f"[warn] {artifact} not found; run `python -m services.runtime_data build` first")
+
+    with_artifact = profile(f"With runtime artifact ({artifact})", env, args.runs, args.top)
+    without = profile("Parsing sources (no artifact)",
+                      {**env, "IP_RUNTIME_ARTIFACT": "artifacts/_missing_.npz"}, args.runs, args.top)
+    print(f"\nArtifact saves {(without - with_artifact) * 1000:.1f} ms per cold start")
+
+
+if __name__ == "__main__":
+    main()
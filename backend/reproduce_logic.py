@@ -30,6 +30,9 @@ def test_enfj_example():
     # Update the dataframe row for ENFJ
     recommender.mbti_prior_df.loc["ENFJ"] = pd.Series(mock_priors)
     
+    # Re-align the scoring arrays with the edited tables
+    recommender.compile_tables()
+
     print(f"\nTesting with MBTI: {mbti_type}")
     print(f"Raw RIASEC: {riasec_raw}")
     
@@ -46,6 +46,9 @@ def test_enfj_example_exact_match():
     # So we must filter the mbti_prior_df columns too.
     recommender.mbti_prior_df = recommender.mbti_prior_df[target_clusters]
     
+    # Re-align the scoring arrays with the edited tables
+    recommender.compile_tables()
+
     print(f"\nTesting with MBTI: {mbti_type}")
     print(f"Restricted to {len(recommender.riasec_matrix_df)} clusters")
     
@@ -4,13 +4,32 @@ Adaptive Question Engine with RL bandit + stability-based stopping.
 """
 
 import uuid
-from typing import Dict, Any, List, Set
+import random
+from typing import Dict, Any, List, Tuple
 
 import numpy as np
 
-from .mbti_questions import get_question_for_axis, MBTI_AXES, QUESTION_TRAITS
+from .session_store import (
+    STATELESS_SESSIONS,
+    SessionBackend,
+    decode_session,
+    encode_session,
+    make_backend,
+    token_int,
+)
+from .mbti_questions import (
+    new_axis_queues,
+    pop_question_for_axis,
+    MBTI_AXES,
+    QUESTIONS,
+    QUESTION_INDEX,
+    QUESTION_TRAITS,
+)
 from .mbti_inference import (
-    build_features_from_responses,
+    YES_ANSWERS,
+    features_from_counts,
+    new_trait_counts,
+    update_trait_counts,
     mc_dropout_predict,
     entropy_from_probs,
 )
@@ -19,8 +38,8 @@ from .mbti_inference import (
 TARGET_PER_AXIS = 9              # 9 questions per axis
 TOTAL_QUESTIONS = TARGET_PER_AXIS * 4  # 36 questions total
 
-# In-memory session store
-SESSIONS: Dict[str, Dict[str, Any]] = {}
+# Session store (in-process by default; see session_store.make_backend)
+SESSIONS: SessionBackend = make_backend(namespace="mbti")
 
 # RL bandit values
 BANDIT_VALUES = np.zeros(4, dtype=np.float32)
@@ -63,13 +82,108 @@ def compute_reward(last_entropy: float, new_entropy: float, axis_idx: int) -> fl
     return float(base)
 
 
+def _to_token_state(s: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compact, JSON-friendly session state for stateless tokens. The question
+    queues are rebuilt from their seed and the per-axis pop counts, answers
+    are reduced to yes/no bits, and the entropy/MBTI histories are dropped.
+    """
+    return {
+        "k": "mbti",
+        "u": s["user_id"],
+        "seed": s["queue_seed"],
+        "c": s["count"],
+        "ac": [int(n) for n in s["axis_counts"]],
+        "tc": [int(n) for n in s["trait_counts"]],
+        "le": None if s["last_entropy"] is None else float(s["last_entropy"]),
+        "la": None if s["last_axis_idx"] is None else int(s["last_axis_idx"]),
+        "q": [QUESTION_INDEX.get(qid, -1) for qid, _ans in s["responses"]],
+        "a": [1 if ans in YES_ANSWERS else 0 for _qid, ans in s["responses"]],
+    }
+
+
+def _valid_token_state(state: Dict[str, Any]) -> bool:
+    """
+    Bounds-check a verified token before it is used to index anything; a
+    well-signed but malformed token must read as a missing session, not a 500.
+    """
+    try:
+        ac, tc, q, a = state["ac"], state["tc"], state["q"], state["a"]
+        if not (isinstance(state["u"], str) and token_int(state["seed"], 0)
+                and token_int(state["c"], 0, TOTAL_QUESTIONS)):
+            return False
+        if not (isinstance(ac, list) and len(ac) == len(MBTI_AXES)
+                and all(token_int(n, 0, TARGET_PER_AXIS) for n in ac)):
+            return False
+        if not (isinstance(tc, list) and len(tc) == len(new_trait_counts())
+                and all(token_int(n, 0) for n in tc)):
+            return False
+        if not (isinstance(q, list) and isinstance(a, list) and len(q) == len(a)
+                and all(token_int(i, -1, len(QUESTIONS) - 1) for i in q)
+                and all(token_int(x, 0, 1) for x in a)):
+            return False
+        le, la = state["le"], state["la"]
+        return (le is None or isinstance(le, (int, float))) and (la is None or token_int(la, 0, len(MBTI_AXES) - 1))
+    except (KeyError, TypeError):
+        return False
+
+
+def _from_token_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    if not _valid_token_state(state):
+        raise KeyError("Session not found")
+    queues = new_axis_queues(state["seed"])
+    for axis_idx, popped in enumerate(state["ac"]):
+        del queues[axis_idx][len(queues[axis_idx]) - popped:]
+    return {
+        "user_id": state["u"],
+        "responses": [
+            (QUESTIONS[q]["id"] if q >= 0 else "", "yes" if a else "no")
+            for q, a in zip(state["q"], state["a"])
+        ],
+        "trait_counts": list(state["tc"]),
+        "queue_seed": state["seed"],
+        "axis_queues": queues,
+        "count": state["c"],
+        "axis_counts": list(state["ac"]),
+        "last_entropy": state["le"],
+        "last_axis_idx": state["la"],
+        "entropy_history": [],
+        "mbti_history": [],
+    }
+
+
+def _load_session(session_id: str) -> Dict[str, Any]:
+    if STATELESS_SESSIONS:
+        state = decode_session(session_id)
+        if state is None or state.get("k") != "mbti":
+            raise KeyError("Session not found")
+        return _from_token_state(state)
+
+    s = SESSIONS.get(session_id)
+    if s is None:
+        raise KeyError("Session not found")
+    # Out-of-process backends hold the compact (validated) token state
+    return s if SESSIONS.in_process else _from_token_state(s)
+
+
+def _save_session(session_id: str, s: Dict[str, Any]) -> str:
+    """Persist the session; returns the id the client must send next (a fresh token when stateless)."""
+    if STATELESS_SESSIONS:
+        return encode_session(_to_token_state(s))
+    SESSIONS.put(session_id, s if SESSIONS.in_process else _to_token_state(s))
+    return session_id
+
+
 def start_session(user_id: str) -> Dict[str, Any]:
     session_id = f"{user_id}-{uuid.uuid4().hex[:6]}"
+    queue_seed = random.getrandbits(32)
 
-    SESSIONS[session_id] = {
+    s = {
         "user_id": user_id,
-        "responses": [],      # list of {qid, answer}
-        "asked_qids": set(),  # type: Set[str]
+        "responses": [],      # list of (qid, answer) tuples, kept for audit only
+        "trait_counts": new_trait_counts(),  # running I/E/S/N/T/F/J/P tallies
+        "queue_seed": queue_seed,
+        "axis_queues": new_axis_queues(queue_seed),  # per-axis shuffled queues of unused items
         "count": 0,
         "axis_counts": [0, 0, 0, 0], # Track count per axis [IE, SN, TF, JP]
         "last_entropy": None,
@@ -80,17 +194,16 @@ def start_session(user_id: str) -> Dict[str, Any]:
 
     # first question: random axis
     axis_idx = np.random.randint(0, 4)
-    row = get_question_for_axis(axis_idx, asked_ids=set())
+    row = pop_question_for_axis(s["axis_queues"], axis_idx)
     if row is None:
         raise RuntimeError("No questions available in Questions.xlsx")
 
     qid = str(row["id"])
 
-    s = SESSIONS[session_id]
-    s["asked_qids"].add(qid)
     s["count"] = 1
     s["axis_counts"][axis_idx] += 1
     s["last_axis_idx"] = axis_idx
+    session_id = _save_session(session_id, s)
 
     return {
         "sessionID": session_id,
@@ -103,18 +216,16 @@ def start_session(user_id: str) -> Dict[str, Any]:
     }
 
 
-def capture_response(session_id: str, question_id: str, answer: str) -> None:
-    if session_id not in SESSIONS:
-        raise KeyError("Session not found")
-
-    s = SESSIONS[session_id]
+def capture_response(session_id: str, question_id: str, answer: str) -> str:
+    """Record an answer; returns the session id to use for the next call."""
+    s = _load_session(session_id)
     ans_norm = str(answer).strip().lower()
 
-    s["responses"].append({"qid": question_id, "answer": ans_norm})
-    s["asked_qids"].add(question_id)
+    s["responses"].append((question_id, ans_norm))
 
-    # recompute features → BNN → entropy + mbti
-    features = build_features_from_responses(s["responses"])
+    # update running tallies → features → BNN → entropy + mbti
+    update_trait_counts(s["trait_counts"], question_id, ans_norm)
+    features = features_from_counts(s["trait_counts"])
     mean_probs, _std, mbti_type = mc_dropout_predict(features, n_samples=40)
     new_entropy = entropy_from_probs(mean_probs)
 
@@ -129,17 +240,16 @@ def capture_response(session_id: str, question_id: str, answer: str) -> None:
         bandit_update(axis_idx, reward)
 
     s["last_entropy"] = new_entropy
+    return _save_session(session_id, s)
 
 
 def get_next_question(session_id: str) -> Dict[str, Any]:
-    if session_id not in SESSIONS:
-        raise KeyError("Session not found")
-
-    s = SESSIONS[session_id]
+    s = _load_session(session_id)
 
     # Check if we reached the total limit
     if s["count"] >= TOTAL_QUESTIONS:
         return {
+            "sessionID": session_id,
             "sentinel": 1,
             "message": "Assessment complete.",
             "result_ready": True,
@@ -151,6 +261,7 @@ def get_next_question(session_id: str) -> Dict[str, Any]:
     if not available_axes:
         # Should be covered by TOTAL_QUESTIONS check, but safe fallback
         return {
+            "sessionID": session_id,
             "sentinel": 1,
             "message": "Assessment complete (all axes filled).",
             "result_ready": True,
@@ -163,7 +274,7 @@ def get_next_question(session_id: str) -> Dict[str, Any]:
     else:
         axis_idx = bandit_choose_axis(epsilon=0.1, available_axes=available_axes)
 
-    row = get_question_for_axis(axis_idx, asked_ids=s["asked_qids"])
+    row = pop_question_for_axis(s["axis_queues"], axis_idx)
     
     # Fallback if chosen axis has no questions left (unlikely with 9 target, but possible if data is missing)
     if row is None:
@@ -171,7 +282,7 @@ def get_next_question(session_id: str) -> Dict[str, Any]:
         found = False
         for fallback_axis in available_axes:
             if fallback_axis == axis_idx: continue
-            row = get_question_for_axis(fallback_axis, asked_ids=s["asked_qids"])
+            row = pop_question_for_axis(s["axis_queues"], fallback_axis)
             if row is not None:
                 axis_idx = fallback_axis
                 found = True
@@ -179,16 +290,17 @@ def get_next_question(session_id: str) -> Dict[str, Any]:
         
         if not found:
              return {
+                "sessionID": session_id,
                 "sentinel": 1,
                 "message": "No more questions available.",
                 "result_ready": True,
             }
 
     qid = str(row["id"])
-    s["asked_qids"].add(qid)
     s["count"] += 1
     s["axis_counts"][axis_idx] += 1
     s["last_axis_idx"] = axis_idx
+    session_id = _save_session(session_id, s)
 
     return {
         "sessionID": session_id,
@@ -201,12 +313,24 @@ def get_next_question(session_id: str) -> Dict[str, Any]:
     }
 
 
+def _responses(s: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"qid": qid, "answer": ans} for qid, ans in s["responses"]]
+
+
 def get_session_responses(session_id: str) -> List[Dict[str, Any]]:
-    if session_id not in SESSIONS:
-        raise KeyError("Session not found")
-    return SESSIONS[session_id]["responses"]
+    return _responses(_load_session(session_id))
+
+
+def get_session_features(session_id: str) -> np.ndarray:
+    return features_from_counts(_load_session(session_id)["trait_counts"])
+
+
+def get_session_result_inputs(session_id: str) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    """Responses and BNN features from a single session read (one decode / backend round trip)."""
+    s = _load_session(session_id)
+    return _responses(s), features_from_counts(s["trait_counts"])
 
 
 def end_session(session_id: str) -> None:
-    if session_id in SESSIONS:
-        del SESSIONS[session_id]
+    if not STATELESS_SESSIONS:
+        SESSIONS.delete(session_id)
@@ -0,0 +1,300 @@
+# services/batch_score.py
+"""
+Offline bulk scoring of archived quiz responses.
+
+Re-scores RIASEC answer vectors and MBTI feature rows with the same
+vectorized code the API uses (MBTI rows on the feature grid come from the
+same precomputed posterior table) and writes the results to a columnar result
+store (see result_store), so a change in scoring rules can be backfilled
+without replaying sessions through the API.
+
+Input is streamed in chunks and scored across a process pool. By default it
+is read from the live result stores (riasec_responses / mbti_results);
+--input reads a CSV instead (q_<id> columns for RIASEC, IE,SN,TF,JP for MBTI).
+
+Usage (from backend/):
+  python -m services.batch_score riasec --out artifacts/backfill
+  python -m services.batch_score mbti --out artifacts/backfill --n-samples 80 --workers 8
+  python -m services.batch_score riasec --input old_responses.csv --out /tmp/scores
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .result_store import ResultStore
+
+DEFAULT_CHUNK_ROWS = 50_000
+# Sequence number attached to every input chunk (see _numbered)
+CHUNK_KEY = "_chunk"
+
+# Per-process scoring parameters, set by _init_worker
+_PARAMS: Dict[str, Any] = {}
+
+
+# -----------------------------
+# INPUT
+# -----------------------------
+def _iter_csv(
+    path: str, columns: Sequence[Tuple[str, str]], chunk_rows: int
+) -> Iterator[Dict[str, np.ndarray]]:
+    """Stream a CSV with a header row as {column: array} chunks (absent columns get defaults)."""
+    def _block(rows: List[Dict[str, str]]) -> Dict[str, np.ndarray]:
+        out = {}
+        for col, dtype in columns:
+            values = [r.get(col) or "" for r in rows]
+            if dtype == "str":
+                out[col] = np.asarray(values, dtype=str)
+            else:
+                fill = "nan" if np.dtype(dtype).kind == "f" else "0"
+                out[col] = np.asarray([float(v or fill) for v in values]).astype(dtype)
+        return out
+
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        rows: List[Dict[str, str]] = []
+        for row in csv.DictReader(f):
+            rows.append(row)
+            if len(rows) >= chunk_rows:
+                yield _block(rows)
+                rows = []
+        if rows:
+            yield _block(rows)
+
+
+def _numbered(chunks: Iterable[Dict[str, np.ndarray]]) -> Iterator[Dict[str, np.ndarray]]:
+    """Tag each chunk with its position in the input, for per-chunk RNG seeding."""
+    for i, chunk in enumerate(chunks):
+        chunk[CHUNK_KEY] = i
+        yield chunk
+
+
+def _imap_ordered(
+    executor: Optional[Executor],
+    fn: Callable[[Dict[str, np.ndarray]], Dict[str, np.ndarray]],
+    chunks: Iterable[Dict[str, np.ndarray]],
+    max_pending: int,
+) -> Iterator[Dict[str, np.ndarray]]:
+    """Like Executor.map, but keeps at most `max_pending` chunks in flight."""
+    if executor is None:
+        for chunk in chunks:
+            yield fn(chunk)
+        return
+    pending: deque = deque()
+    for chunk in chunks:
+        pending.append(executor.submit(fn, chunk))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+# -----------------------------
+# RIASEC
+# -----------------------------
+def _riasec_params() -> Dict[str, Any]:
+    """Reliability-derived constants, read once from the shared running statistics (never written)."""
+    from .riasec import SCALES
+    from .riasec_reliability import (
+        compute_sem,
+        compute_trait_confidence_score,
+        read_reliability_snapshot,
+    )
+
+    stats = read_reliability_snapshot()
+    alphas, sds = stats.alphas(), stats.sds()
+    sems = np.array([compute_sem(sds[k], alphas[k]) for k in SCALES])
+    trait_conf = np.array([compute_trait_confidence_score(sem, 100.0) for sem in sems])
+    return {
+        "sems": sems,
+        "avg_trait_confidence": float(np.mean(trait_conf)) * 100.0,
+        "percs": [stats.percs[k] for k in SCALES],
+    }
+
+
+def riasec_output_columns() -> List[Tuple[str, str]]:
+    from .riasec import SCALES
+
+    return (
+        [("session_id", "str"), ("user_id", "str"), ("code", "str"),
+         ("confidence_pct", "f8"), ("pattern_confidence", "f8"), ("holland_confidence", "str")]
+        + [(f"{k}_sum", "f8") for k in SCALES]
+        + [(f"{k}_perc", "f8") for k in SCALES]
+        + [(f"{k}_norm", "f8") for k in SCALES]
+        + [(f"{k}_percentile", "f8") for k in SCALES]
+    )
+
+
+def _holland_confidence(perc: np.ndarray, sems: np.ndarray) -> np.ndarray:
+    """
+    Vectorized deduce_holland_code_with_confidence: count 95% CI overlaps
+    among the top three scales by percent (High: none, Low: all three).
+    """
+    top = np.argsort(-perc, axis=1, kind="stable")[:, :3]
+    scores = np.take_along_axis(perc, top, axis=1)
+    margins = 1.96 * sems[top]
+    overlaps = np.zeros(len(perc), dtype=np.int64)
+    for i, j in ((0, 1), (0, 2), (1, 2)):
+        apart = (scores[:, i] + margins[:, i] < scores[:, j] - margins[:, j]) | (
+            scores[:, j] + margins[:, j] < scores[:, i] - margins[:, i]
+        )
+        overlaps += ~apart
+    return np.where(overlaps == 0, "High", np.where(overlaps == 3, "Low", "Medium"))
+
+
+def score_riasec_chunk(chunk: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    from .riasec import (
+        ITEMS, SCALES, pattern_confidence_matrix, score_answer_matrix, top3_codes,
+    )
+
+    answers = np.column_stack([chunk[f"q_{qid}"] for qid, _text, _scale in ITEMS])
+    sums, _means, perc, norm = score_answer_matrix(answers)
+    pattern = np.round(pattern_confidence_matrix(perc), 2)
+    combined = _PARAMS["avg_trait_confidence"] * 0.6 + pattern * 0.4
+
+    out = {
+        "session_id": chunk["session_id"],
+        "user_id": chunk["user_id"],
+        "code": np.asarray(top3_codes(sums), dtype=str),
+        "confidence_pct": np.round(combined, 2),
+        "pattern_confidence": pattern,
+        "holland_confidence": _holland_confidence(perc, _PARAMS["sems"]),
+    }
+    for j, k in enumerate(SCALES):
+        out[f"{k}_sum"] = sums[:, j]
+        out[f"{k}_perc"] = perc[:, j]
+        out[f"{k}_norm"] = norm[:, j]
+        out[f"{k}_percentile"] = _PARAMS["percs"][j].percentile_array(perc[:, j])
+    return out
+
+
+def _riasec_input(args) -> Iterator[Dict[str, np.ndarray]]:
+    from .riasec import ITEMS, RESPONSES_STORE
+
+    names = ["session_id", "user_id"] + [f"q_{qid}" for qid, _text, _scale in ITEMS]
+    if args.input:
+        columns = [(n, dict(RESPONSES_STORE.columns)[n]) for n in names]
+        return _iter_csv(args.input, columns, args.chunk_rows)
+    return RESPONSES_STORE.iter_columns(names, args.chunk_rows)
+
+
+# -----------------------------
+# MBTI
+# -----------------------------
+MBTI_OUTPUT_COLUMNS = (
+    [("IE", "f8"), ("SN", "f8"), ("TF", "f8"), ("JP", "f8"), ("TimestampUTC", "str"),
+     ("mbti", "str"), ("entropy", "f8"), ("confidence", "f8")]
+    + [(f"mean_{a}", "f8") for a in ("IE", "SN", "TF", "JP")]
+    + [(f"std_{a}", "f8") for a in ("IE", "SN", "TF", "JP")]
+)
+
+
+def score_mbti_chunk(chunk: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    from .mbti_inference import (
+        confidence_from_features,
+        entropy_from_probs_batch,
+        mc_dropout_predict_batch,
+    )
+
+    # Off-grid rows run MC Dropout; seeding from (seed, chunk number) keeps
+    # their results the same whichever worker scores the chunk
+    rng = np.random.default_rng([_PARAMS["seed"], int(chunk.get(CHUNK_KEY, 0))])
+    features = np.column_stack([chunk[a] for a in ("IE", "SN", "TF", "JP")]).astype(np.float32)
+    mean_probs, std_probs, mbtis = mc_dropout_predict_batch(
+        features, n_samples=_PARAMS["n_samples"], rng=rng
+    )
+    confidence = np.clip(np.round(confidence_from_features(features, std_probs) * 100.0, 2), 0.0, 100.0)
+
+    out = {a: chunk[a] for a in ("IE", "SN", "TF", "JP", "TimestampUTC")}
+    out["mbti"] = np.asarray(mbtis, dtype=str)
+    out["entropy"] = entropy_from_probs_batch(mean_probs)
+    out["confidence"] = confidence
+    for j, a in enumerate(("IE", "SN", "TF", "JP")):
+        out[f"mean_{a}"] = mean_probs[:, j]
+        out[f"std_{a}"] = std_probs[:, j]
+    return out
+
+
+def _mbti_input(args) -> Iterator[Dict[str, np.ndarray]]:
+    from .mbti_inference import RESULTS_STORE
+
+    names = ["IE", "SN", "TF", "JP", "TimestampUTC"]
+    if args.input:
+        columns = [(n, dict(RESULTS_STORE.columns)[n]) for n in names]
+        return _iter_csv(args.input, columns, args.chunk_rows)
+    return RESULTS_STORE.iter_columns(names, args.chunk_rows)
+
+
+# -----------------------------
+# DRIVER
+# -----------------------------
+def _init_worker(params: Dict[str, Any]) -> None:
+    _PARAMS.clear()
+    _PARAMS.update(params)
+    # Forked workers inherit the parent's shared dropout RNG state; give each
+    # its own stream for anything not seeded per chunk
+    from models import bnn
+
+    bnn._RNG = np.random.default_rng(np.random.SeedSequence())
+
+
+def run(args) -> Tuple[int, float]:
+    if args.kind == "riasec":
+        params = _riasec_params()
+        fn, chunks = score_riasec_chunk, _riasec_input(args)
+        out = ResultStore("riasec_scores", riasec_output_columns(), root=args.out)
+    else:
+        from . import mbti_inference  # noqa: F401  (load the model once, before forking)
+        params = {"n_samples": args.n_samples, "seed": args.seed}
+        fn, chunks = score_mbti_chunk, _numbered(_mbti_input(args))
+        out = ResultStore("mbti_scores", MBTI_OUTPUT_COLUMNS, root=args.out)
+
+    if args.replace:
+        out.clear()
+
+    _init_worker(params)
+    executor = None
+    if args.workers > 1:
+        executor = ProcessPoolExecutor(
+            max_workers=args.workers, initializer=_init_worker, initargs=(params,)
+        )
+
+    start = time.perf_counter()
+    n = 0
+    try:
+        for scored in _imap_ordered(executor, fn, chunks, max_pending=2 * max(1, args.workers)):
+            n += out.write_columns(scored)
+            print(f"  {n} rows scored")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return n, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser("Bulk RIASEC / MBTI scoring over archived responses")
+    parser.add_argument("kind", choices=["riasec", "mbti"])
+    parser.add_argument("--out", required=True, help="Directory for the output result store.")
+    parser.add_argument("--input", help="CSV to score instead of the live result store.")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--n-samples", type=int, default=80,
+                        help="MC Dropout samples for off-grid rows (mbti); on-grid rows use the posterior table.")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Base seed for MC Dropout on off-grid rows (mbti); results do not depend on --workers.")
+    parser.add_argument("--replace", action="store_true", help="Clear the output store first.")
+    args = parser.parse_args()
+
+    n, seconds = run(args)
+    print(f"Scored {n} {args.kind} rows in {seconds:.1f}s -> {os.path.join(args.out, args.kind + '_scores')}")
+
+
+if __name__ == "__main__":
+    main()
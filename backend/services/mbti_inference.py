@@ -2,24 +2,26 @@
 """
 Inference utilities for the Interest Profiler:
 - build_features_from_responses(responses) -> np.ndarray[IE,SN,TF,JP]
+- update_trait_counts / features_from_counts: O(1)-per-answer incremental variant
 - entropy_from_probs(probs) -> float
 - mc_dropout_predict(features, n_samples=50) -> (mean_probs, std_probs, mbti)
+- mc_dropout_predict_batch(features, n_samples=80) -> (mean_probs, std_probs, mbtis)
 - compute_final_result(responses) -> dict payload for frontend
 """
 
 from __future__ import annotations
 
 import os
-import csv
 import datetime
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 import numpy as np
-import pandas as pd
 
-from models.bnn import MBTIModel, mbti_from_probs
+from models.bnn import MBTIModel, PosteriorTable, mbti_from_probs, weights_path
 from .mbti_questions import QUESTION_TRAITS
+from .result_store import ResultStore, open_store
+from .runtime_data import load_section, read_table
 
 # -----------------------------
 # CONFIG
@@ -28,55 +30,143 @@ DATA_DIR = Path("data")
 CAREER_FILE = DATA_DIR / "career_clusters.csv"   # columns: Career_Cluster, About, MBTI_Personality
 LOG_DIR = Path("logs")
 LOG_DIR.mkdir(parents=True, exist_ok=True)
-SESSION_LOG = LOG_DIR / "session_results.csv"
+
+# Per-session result log (columnar; see result_store). Column names match the
+# old logs/session_results.csv header so training can read either.
+RESULT_COLUMNS = [
+    ("IE", "f8"), ("SN", "f8"), ("TF", "f8"), ("JP", "f8"),
+    ("PredictedMBTI", "str"), ("Entropy", "f8"), ("TimestampUTC", "str"),
+]
+RESULTS_STORE: ResultStore = open_store("mbti_results", RESULT_COLUMNS)
+
+# Axis ratio used when both sides of an axis have equal counts (see axis_ratio)
+TIE_RATIO = 0.51
+# Answers per axis the adaptive engine can collect (adaptive_engine.TARGET_PER_AXIS);
+# bounds the discrete feature grid served by the posterior lookup table.
+MAX_ANSWERS_PER_AXIS = 9
+
+# Serve BNN posteriors from the precomputed lookup table (set IP_BNN_LOOKUP=0 to disable)
+USE_POSTERIOR_TABLE = os.getenv("IP_BNN_LOOKUP", "1") != "0"
+POSTERIOR_TABLE_FILE = os.getenv("IP_BNN_POSTERIOR_TABLE", "artifacts/bnn_posterior_table.npz")
+POSTERIOR_TABLE_SAMPLES = int(os.getenv("IP_BNN_LOOKUP_SAMPLES", "1000"))
+# Without the table: MC samples per live posterior, and how many are kept (LRU)
+POSTERIOR_LIVE_SAMPLES = int(os.getenv("IP_BNN_LIVE_SAMPLES", "80"))
+POSTERIOR_CACHE_SIZE = int(os.getenv("IP_BNN_CACHE_SIZE", "4096"))
 
 # -----------------------------
 # LOAD CAREER DATA (robust)
 # -----------------------------
-if CAREER_FILE.exists():
-    career_df = pd.read_csv(CAREER_FILE)
+# (Career_Cluster, About, MBTI_Personality) rows, read on first use
+_career_rows: Optional[List[tuple]] = None
+
+
+def _read_career_rows() -> List[tuple]:
+    """Parse CAREER_FILE; empty if not present (recommendations will be empty)."""
+    if not CAREER_FILE.exists():
+        return []
+    header, rows = read_table(CAREER_FILE)
     # Normalize expected columns
     expected_cols = {"Career_Cluster", "About", "MBTI_Personality"}
-    missing = expected_cols - set(career_df.columns)
+    missing = expected_cols - set(header)
     if missing:
         raise ValueError(f"{CAREER_FILE} missing columns: {missing}")
-else:
-    # Fallback to empty DataFrame if not present; recommendations will be empty
-    career_df = pd.DataFrame(columns=["Career_Cluster", "About", "MBTI_Personality"])
+    cols = [header.index(c) for c in ("Career_Cluster", "About", "MBTI_Personality")]
+    return [tuple(row[i] for i in cols) for row in rows]
+
+
+def _get_career_rows() -> List[tuple]:
+    global _career_rows
+    if _career_rows is None:
+        section = load_section("mbti_careers", [str(CAREER_FILE)])
+        if section is not None:
+            _career_rows = list(zip(
+                section["cluster"].tolist(), section["about"].tolist(), section["mbti"].tolist()
+            ))
+        else:
+            _career_rows = _read_career_rows()
+    return _career_rows
+
 
 # -----------------------------
 # GLOBAL BNN MODEL INSTANCE
 # -----------------------------
-# MBTIModel internally loads artifacts/bayes_trait_estimator.pt
-bnn_model = MBTIModel()
+# MBTIModel internally loads artifacts/bnn_weights.json (or the compiled runtime artifact)
+_bnn_weights = load_section("bnn_weights", [weights_path()])
+bnn_model = MBTIModel(weights=_bnn_weights)
+
+
+def reachable_axis_values(max_per_axis: int = MAX_ANSWERS_PER_AXIS) -> List[float]:
+    """
+    Every value axis_ratio() can produce with at most `max_per_axis` answers
+    on an axis: 0.5 for no answers, TIE_RATIO for ties, pos/total otherwise.
+    """
+    values = {0.5}
+    for total in range(1, max_per_axis + 1):
+        for pos in range(total + 1):
+            values.add(TIE_RATIO if 2 * pos == total else pos / total)
+    return sorted(values)
+
+
+def posterior_table_path(path: str = POSTERIOR_TABLE_FILE) -> str:
+    """Resolve the posterior table artifact (also tried under backend/, like weights_path)."""
+    if not os.path.exists(path) and os.path.exists(os.path.join("backend", path)):
+        path = os.path.join("backend", path)
+    return path
+
+
+# Precomputed high-sample posteriors for every reachable feature vector, loaded
+# on first lookup; a missing/stale table degrades to live MC Dropout (with a warning)
+posterior_table = PosteriorTable(
+    bnn_model,
+    reachable_axis_values(),
+    n_samples=POSTERIOR_TABLE_SAMPLES,
+    path=posterior_table_path() if USE_POSTERIOR_TABLE else None,
+    live_samples=POSTERIOR_LIVE_SAMPLES,
+    cache_size=POSTERIOR_CACHE_SIZE,
+)
 
 
 # -----------------------------
 # FEATURE BUILDING
 # -----------------------------
-def build_features_from_responses(responses: List[Dict[str, Any]]) -> np.ndarray:
-    """
-    Convert list of {qid, answer} into 4D feature vector [IE, SN, TF, JP]
-    by counting trait outcomes per axis and taking ratio of the positive side.
+TRAITS = ["I", "E", "S", "N", "T", "F", "J", "P"]
+TRAIT_INDEX = {t: i for i, t in enumerate(TRAITS)}
+# Normalized answers counted as "Yes"; anything else counts as "No"
+YES_ANSWERS = ("yes", "y", "true", "1")
 
-    If an axis has no answers yet, we default that ratio to 0.5 (uninformed).
+
+def new_trait_counts() -> List[int]:
+    """Zeroed running tallies, one slot per trait in TRAITS order."""
+    return [0] * len(TRAITS)
+
+
+def update_trait_counts(counts: List[int], qid: Any, answer: Any) -> None:
     """
-    # Count raw trait tallies
-    counts = {t: 0 for t in ["I", "E", "S", "N", "T", "F", "J", "P"]}
+    Add a single {qid, answer} outcome to running trait tallies in place (O(1)).
+    Unknown question ids are ignored.
+    """
+    qid = str(qid)
+    if qid not in QUESTION_TRAITS:
+        # Unknown question id; ignore safely
+        return
 
-    for r in responses:
-        qid = str(r.get("qid"))
-        ans = str(r.get("answer", "")).strip().lower()
-        if qid not in QUESTION_TRAITS:
-            # Unknown question id; ignore safely
-            continue
+    ans = str(answer).strip().lower()
+    yes_trait, no_trait, _axis_idx = QUESTION_TRAITS[qid]
+    trait = yes_trait if ans in YES_ANSWERS else no_trait
+    counts[TRAIT_INDEX[trait]] += 1
 
-        yes_trait, no_trait, _axis_idx = QUESTION_TRAITS[qid]
-        trait = yes_trait if ans in ("yes", "y", "true", "1") else no_trait
-        counts[trait] += 1
 
+def features_from_counts(counts: List[int]) -> np.ndarray:
+    """
+    Convert running trait tallies (TRAITS order) into the 4D feature vector
+    [IE, SN, TF, JP] by taking the ratio of the positive side per axis.
+
+    If an axis has no answers yet, we default that ratio to 0.5 (uninformed).
+    """
     def axis_ratio(pos: str, neg: str) -> float:
-        total = counts[pos] + counts[neg]
+        n_pos = counts[TRAIT_INDEX[pos]]
+        n_neg = counts[TRAIT_INDEX[neg]]
+        total = n_pos + n_neg
         if total == 0:
             return 0.5
         
@@ -86,7 +176,7 @@ def build_features_from_responses(responses: List[Dict[str, Any]]) -> np.ndarray
         # We consistently favor: I over E, S over N, T over F, J over P
         # (Arbitrary choice, but deterministic)
         
-        if counts[pos] == counts[neg]:
+        if n_pos == n_neg:
             # Tie!
             # We want to avoid 0.5. Let's return 0.51 (favoring pos)
             # This means:
@@ -94,9 +184,9 @@ def build_features_from_responses(responses: List[Dict[str, Any]]) -> np.ndarray
             # S vs N -> Favor S (ratio > 0.5)
             # T vs F -> Favor T (ratio > 0.5)
             # J vs P -> Favor J (ratio > 0.5)
-            return 0.51
+            return TIE_RATIO
             
-        return counts[pos] / total
+        return n_pos / total
 
     IE = axis_ratio("I", "E")
     SN = axis_ratio("S", "N")
@@ -106,6 +196,20 @@ def build_features_from_responses(responses: List[Dict[str, Any]]) -> np.ndarray
     return np.array([IE, SN, TF, JP], dtype=np.float32)
 
 
+def build_features_from_responses(responses: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Convert list of {qid, answer} into 4D feature vector [IE, SN, TF, JP]
+    by counting trait outcomes per axis and taking ratio of the positive side.
+
+    Live sessions keep the tallies incrementally (see adaptive_engine); this
+    full re-scan is for archived or externally supplied response lists.
+    """
+    counts = new_trait_counts()
+    for r in responses:
+        update_trait_counts(counts, r.get("qid"), r.get("answer", ""))
+    return features_from_counts(counts)
+
+
 # -----------------------------
 # UNCERTAINTY / ENTROPY
 # -----------------------------
@@ -128,6 +232,14 @@ def entropy_from_probs(probs: np.ndarray) -> float:
     return float(np.clip(normalized_entropy, 0.0, 1.0))
 
 
+def entropy_from_probs_batch(probs: np.ndarray) -> np.ndarray:
+    """entropy_from_probs for a (B, 4) matrix; returns (B,)."""
+    eps = 1e-8
+    p = np.clip(probs, eps, 1.0 - eps)
+    ent = -(p * np.log(p) + (1.0 - p) * np.log(1.0 - p))
+    return np.clip(ent.mean(axis=1) / np.log(2.0), 0.0, 1.0)
+
+
 # -----------------------------
 # BNN INFERENCE
 # -----------------------------
@@ -137,11 +249,54 @@ def mc_dropout_predict(features: np.ndarray, n_samples: int = 50):
     returns (mean_probs, std_probs, mbti_str)
     - mean_probs: shape (4,)
     - std_probs : shape (4,)
+
+    Features produced by build_features_from_responses() are served from the
+    posterior table (its precomputed estimate, or a cached live one when the
+    artifact is unavailable, so `n_samples` is ignored); anything off the grid
+    runs the model live.
     """
+    if USE_POSTERIOR_TABLE:
+        hit = posterior_table.lookup(features)
+        if hit is not None:
+            mbti, mean_probs, std_probs = hit
+            return mean_probs, std_probs, mbti
+
     mbti, mean_probs, std_probs = bnn_model.predict(features, n_samples=n_samples)
     return mean_probs, std_probs, mbti
 
 
+def mc_dropout_predict_batch(features: np.ndarray, n_samples: int = 80,
+                             rng: Optional[np.random.Generator] = None):
+    """
+    Batched MC Dropout for many sessions at once (e.g. re-scoring the
+    archived rows of RESULTS_STORE):
+    returns (mean_probs, std_probs, mbti_list)
+    - mean_probs: shape (B, 4)
+    - std_probs : shape (B, 4)
+
+    Like mc_dropout_predict(), on-grid rows are served from the posterior
+    table, so re-scored rows match what the API returned for the same
+    answers; only off-grid rows run the model live with `n_samples` (dropout
+    masks from `rng` if given).
+    """
+    f = np.asarray(features, dtype=np.float32)
+    if f.ndim != 2 or f.shape[1] != 4:
+        raise ValueError(f"Expected features of shape (B, 4) [IE,SN,TF,JP], got shape {f.shape}")
+    # float32 throughout, like the single-session path, so derived entropy
+    # and confidence values come out bit-identical
+    if USE_POSTERIOR_TABLE:
+        hit, mean_probs, std_probs = posterior_table.lookup_batch(f)
+    else:
+        hit = np.zeros(len(f), dtype=bool)
+        mean_probs = np.zeros((len(f), 4), dtype=np.float32)
+        std_probs = np.zeros((len(f), 4), dtype=np.float32)
+    miss = ~hit
+    if miss.any():
+        _mbtis, mean_probs[miss], std_probs[miss] = bnn_model.predict_batch(f[miss], n_samples=n_samples, rng=rng)
+    mbtis = [mbti_from_probs(p) for p in mean_probs]
+    return mean_probs, std_probs, mbtis
+
+
 # -----------------------------
 # CAREER RECOMMENDATIONS
 # -----------------------------
@@ -150,16 +305,17 @@ def _get_top_careers_for_mbti(mbti_type: str, top_n: int = 3):
     Simple filter: take rows whose MBTI_Personality contains mbti_type.
     Returns a list of {CareerCluster, About, Score} with no duplicates.
     """
-    if career_df.empty or not mbti_type:
+    career_rows = _get_career_rows()
+    if not career_rows or not mbti_type:
         return []
 
     scores = []
     seen_clusters = set()  # Track seen clusters to prevent duplicates
     
-    for _, row in career_df.iterrows():
-        types = [t.strip().upper() for t in str(row["MBTI_Personality"]).split(",")]
+    for cluster, about, personality in career_rows:
+        types = [t.strip().upper() for t in str(personality).split(",")]
         if mbti_type in types:
-            cluster_name = str(row["Career_Cluster"]).strip()
+            cluster_name = str(cluster).strip()
             cluster_normalized = cluster_name.upper()  # Case-insensitive deduplication
             
             # Skip if we've already seen this cluster
@@ -170,7 +326,7 @@ def _get_top_careers_for_mbti(mbti_type: str, top_n: int = 3):
             seen_clusters.add(cluster_normalized)
             scores.append({
                 "CareerCluster": cluster_name,
-                "About": row["About"],
+                "About": about,
                 "Score": 1.0,  # placeholder for future weighting
             })
             
@@ -184,28 +340,17 @@ def _get_top_careers_for_mbti(mbti_type: str, top_n: int = 3):
 # -----------------------------
 # MAIN RESULT PIPELINE
 # -----------------------------
-def compute_final_result(responses: List[Dict[str, Any]]) -> Dict[str, Any]:
+def confidence_from_features(features: np.ndarray, std_probs: np.ndarray) -> np.ndarray:
     """
-    Build features → BNN + MC Dropout → MBTI + uncertainty → career recs → confidence.
-    Also appends a lightweight log row for analytics.
+    Answer-consistency confidence in [0, 1], reduced for model uncertainty.
+    Works on one session ((4,) inputs) or a batch ((B, 4) inputs → (B,)).
     """
-    # 1) Build 4D features from the current session responses
-    features = build_features_from_responses(responses)
-
-    # 2) Bayesian model with MC Dropout
-    mean_probs, std_probs, mbti_type = mc_dropout_predict(features, n_samples=80)
-
-    # 3) Confidence calculation based on answer consistency and model certainty
-    # The confidence reflects how clear and consistent your answers were
-    # Note: Career cluster recommendations are now handled by the CareerClusterRecommender
-    # which uses both MBTI and RIASEC data. See /api/v1/cluster/recommend endpoint.
-    
     # Primary signal: Answer consistency from raw features
     # Features represent how strongly you lean toward each trait (0-1 scale)
     # Distance from 0.5 indicates how clear your preference is
     # Features closer to 0 or 1 = clearer answers = higher confidence
-    feature_distances = np.abs(features - 0.5)  # Distance from neutral (0.5) for each axis
-    mean_distance = float(feature_distances.mean())  # Average distance across all 4 axes
+    feature_distances = np.abs(np.asarray(features) - 0.5)  # Distance from neutral (0.5) for each axis
+    mean_distance = feature_distances.mean(axis=-1).astype(np.float64)  # Average distance across all 4 axes
     
     # Calculate base confidence from answer consistency
     # Linear mapping: distance of 0.2 (moderate clarity) -> 60% confidence
@@ -213,36 +358,54 @@ def compute_final_result(responses: List[Dict[str, Any]]) -> Dict[str, Any]:
     #                 distance of 0.4 (strong clarity) -> 85% confidence
     #                 distance of 0.5 (very strong) -> 95% confidence
     # Use a more generous scaling that rewards sincere answers
-    if mean_distance >= 0.45:
-        base_confidence = 0.95
-    elif mean_distance >= 0.35:
-        # Interpolate 0.90 - 0.95
-        base_confidence = 0.90 + (mean_distance - 0.35) / 0.10 * 0.05
-    elif mean_distance >= 0.25:
-        # Interpolate 0.80 - 0.90
-        base_confidence = 0.80 + (mean_distance - 0.25) / 0.10 * 0.10
-    elif mean_distance >= 0.15:
-        # Interpolate 0.65 - 0.80
-        base_confidence = 0.65 + (mean_distance - 0.15) / 0.10 * 0.15
-    elif mean_distance >= 0.05:
-        # Interpolate 0.45 - 0.65
-        base_confidence = 0.45 + (mean_distance - 0.05) / 0.10 * 0.20
-    else:
-        # Interpolate 0.00 - 0.45
-        base_confidence = mean_distance / 0.05 * 0.45
+    d = mean_distance
+    base_confidence = np.select(
+        [d >= 0.45, d >= 0.35, d >= 0.25, d >= 0.15, d >= 0.05],
+        [
+            np.full_like(d, 0.95),
+            0.90 + (d - 0.35) / 0.10 * 0.05,  # Interpolate 0.90 - 0.95
+            0.80 + (d - 0.25) / 0.10 * 0.10,  # Interpolate 0.80 - 0.90
+            0.65 + (d - 0.15) / 0.10 * 0.15,  # Interpolate 0.65 - 0.80
+            0.45 + (d - 0.05) / 0.10 * 0.20,  # Interpolate 0.45 - 0.65
+        ],
+        d / 0.05 * 0.45,                      # Interpolate 0.00 - 0.45
+    )
     
     # Adjust for model uncertainty (std_dev) - reduce confidence if model is uncertain
-    mean_std = float(std_probs.mean())
+    mean_std = np.asarray(std_probs).mean(axis=-1).astype(np.float64)
     # If std is very high (>0.12), reduce confidence by up to 10%
     # If std is moderate (0.06-0.12), reduce by 5%
     # If std is low (<0.06), minimal penalty
-    std_penalty = 0.0
-    if mean_std > 0.12:
-        std_penalty = min(0.10, (mean_std - 0.12) / 0.08 * 0.10)  # Max 10% penalty
-    elif mean_std > 0.06:
-        std_penalty = 0.05  # 5% penalty for moderate uncertainty
-    
-    confidence = round((base_confidence - std_penalty) * 100.0, 2)
+    std_penalty = np.where(
+        mean_std > 0.12,
+        np.minimum(0.10, (mean_std - 0.12) / 0.08 * 0.10),  # Max 10% penalty
+        np.where(mean_std > 0.06, 0.05, 0.0),               # 5% penalty for moderate uncertainty
+    )
+    return base_confidence - std_penalty
+
+
+def compute_final_result(
+    responses: List[Dict[str, Any]],
+    features: Optional[np.ndarray] = None,
+) -> Dict[str, Any]:
+    """
+    Build features → BNN + MC Dropout → MBTI + uncertainty → career recs → confidence.
+    Also appends a lightweight log row for analytics.
+
+    `features` may be passed when the caller already tracks them (live
+    sessions); otherwise they are rebuilt from `responses`.
+    """
+    # 1) Build 4D features from the current session responses
+    if features is None:
+        features = build_features_from_responses(responses)
+
+    # 2) Bayesian model with MC Dropout
+    mean_probs, std_probs, mbti_type = mc_dropout_predict(features, n_samples=80)
+
+    # 3) Confidence calculation based on answer consistency and model certainty
+    # Note: Career cluster recommendations are now handled by the CareerClusterRecommender
+    # which uses both MBTI and RIASEC data. See /api/v1/cluster/recommend endpoint.
+    confidence = round(float(confidence_from_features(features, std_probs)) * 100.0, 2)
     
     # Ensure confidence is in valid range [0, 100]
     confidence = max(0.0, min(100.0, confidence))
@@ -252,17 +415,15 @@ def compute_final_result(responses: List[Dict[str, Any]]) -> Dict[str, Any]:
 
     # 5) Append a minimal session log row (for future analytics / retraining)
     try:
-        first_time = not SESSION_LOG.exists()
-        with open(SESSION_LOG, "a", newline="", encoding="utf-8") as f:
-            w = csv.writer(f)
-            if first_time:
-                w.writerow(["IE", "SN", "TF", "JP", "PredictedMBTI", "Entropy", "TimestampUTC"])
-            w.writerow([
-                *[float(x) for x in features],
-                mbti_type,
-                float(entropy),
-                datetime.datetime.utcnow().isoformat()
-            ])
+        RESULTS_STORE.append({
+            "IE": float(features[0]),
+            "SN": float(features[1]),
+            "TF": float(features[2]),
+            "JP": float(features[3]),
+            "PredictedMBTI": mbti_type,
+            "Entropy": float(entropy),
+            "TimestampUTC": datetime.datetime.utcnow().isoformat(),
+        })
     except Exception as e:
         # Non-fatal; keep serving result
         print(f"[warn] failed to write session log: {e}")
@@ -14,9 +14,10 @@ We infer axis by checking which pair (I,E), (S,N), (T,F), (J,P) the Yes/No belon
 from __future__ import annotations
 import os
 import random
-import pandas as pd
 from typing import Dict, List, Tuple, Optional
 
+from .runtime_data import load_section, read_table
+
 MBTI_AXES: List[Tuple[str, str]] = [("I", "E"), ("S", "N"), ("T", "F"), ("J", "P")]
 QUESTIONS_XLSX = os.getenv("MBTI_QUESTIONS_FILE", "data/Questions.xlsx")
 
@@ -24,6 +25,10 @@ QUESTIONS_XLSX = os.getenv("MBTI_QUESTIONS_FILE", "data/Questions.xlsx")
 QUESTIONS: List[dict] = []
 # qid -> (yes_trait, no_trait, axis_idx)
 QUESTION_TRAITS: Dict[str, Tuple[str, str, int]] = {}
+# axis_idx -> items on that axis (same dicts as QUESTIONS)
+QUESTIONS_BY_AXIS: List[List[dict]] = [[] for _ in MBTI_AXES]
+# qid -> position in QUESTIONS (compact references in session tokens)
+QUESTION_INDEX: Dict[str, int] = {}
 
 # -------- internals --------
 
@@ -38,15 +43,14 @@ def _axis_index(yes: str, no: str) -> Optional[int]:
             return idx
     return None
 
-def _guess_col(df: pd.DataFrame, *candidates: str) -> str:
-    """find a column name (case-insensitive) among candidates."""
-    cols = {c.lower(): c for c in df.columns}
+def _guess_col(columns: List[str], *candidates: str) -> int:
+    """find a column position (case-insensitive) among candidates."""
+    cols = {c.lower(): i for i, c in enumerate(columns)}
     for cand in candidates:
         lc = cand.lower()
         if lc in cols:
             return cols[lc]
-    # fall back to first candidate (will raise later if missing)
-    return candidates[0]
+    raise KeyError(f"none of the columns {list(candidates)} found in {columns}")
 
 # -------- public API --------
 
@@ -54,17 +58,17 @@ def load_questions(path: str = QUESTIONS_XLSX) -> List[dict]:
     if not os.path.exists(path):
         raise FileNotFoundError(f"MBTI questions file not found: {path}")
 
-    df = pd.read_excel(path)
+    header, rows = read_table(path)
 
-    col_id  = _guess_col(df, "S.No.", "id", "sno", "s_no", "s no")
-    col_q   = _guess_col(df, "Question", "Questions", "Question?", "question")
-    col_yes = _guess_col(df, "Yes", "yes")
-    col_no  = _guess_col(df, "No", "no")
+    col_id  = _guess_col(header, "S.No.", "id", "sno", "s_no", "s no")
+    col_q   = _guess_col(header, "Question", "Questions", "Question?", "question")
+    col_yes = _guess_col(header, "Yes", "yes")
+    col_no  = _guess_col(header, "No", "no")
 
     items: List[dict] = []
     traits_map: Dict[str, Tuple[str, str, int]] = {}
 
-    for _, row in df.iterrows():
+    for row in rows:
         qid = _norm(row[col_id])
         text = _norm(row[col_q])
         yes_trait = _norm(row[col_yes]).upper()
@@ -91,12 +95,67 @@ def load_questions(path: str = QUESTIONS_XLSX) -> List[dict]:
 
     return items, traits_map
 
+def load_compiled_questions(path: str = QUESTIONS_XLSX) -> Optional[Tuple[List[dict], Dict[str, Tuple[str, str, int]]]]:
+    """Same as load_questions(), from the runtime artifact; None if it is missing or stale."""
+    section = load_section("mbti_questions", [path])
+    if section is None:
+        return None
+    items: List[dict] = []
+    traits_map: Dict[str, Tuple[str, str, int]] = {}
+    for qid, text, yes_trait, no_trait in zip(
+        section["id"].tolist(), section["text"].tolist(),
+        section["yes_trait"].tolist(), section["no_trait"].tolist(),
+    ):
+        idx = _axis_index(yes_trait, no_trait)
+        items.append({
+            "id": qid,
+            "text": text,
+            "yes_trait": yes_trait,
+            "no_trait": no_trait,
+            "axis_idx": idx,
+            "axis_pair": MBTI_AXES[idx],
+        })
+        traits_map[qid] = (yes_trait, no_trait, idx)
+    return items, traits_map
+
+def index_by_axis(items: List[dict]) -> List[List[dict]]:
+    """Group items into one list per axis index (built once at import)."""
+    by_axis: List[List[dict]] = [[] for _ in MBTI_AXES]
+    for item in items:
+        by_axis[item["axis_idx"]].append(item)
+    return by_axis
+
+def new_axis_queues(seed: Optional[int] = None) -> List[List[int]]:
+    """
+    Per-session question queues: for each axis, a shuffled list of positions
+    into QUESTIONS_BY_AXIS[axis]. Popping from the end gives the next unused
+    item in O(1). The same seed always yields the same queues.
+    """
+    rng = random.Random(seed)
+    queues = []
+    for pool in QUESTIONS_BY_AXIS:
+        order = list(range(len(pool)))
+        rng.shuffle(order)
+        queues.append(order)
+    return queues
+
+def pop_question_for_axis(queues: List[List[int]], axis_idx: int) -> Optional[dict]:
+    """
+    Take the next unused question for given axis index from a session's queues.
+    Returns an item dict or None if all consumed.
+    """
+    queue = queues[axis_idx]
+    if not queue:
+        return None
+    return QUESTIONS_BY_AXIS[axis_idx][queue.pop()]
+
 def get_question_for_axis(axis_idx: int, asked_ids: Optional[set] = None) -> Optional[dict]:
     """
     Pick a random (unused) question for given axis index.
     Returns an item dict or None if all consumed.
+    Sessions use new_axis_queues()/pop_question_for_axis() instead.
     """
-    pool = [q for q in QUESTIONS if q["axis_idx"] == axis_idx]
+    pool = QUESTIONS_BY_AXIS[axis_idx]
     if asked_ids:
         pool = [q for q in pool if q["id"] not in asked_ids]
     if not pool:
@@ -105,7 +164,9 @@ def get_question_for_axis(axis_idx: int, asked_ids: Optional[set] = None) -> Opt
 
 # eager-load on import
 try:
-    QUESTIONS, QUESTION_TRAITS = load_questions(QUESTIONS_XLSX)
+    QUESTIONS, QUESTION_TRAITS = load_compiled_questions(QUESTIONS_XLSX) or load_questions(QUESTIONS_XLSX)
 except Exception as e:
     # Keep module importable; surface a clearer error later if used.
     QUESTIONS, QUESTION_TRAITS = [], {}
+QUESTIONS_BY_AXIS = index_by_axis(QUESTIONS)
+QUESTION_INDEX = {q["id"]: i for i, q in enumerate(QUESTIONS)}
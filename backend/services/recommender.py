@@ -1,11 +1,20 @@
 # backend/services/recommender.py
 
 from __future__ import annotations
-from dataclasses import dataclass
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Dict, List
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple, Union
 
-import pandas as pd
+import numpy as np
+
+from .runtime_data import load_section, read_table
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 
@@ -13,6 +22,26 @@ MBTI_CLUSTER_PRIOR_CSV = DATA_DIR / "mbti_cluster_prior.csv"
 RIASEC_CLUSTER_MATRIX_CSV = DATA_DIR / "riasec_cluster_matrix.csv"
 CAREER_CLUSTERS_CSV = DATA_DIR / "career_clusters.csv"
 
+# Largest number of profiles accepted by one batch request
+CLUSTER_BATCH_MAX = int(os.getenv("IP_CLUSTER_BATCH_MAX", "1000"))
+# Memoized results (0 disables) and the rounding of the normalized RIASEC
+# vector in their key. Raw sums are small integers, so distinct profiles
+# differ by far more than 1e-9 after normalization: at 9 decimals only
+# proportional profiles, which score identically, share an entry.
+CLUSTER_CACHE_SIZE = int(os.getenv("IP_CLUSTER_CACHE_SIZE", "4096"))
+CLUSTER_CACHE_DECIMALS = int(os.getenv("IP_CLUSTER_CACHE_DECIMALS", "9"))
+# How often (seconds) the table watcher checks the CSVs for changes (0 disables)
+TABLE_RELOAD_INTERVAL = float(os.getenv("IP_RECOMMENDER_RELOAD_INTERVAL", "30"))
+
+RIASEC_CODES = ["R", "I", "A", "S", "E", "C"]
+
+
+def _row_sums(m: np.ndarray) -> np.ndarray:
+    """Row sums accumulated left to right; zero sums become 1.0 (safe divisors)."""
+    total = np.add.accumulate(m, axis=1)[:, -1] if m.shape[1] else np.zeros(len(m))
+    total[total == 0.0] = 1.0
+    return total
+
 
 @dataclass
 class ClusterRecommendation:
@@ -33,6 +62,114 @@ class ClusterRecommendation:
         if self.growth_skills is None:
             self.growth_skills = []
 
+    def copy(self) -> "ClusterRecommendation":
+        """Independent copy (including the skill lists), e.g. of a cached record."""
+        return replace(self, natural_skills=list(self.natural_skills), growth_skills=list(self.growth_skills))
+
+
+@dataclass(frozen=True)
+class ClusterPresentation:
+    """
+    Request-independent display fields of one cluster, resolved once when
+    the tables are compiled.
+    """
+    cluster: str
+    description: str
+    short_description: str
+    icon: str
+    growth_skills: Tuple[str, ...]
+    spark_interest: str
+    # Natural skills for MBTI types with neither / T / F / both of F and T
+    natural_skills_by_ft: Tuple[Tuple[str, ...], ...]
+
+    def natural_skills(self, mbti_type: str) -> List[str]:
+        return list(self.natural_skills_by_ft[2 * ("F" in mbti_type) + ("T" in mbti_type)])
+
+
+@dataclass(frozen=True)
+class RecommenderTables:
+    """
+    One version of the compiled scoring and presentation tables. Built off
+    to the side and swapped in whole; never modified afterwards (the arrays
+    are read-only), so a request keeps a consistent view across a reload.
+
+    Clusters are the prior-table columns (the candidates of step 8), in
+    column order; a cluster missing from the matrix scores 0 for P_RIASEC.
+    Duplicate matrix rows resolve to the last one.
+    """
+    version: int
+    loaded_at: float
+    # (mtime_ns, size) of each source CSV at load time (None: file missing)
+    sources: Dict[str, Optional[Tuple[int, int]]]
+    clusters: Tuple[str, ...]
+    # Names normalized to lowercase alphanumerics (dedup key), their
+    # ascending rank (name tie-break) and how many clusters repeat a name
+    cluster_norm: Tuple[str, ...]
+    name_rank: np.ndarray
+    n_duplicates: int
+    # Prior-table rows pre-normalized to sum to 1, and the unknown-MBTI fallback
+    prior_rows: Dict[str, np.ndarray]
+    uniform_prior: np.ndarray
+    # Unique matrix rows stored column-wise (the normalizer of step 7) and
+    # each cluster's row in it (-1: not in the matrix)
+    matrix_cols: np.ndarray
+    cluster_rows: np.ndarray
+    # Presentation fields aligned with clusters, and by normalized name
+    # (the first cluster of a name wins)
+    presentation: Tuple[ClusterPresentation, ...]
+    presentation_by_name: Dict[str, ClusterPresentation]
+
+
+def _file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _table_sources() -> Dict[str, Optional[Tuple[int, int]]]:
+    return {
+        p.name: _file_signature(p)
+        for p in (MBTI_CLUSTER_PRIOR_CSV, RIASEC_CLUSTER_MATRIX_CSV, CAREER_CLUSTERS_CSV)
+    }
+
+
+def _check_matrix_columns(columns: Sequence[str]) -> None:
+    # sanity: columns must be R,I,A,S,E,C
+    missing = [c for c in RIASEC_CODES if c not in columns]
+    if missing:
+        raise ValueError(f"riasec_cluster_matrix is missing columns {missing}")
+
+
+def _read_indexed_csv(path: Path, index_col: str) -> Tuple[List[str], List[str], np.ndarray]:
+    """(index, columns, float values) of a CSV whose `index_col` labels the rows; blanks are NaN."""
+    header, rows = read_table(path)
+    at = header.index(index_col)
+    keep = [j for j in range(len(header)) if j != at]
+    values = np.array(
+        [[float(row[j]) if row[j].strip() else np.nan for j in keep] for row in rows],
+        dtype=np.float64,
+    ).reshape(len(rows), len(keep))
+    return [row[at] for row in rows], [header[j] for j in keep], values
+
+
+def _frame_tables(prior_df: pd.DataFrame, matrix_df: pd.DataFrame,
+                  descriptions: Dict[str, str]) -> Dict[str, Any]:
+    """
+    The prior table and cluster matrix as plain lists/arrays (the input of
+    _build_tables, and what the runtime artifact stores).
+    """
+    _check_matrix_columns(list(matrix_df.columns))
+    return {
+        "prior_index": [str(mbti) for mbti in prior_df.index],
+        "clusters": [str(cluster) for cluster in prior_df.columns],
+        "prior_values": prior_df.to_numpy(dtype=np.float64),
+        "matrix_index": [str(cluster) for cluster in matrix_df.index],
+        "matrix_values": matrix_df[RIASEC_CODES].to_numpy(dtype=np.float64),
+        "descriptions": dict(descriptions),
+    }
+
 
 class CareerClusterRecommender:
     """
@@ -47,49 +184,301 @@ class CareerClusterRecommender:
       10. Take Top K clusters + explanation
     """
 
-    def __init__(self, alpha: float = 0.3, beta: float = 0.7):
+    def __init__(self, alpha: float = 0.3, beta: float = 0.7,
+                 cache_size: int = CLUSTER_CACHE_SIZE):
         """
         alpha = weight for MBTI→cluster prior  (step 8)
         beta  = weight for RIASEC_raw in the bridge (step 3.4)
+        cache_size = memoized results kept (LRU); 0 disables the cache
         """
         self.alpha = alpha
         self.beta = beta
 
+        # (tables version, mbti, quantized normalized RIASEC, top_k, alpha,
+        # beta) -> results,
+        # least recently used first
+        self.cache_size = int(cache_size)
+        self._cache: "OrderedDict[Tuple[Any, ...], Tuple[ClusterRecommendation, ...]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Rows that repeated a key already missed earlier in the same batch
+        # (scored once with it; not cache lookups)
+        self.cache_deduped = 0
+        self.cache_evicted = 0
+
+        self.riasec_codes = list(RIASEC_CODES)
+        self._tables: Optional[RecommenderTables] = None
+        # Source tables of the last load; the DataFrame views are built on demand
+        self._source: Dict[str, Any] = {}
+        self._prior_df: Optional[pd.DataFrame] = None
+        self._matrix_df: Optional[pd.DataFrame] = None
+        self._reload_lock = threading.Lock()
+        # Source signatures of the last failed reload (not retried until they change)
+        self._rejected_sources: Optional[Dict[str, Optional[Tuple[int, int]]]] = None
+        self._load_tables()
+
+    # ---------- Versioned tables -----------
+
+    def _load_tables(self) -> RecommenderTables:
+        """Read the source tables, build a new table version and swap it in."""
+        with self._reload_lock:
+            sources = _table_sources()
+            source = self._compiled_source_tables() or self.read_source_tables()
+            if _table_sources() != sources:
+                raise RuntimeError("recommender tables changed while loading")
+            tables = self._build_tables(source, sources)
+
+            self._source = source
+            self._prior_df = self._matrix_df = None
+            self.cluster_descriptions = source["descriptions"]
+            self._swap(tables)
+            return tables
+
+    @staticmethod
+    def read_source_tables() -> Dict[str, Any]:
+        """Parse the three source CSVs (see _frame_tables for the result)."""
         # 6. load MBTI → cluster prior table
-        self.mbti_prior_df = pd.read_csv(MBTI_CLUSTER_PRIOR_CSV)
-        self.mbti_prior_df.set_index("MBTI", inplace=True)
+        prior_index, clusters, prior_values = _read_indexed_csv(MBTI_CLUSTER_PRIOR_CSV, "MBTI")
 
         # 7. load RIASEC → cluster weight matrix
-        self.riasec_matrix_df = pd.read_csv(RIASEC_CLUSTER_MATRIX_CSV)
-        self.riasec_matrix_df.set_index("Cluster", inplace=True)
+        matrix_index, matrix_columns, matrix_values = _read_indexed_csv(
+            RIASEC_CLUSTER_MATRIX_CSV, "Cluster"
+        )
+        _check_matrix_columns(matrix_columns)
 
         # Load career clusters CSV for descriptions
-        self._load_cluster_descriptions()
+        descriptions = CareerClusterRecommender._load_cluster_descriptions()
+        return {
+            "prior_index": prior_index,
+            "clusters": clusters,
+            "prior_values": prior_values,
+            "matrix_index": matrix_index,
+            "matrix_values": matrix_values[:, [matrix_columns.index(c) for c in RIASEC_CODES]],
+            "descriptions": descriptions,
+        }
+
+    @staticmethod
+    def _compiled_source_tables() -> Optional[Dict[str, Any]]:
+        """read_source_tables() from the runtime artifact; None if missing or stale."""
+        section = load_section(
+            "recommender",
+            [str(p) for p in (MBTI_CLUSTER_PRIOR_CSV, RIASEC_CLUSTER_MATRIX_CSV, CAREER_CLUSTERS_CSV)],
+        )
+        if section is None:
+            return None
+        return {
+            "prior_index": section["prior_index"].tolist(),
+            "clusters": section["clusters"].tolist(),
+            "prior_values": section["prior_values"],
+            "matrix_index": section["matrix_index"].tolist(),
+            "matrix_values": section["matrix_values"],
+            "descriptions": dict(zip(
+                section["description_keys"].tolist(), section["description_values"].tolist()
+            )),
+        }
+
+    @property
+    def mbti_prior_df(self) -> pd.DataFrame:
+        """
+        The prior table as a DataFrame (MBTI index, one column per cluster).
+        For offline tools; requests never touch it, so pandas stays unloaded.
+        """
+        if self._prior_df is None:
+            import pandas as pd
+
+            self._prior_df = pd.DataFrame(
+                np.array(self._source["prior_values"]),
+                index=pd.Index(self._source["prior_index"], name="MBTI"),
+                columns=self._source["clusters"],
+            )
+        return self._prior_df
+
+    @mbti_prior_df.setter
+    def mbti_prior_df(self, df: pd.DataFrame) -> None:
+        self._prior_df = df
+
+    @property
+    def riasec_matrix_df(self) -> pd.DataFrame:
+        """The cluster matrix as a DataFrame (Cluster index, R..C columns)."""
+        if self._matrix_df is None:
+            import pandas as pd
+
+            self._matrix_df = pd.DataFrame(
+                np.array(self._source["matrix_values"]),
+                index=pd.Index(self._source["matrix_index"], name="Cluster"),
+                columns=list(RIASEC_CODES),
+            )
+        return self._matrix_df
+
+    @riasec_matrix_df.setter
+    def riasec_matrix_df(self, df: pd.DataFrame) -> None:
+        self._matrix_df = df
 
-        # sanity: columns must be R,I,A,S,E,C
-        self.riasec_codes = ["R", "I", "A", "S", "E", "C"]
-        assert all(c in self.riasec_matrix_df.columns for c in self.riasec_codes)
+    def reload_tables(self, force: bool = False) -> bool:
+        """
+        Load a new table version if any source CSV changed (or `force`).
+        Runs off the request path (watcher thread or admin call); on any
+        error the current tables stay in service. Returns True if swapped.
+        """
+        sources = _table_sources()
+        if not force and sources in (self._tables.sources, self._rejected_sources):
+            return False
+        try:
+            tables = self._load_tables()
+        except Exception as e:
+            self._rejected_sources = sources
+            print(f"[warn] Recommender tables not reloaded, keeping version {self.tables_version}: {e}")
+            return False
+        self._rejected_sources = None
+        print(f"[info] Recommender tables v{tables.version} loaded ({len(tables.clusters)} clusters)")
+        return True
 
-    def _load_cluster_descriptions(self):
+    def compile_tables(self) -> None:
+        """
+        Build a new table version from mbti_prior_df, riasec_matrix_df and
+        cluster_descriptions as they are now. Call after editing them in place.
+        """
+        with self._reload_lock:
+            sources = self._tables.sources if self._tables is not None else _table_sources()
+            self._swap(self._build_tables(
+                _frame_tables(self.mbti_prior_df, self.riasec_matrix_df, self.cluster_descriptions),
+                sources,
+            ))
+
+    def _swap(self, tables: RecommenderTables) -> None:
+        # A single attribute store: requests that already hold the old
+        # version finish on it. Cached results of old versions can no longer
+        # match (the version is part of the key), so drop them.
+        self._tables = tables
+        self.clear_cache()
+
+    @property
+    def tables_version(self) -> int:
+        return self._tables.version if self._tables is not None else 0
+
+    @property
+    def cluster_presentation(self) -> Dict[str, ClusterPresentation]:
+        return self._tables.presentation_by_name
+
+    def tables_info(self) -> Dict[str, Any]:
+        tables = self._tables
+        return {
+            "version": tables.version,
+            "loaded_at": tables.loaded_at,
+            "clusters": len(tables.clusters),
+            "mbti_types": len(tables.prior_rows),
+            "sources": {name: sig is not None for name, sig in tables.sources.items()},
+        }
+
+    def _build_tables(
+        self,
+        source: Dict[str, Any],
+        sources: Dict[str, Optional[Tuple[int, int]]],
+    ) -> RecommenderTables:
+        """Convert the prior table and cluster matrix into aligned NumPy arrays."""
+        clusters = tuple(source["clusters"])
+        cluster_norm = tuple(
+            "".join(ch.lower() for ch in str(name) if ch.isalnum()) for name in clusters
+        )
+        order = sorted(range(len(clusters)), key=lambda j: cluster_norm[j])
+        name_rank = np.empty(len(clusters), dtype=np.int64)
+        name_rank[order] = np.arange(len(clusters))
+
+        prior = np.asarray(source["prior_values"], dtype=np.float64)
+        prior_rows = {
+            str(mbti): row / (sum(row.tolist()) or 1.0)
+            for mbti, row in zip(source["prior_index"], prior)
+        }
+        n = len(clusters)
+        uniform_prior = np.full(n, 1.0 / n) if n else np.zeros(0)
+
+        matrix_rows: Dict[str, int] = {}
+        for i, cluster in enumerate(source["matrix_index"]):
+            matrix_rows[cluster] = i
+        weights = np.asarray(source["matrix_values"], dtype=np.float64)
+        matrix_cols = np.ascontiguousarray(weights[list(matrix_rows.values())].T)
+        position = {cluster: k for k, cluster in enumerate(matrix_rows)}
+        cluster_rows = np.array([position.get(c, -1) for c in clusters], dtype=np.int64)
+
+        presentation = tuple(self._resolve_presentation(c, source["descriptions"]) for c in clusters)
+        presentation_by_name: Dict[str, ClusterPresentation] = {}
+        for norm, record in zip(cluster_norm, presentation):
+            presentation_by_name.setdefault(norm, record)
+
+        for arr in (name_rank, uniform_prior, matrix_cols, cluster_rows, *prior_rows.values()):
+            arr.setflags(write=False)
+        return RecommenderTables(
+            version=self.tables_version + 1,
+            loaded_at=time.time(),
+            sources=sources,
+            clusters=clusters,
+            cluster_norm=cluster_norm,
+            name_rank=name_rank,
+            n_duplicates=len(clusters) - len(set(cluster_norm)),
+            prior_rows=prior_rows,
+            uniform_prior=uniform_prior,
+            matrix_cols=matrix_cols,
+            cluster_rows=cluster_rows,
+            presentation=presentation,
+            presentation_by_name=presentation_by_name,
+        )
+
+    def _resolve_presentation(self, cluster: str, descriptions: Dict[str, str]) -> ClusterPresentation:
+        """Run the description/icon/skills lookups for one cluster."""
+        description = self._get_cluster_description(cluster, descriptions)
+        return ClusterPresentation(
+            cluster=cluster,
+            description=description,
+            short_description=self._get_short_description(description, cluster),
+            icon=self._get_cluster_icon(cluster),
+            growth_skills=tuple(self._get_growth_skills(cluster)),
+            spark_interest=self._get_spark_interest(cluster),
+            natural_skills_by_ft=tuple(
+                tuple(self._get_natural_skills(cluster, ft, {})) for ft in ("", "T", "F", "FT")
+            ),
+        )
+
+    # ---------- Result cache -----------
+
+    def clear_cache(self) -> None:
+        with self._cache_lock:
+            self._cache.clear()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Entries and hit/miss/in-batch-duplicate/eviction counters of the result cache."""
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "entries": len(self._cache),
+            "max_entries": self.cache_size,
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "deduped": self.cache_deduped,
+            "evicted": self.cache_evicted,
+            "hit_rate": round(self.cache_hits / lookups, 4) if lookups else 0.0,
+        }
+
+    @staticmethod
+    def _load_cluster_descriptions() -> Dict[str, str]:
         """
         Load cluster descriptions from career_clusters.csv.
-        Creates a dictionary mapping cluster names to their descriptions.
+        Returns a dictionary mapping cluster names to their descriptions.
         Handles duplicate cluster names by taking the first valid description.
         """
-        self.cluster_descriptions: Dict[str, str] = {}
+        cluster_descriptions: Dict[str, str] = {}
         
         if not CAREER_CLUSTERS_CSV.exists():
             print(f"[warn] career_clusters.csv not found at {CAREER_CLUSTERS_CSV}")
-            return
+            return cluster_descriptions
         
         try:
-            clusters_df = pd.read_csv(CAREER_CLUSTERS_CSV, encoding='utf-8')
+            header, rows = read_table(CAREER_CLUSTERS_CSV)
             
             # Handle case-insensitive column names
             cluster_col = None
             about_col = None
             
-            for col in clusters_df.columns:
+            for col in header:
                 col_lower = col.lower().strip().replace('_', ' ').replace('-', ' ')
                 if 'career' in col_lower and 'cluster' in col_lower:
                     cluster_col = col
@@ -98,7 +487,7 @@ class CareerClusterRecommender:
             
             if not cluster_col:
                 # Try alternative column name patterns
-                for col in clusters_df.columns:
+                for col in header:
                     if 'cluster' in col.lower():
                         cluster_col = col
                         break
@@ -106,8 +495,9 @@ class CareerClusterRecommender:
             if cluster_col and about_col:
                 # Group by cluster name (in case of duplicates) and take the first description
                 seen_clusters = set()
-                for _, row in clusters_df.iterrows():
-                    cluster_name = str(row[cluster_col]).strip()
+                cluster_at, about_at = header.index(cluster_col), header.index(about_col)
+                for row in rows:
+                    cluster_name = str(row[cluster_at]).strip()
                     if not cluster_name or cluster_name.lower() == 'nan':
                         continue
                     
@@ -116,24 +506,26 @@ class CareerClusterRecommender:
                     if cluster_normalized_key in seen_clusters:
                         continue
                     
-                    description = str(row[about_col]).strip()
+                    description = str(row[about_at]).strip()
                     if description and description.lower() != 'nan' and len(description) > 0:
                         # Store with multiple key formats for flexible lookup
-                        self.cluster_descriptions[cluster_name] = description
-                        self.cluster_descriptions[cluster_normalized_key] = description
+                        cluster_descriptions[cluster_name] = description
+                        cluster_descriptions[cluster_normalized_key] = description
                         seen_clusters.add(cluster_normalized_key)
                 
                 unique_count = len(seen_clusters)
                 print(f"[info] Loaded {unique_count} unique cluster descriptions from {CAREER_CLUSTERS_CSV.name}")
             else:
                 print(f"[warn] Could not find required columns in career_clusters.csv")
-                print(f"[warn] Available columns: {clusters_df.columns.tolist()}")
+                print(f"[warn] Available columns: {header}")
                 
         except Exception as e:
             print(f"[warn] Failed to load cluster descriptions: {e}")
             import traceback
             traceback.print_exc()
 
+        return cluster_descriptions
+
     # ---------- Step 4: MBTI → RIASEC bridge -----------
 
     def _mbti_to_riasec_hint(self, mbti_type: str) -> Dict[str, float]:
@@ -219,155 +611,220 @@ class CareerClusterRecommender:
         mbti_type: e.g. "ENFJ"
         riasec_raw: raw R,I,A,S,E,C sums from quiz, e.g. {"R":8, "I":14, ...}
         """
+        return self.recommend_batch([mbti_type], [riasec_raw], top_k=top_k)[0]
+
+    def recommend_batch(
+        self,
+        mbti_types: Sequence[str],
+        riasec_raw: Union[Sequence[Dict[str, float]], np.ndarray],
+        top_k: int = 3,
+    ) -> List[List[ClusterRecommendation]]:
+        """
+        Score N profiles in one pass (e.g. a whole class).
+
+        mbti_types: N MBTI codes
+        riasec_raw: N dicts as for recommend(), or an (N, 6) array of raw
+                    sums in R, I, A, S, E, C order
+        Returns the top-k recommendations of each profile, in input order.
+        """
+        types = [(t or "").upper().strip() for t in mbti_types]
+        for i, t in enumerate(types):
+            if not t:
+                raise ValueError("mbti_type is required" if len(types) == 1 else f"mbti_type is required (row {i})")
+
+        if isinstance(riasec_raw, np.ndarray):
+            raw = riasec_raw.astype(np.float64)
+        else:
+            raw = np.array(
+                [[float(r.get(c, 0.0)) for c in self.riasec_codes] for r in riasec_raw],
+                dtype=np.float64,
+            ).reshape(-1, len(self.riasec_codes))
+        if raw.shape != (len(types), len(self.riasec_codes)):
+            raise ValueError(
+                f"riasec_raw must have one row of {len(self.riasec_codes)} scores per MBTI code "
+                f"(got {raw.shape} for {len(types)} codes)"
+            )
+        if not types:
+            return []
 
-        mbti_type = (mbti_type or "").upper().strip()
-        if not mbti_type:
-            raise ValueError("mbti_type is required")
+        # One table version for the whole call, even if a reload swaps it meanwhile
+        tables = self._tables
 
         # ---------- 2. Normalize raw RIASEC quiz scores ----------
-        total_raw = sum(float(riasec_raw.get(c, 0.0)) for c in self.riasec_codes) or 1.0
-        riasec_raw_norm = {
-            c: float(riasec_raw.get(c, 0.0)) / total_raw for c in self.riasec_codes
-        }
+        # (Rows are summed left to right, like sum() over the scalar values,
+        # so probabilities and therefore exact ties are reproducible.)
+        raw_norm = raw / _row_sums(raw)[:, None]
+
+        # Every later step depends only on the MBTI code and raw_norm, so
+        # results are memoized on them (rows repeated within the batch are
+        # scored once). Callers always get fresh copies of the cached records,
+        # so mutating a response can never leak into later requests.
+        if self.cache_size <= 0:
+            return self._recommend_rows(tables, types, raw_norm, top_k)
+        quantized = np.round(raw_norm, CLUSTER_CACHE_DECIMALS).tolist()
+        keys = [
+            (tables.version, t, tuple(q), top_k, self.alpha, self.beta)
+            for t, q in zip(types, quantized)
+        ]
+        results: List[Any] = [None] * len(types)
+        todo: Dict[Tuple[Any, ...], List[int]] = {}
+        with self._cache_lock:
+            for i, key in enumerate(keys):
+                pending = todo.get(key)
+                if pending is not None:
+                    pending.append(i)
+                    self.cache_deduped += 1
+                    continue
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    self.cache_hits += 1
+                    results[i] = [r.copy() for r in cached]
+                else:
+                    self.cache_misses += 1
+                    todo[key] = [i]
+
+        if todo:
+            first_rows = [rows[0] for rows in todo.values()]
+            computed = self._recommend_rows(
+                tables, [types[i] for i in first_rows], raw_norm[first_rows], top_k
+            )
+            with self._cache_lock:
+                for (key, rows), recs in zip(todo.items(), computed):
+                    self._cache[key] = tuple(recs)
+                    for i in rows:
+                        results[i] = [r.copy() for r in recs]
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+                    self.cache_evicted += 1
+        return results
 
+    def _recommend_rows(
+        self,
+        tables: RecommenderTables,
+        types: List[str],
+        raw_norm: np.ndarray,
+        top_k: int,
+    ) -> List[List[ClusterRecommendation]]:
+        """Steps 3–10 for rows of normalized raw RIASEC scores."""
         # ---------- 3. MBTI → RIASEC adjustment bridge ----------
-        riasec_mbti = self._mbti_to_riasec_hint(mbti_type)
+        hints = {}
+        for t in set(types):
+            riasec_mbti = self._mbti_to_riasec_hint(t)
+            hints[t] = np.array([riasec_mbti[c] for c in self.riasec_codes])
+        hint = np.vstack([hints[t] for t in types])
 
         # Blend: RIASEC_final = β * raw + (1-β) * mbti_hint
-        riasec_final = {
-            c: self.beta * riasec_raw_norm[c] + (1.0 - self.beta) * riasec_mbti[c]
-            for c in self.riasec_codes
-        }
+        final = self.beta * raw_norm + (1.0 - self.beta) * hint
 
         # tiny numerical clean-up
-        s = sum(riasec_final.values()) or 1.0
-        riasec_final = {c: v / s for c, v in riasec_final.items()}
+        final = final / _row_sums(final)[:, None]
 
         # ---------- 6. MBTI → cluster prior P_MBTI ----------
-        try:
-            mbti_row = self.mbti_prior_df.loc[mbti_type]
-        except KeyError:
-            # fallback: uniform if MBTI not found
-            mbti_row = pd.Series(
-                [1.0] * len(self.mbti_prior_df.columns),
-                index=self.mbti_prior_df.columns,
-            )
-        mbti_scores = mbti_row.to_dict()
-        sum_mbti = sum(mbti_scores.values()) or 1.0
-        p_mbti = {cluster: v / sum_mbti for cluster, v in mbti_scores.items()}
+        # (fallback: uniform if MBTI not found)
+        p_mbti = np.vstack([tables.prior_rows.get(t, tables.uniform_prior) for t in types])
 
         # ---------- 7. RIASEC → cluster similarity P_RIASEC ----------
-        p_riasec: Dict[str, float] = {}
-        for cluster, row in self.riasec_matrix_df.iterrows():
-            # dot product score(cluster)
-            s_val = 0.0
-            for c in self.riasec_codes:
-                s_val += riasec_final[c] * float(row[c])
-            p_riasec[cluster] = s_val
-
-        # normalize
-        sum_r = sum(p_riasec.values()) or 1.0
-        p_riasec = {cluster: v / sum_r for cluster, v in p_riasec.items()}
+        # (N × clusters) dot products, accumulated one code at a time
+        scores = np.multiply.outer(final[:, 0], tables.matrix_cols[0])
+        for c in range(1, len(self.riasec_codes)):
+            scores += np.multiply.outer(final[:, c], tables.matrix_cols[c])
+        scores = scores / _row_sums(scores)[:, None]
+        # (index -1 picks the appended zero column: cluster missing from the matrix)
+        p_riasec = np.hstack([scores, np.zeros((len(types), 1))])[:, tables.cluster_rows]
 
         # ---------- 8. Combine signals ----------
         alpha = self.alpha
-        p_final: Dict[str, float] = {}
-        for cluster in p_mbti.keys():
-            p_final[cluster] = (
-                alpha * p_mbti[cluster] + (1.0 - alpha) * p_riasec.get(cluster, 0.0)
-            )
+        p_final = alpha * p_mbti + (1.0 - alpha) * p_riasec
 
         # renormalize one last time
-        z = sum(p_final.values()) or 1.0
-        for k in list(p_final.keys()):
-            p_final[k] = p_final[k] / z
+        p_final = p_final / _row_sums(p_final)[:, None]
 
         # ---------- 9–10. Sort + top-k with tie-breaking and deduplication ----------
-        # Create tuples with multiple sort keys for deterministic tie-breaking:
+        # Sort keys, for deterministic tie-breaking:
         # 1. Primary: final probability (descending)
-        # 2. Secondary: RIASEC similarity score (descending) 
+        # 2. Secondary: RIASEC similarity score (descending)
         # 3. Tertiary: MBTI prior score (descending)
-        # 4. Quaternary: cluster name (ascending for deterministic ordering)
-        # This ensures that even if probabilities are identical, the order is stable and unique.
-        cluster_tuples = []
-        for cluster, prob in p_final.items():
-            # Normalize cluster name for aggressive duplicate detection
-            # Remove all non-alphanumeric characters and convert to lowercase
-            # This handles "Arts, AV..." vs "Arts AV" or "STEM" vs "S.T.E.M."
-            cluster_str = str(cluster)
-            cluster_normalized = "".join(c.lower() for c in cluster_str if c.isalnum())
-            
-            # Get tie-breaking scores
-            riasec_secondary = p_riasec.get(cluster, 0.0)
-            mbti_secondary = p_mbti.get(cluster, 0.0)
-            
-            cluster_tuples.append((
-                prob,                    # Primary: final probability
-                riasec_secondary,        # Secondary: RIASEC similarity
-                mbti_secondary,          # Tertiary: MBTI prior
-                cluster_normalized,      # Quaternary: normalized name for sorting
-                cluster                  # Original cluster name for output
+        # 4. Quaternary: cluster name normalized to lowercase alphanumerics
+        #    (ascending); the same normalization drives deduplication, so
+        #    "Arts, AV..." vs "Arts AV" or "STEM" vs "S.T.E.M." collapse.
+        # Only the best top_k (+ possible duplicates) by probability can make
+        # the cut; everything tied with the cut-off value is kept as well.
+        n_clusters = p_final.shape[1]
+        n_candidates = min(n_clusters, top_k + tables.n_duplicates)
+        if n_candidates <= 0:
+            return [[] for _ in types]
+        if n_candidates < n_clusters:
+            kth = np.argpartition(-p_final, n_candidates - 1, axis=1)[:, n_candidates - 1]
+            cutoff = p_final[np.arange(len(types)), kth]
+            in_cut = p_final >= cutoff[:, None]
+        else:
+            in_cut = np.ones(p_final.shape, dtype=bool)
+
+        results: List[List[ClusterRecommendation]] = []
+        for i, mbti_type in enumerate(types):
+            candidates = np.flatnonzero(in_cut[i])
+            order = np.lexsort((
+                tables.name_rank[candidates],
+                -p_mbti[i, candidates],
+                -p_riasec[i, candidates],
+                -p_final[i, candidates],
             ))
-        
-        # Sort with multiple keys: all descending except cluster name (ascending for determinism)
-        sorted_clusters = sorted(
-            cluster_tuples,
-            key=lambda x: (-x[0], -x[1], -x[2], x[3])  # Negative for descending
-        )
+            riasec_final = dict(zip(self.riasec_codes, final[i].tolist()))
 
-        # Deduplicate and select top-k unique clusters
-        seen_clusters = set()
-        recommendations: List[ClusterRecommendation] = []
-        
-        for final_prob, riasec_sec, mbti_sec, cluster_norm, cluster_orig in sorted_clusters:
-            # Skip if we've already seen this cluster (based on aggressive normalization)
-            if cluster_norm in seen_clusters:
-                continue
-            
-            # Check if we have enough recommendations
-            if len(recommendations) >= top_k:
-                break
-            
-            # Add to seen set
-            seen_clusters.add(cluster_norm)
-            
-            # Build detailed cluster information
-            full_description = self._get_cluster_description(cluster_orig)
-            short_desc = self._get_short_description(full_description, cluster_orig)
-            icon = self._get_cluster_icon(cluster_orig)
-            why_fits = self._build_why_it_fits(
-                cluster=cluster_orig,
-                mbti_type=mbti_type,
-                riasec_final=riasec_final,
-            )
-            natural_skills = self._get_natural_skills(cluster_orig, mbti_type, riasec_final)
-            growth_skills = self._get_growth_skills(cluster_orig)
-            spark_interest = self._get_spark_interest(cluster_orig)
-            
-            recommendations.append(
-                ClusterRecommendation(
-                    cluster=cluster_orig,
-                    probability=final_prob,
-                    explanation=full_description,
-                    icon=icon,
-                    short_description=short_desc,
-                    why_it_fits=why_fits,
-                    natural_skills=natural_skills,
-                    growth_skills=growth_skills,
-                    spark_interest=spark_interest,
+            # Deduplicate and select top-k unique clusters
+            seen_clusters = set()
+            recommendations: List[ClusterRecommendation] = []
+            for j in candidates[order]:
+                # Skip if we've already seen this cluster (based on aggressive normalization)
+                if tables.cluster_norm[j] in seen_clusters:
+                    continue
+                if len(recommendations) >= top_k:
+                    break
+                seen_clusters.add(tables.cluster_norm[j])
+                recommendations.append(
+                    self._build_recommendation(
+                        tables.presentation[j], float(p_final[i, j]), mbti_type, riasec_final
+                    )
                 )
-            )
+            results.append(recommendations)
 
-        return recommendations
+        return results
+
+    def _build_recommendation(
+        self,
+        p: ClusterPresentation,
+        probability: float,
+        mbti_type: str,
+        riasec_final: Dict[str, float],
+    ) -> ClusterRecommendation:
+        """Detailed cluster information: precomputed fields + personalized lines."""
+        return ClusterRecommendation(
+            cluster=p.cluster,
+            probability=probability,
+            explanation=p.description,
+            icon=p.icon,
+            short_description=p.short_description,
+            why_it_fits=self._build_why_it_fits(
+                cluster=p.cluster,
+                mbti_type=mbti_type,
+                riasec_final=riasec_final,
+            ),
+            natural_skills=p.natural_skills(mbti_type),
+            growth_skills=list(p.growth_skills),
+            spark_interest=p.spark_interest,
+        )
 
     # ---------- Explanation helper ----------
 
-    def _get_cluster_description(self, cluster: str) -> str:
+    def _get_cluster_description(self, cluster: str, descriptions: Optional[Dict[str, str]] = None) -> str:
         """
         Get cluster description from career_clusters.csv.
         Returns the description if found, otherwise returns a fallback message.
         Uses multiple matching strategies to handle variations in cluster names.
         """
+        if descriptions is None:
+            descriptions = self.cluster_descriptions
         if not cluster or not isinstance(cluster, str):
             return "This career cluster aligns with your personality and interests."
         
@@ -376,32 +833,32 @@ class CareerClusterRecommender:
             return "This career cluster aligns with your personality and interests."
         
         # Strategy 1: Try exact match first
-        if cluster in self.cluster_descriptions:
-            return self.cluster_descriptions[cluster]
+        if cluster in descriptions:
+            return descriptions[cluster]
         
         # Strategy 2: Try case-insensitive match
         cluster_upper = cluster.upper()
-        if cluster_upper in self.cluster_descriptions:
-            return self.cluster_descriptions[cluster_upper]
+        if cluster_upper in descriptions:
+            return descriptions[cluster_upper]
         
         # Strategy 3: Try normalized match (remove special characters and compare)
         cluster_normalized = "".join(c.upper() for c in cluster if c.isalnum() or c.isspace())
         cluster_normalized = " ".join(cluster_normalized.split())  # Normalize whitespace
         
-        for key in self.cluster_descriptions.keys():
+        for key in descriptions.keys():
             key_normalized = "".join(c.upper() for c in str(key) if c.isalnum() or c.isspace())
             key_normalized = " ".join(key_normalized.split())
             if cluster_normalized == key_normalized:
-                return self.cluster_descriptions[key]
+                return descriptions[key]
         
         # Strategy 4: Try substring match (check if cluster name contains key or vice versa)
-        for key in self.cluster_descriptions.keys():
+        for key in descriptions.keys():
             key_str = str(key).upper()
             cluster_str = cluster.upper()
             # Check if either is a substring of the other (for partial matches)
             if len(key_str) > 5 and len(cluster_str) > 5:  # Avoid too short matches
                 if key_str in cluster_str or cluster_str in key_str:
-                    return self.cluster_descriptions[key]
+                    return descriptions[key]
         
         # Fallback: return a generic message
         print(f"[warn] Could not find description for cluster: '{cluster}'")
@@ -602,3 +1059,35 @@ class CareerClusterRecommender:
             return "If you're drawn to creative expression and visual storytelling, this cluster lets you turn your artistic interests into professional opportunities."
         else:
             return f"If you're interested in {cluster}, this cluster offers diverse paths that align with your personality and interests."
+
+
+# -----------------------------
+# TABLE WATCHER
+# -----------------------------
+_watcher_thread: Optional[threading.Thread] = None
+_watcher_stop = threading.Event()
+
+
+def start_table_watcher(
+    recommender: CareerClusterRecommender, interval: float = TABLE_RELOAD_INTERVAL
+) -> None:
+    """Start the daemon thread that calls recommender.reload_tables() every `interval` seconds (idempotent)."""
+    global _watcher_thread
+    if interval <= 0 or (_watcher_thread is not None and _watcher_thread.is_alive()):
+        return
+    _watcher_stop.clear()
+
+    def _run():
+        while not _watcher_stop.wait(interval):
+            recommender.reload_tables()
+
+    _watcher_thread = threading.Thread(target=_run, name="recommender-tables", daemon=True)
+    _watcher_thread.start()
+
+
+def stop_table_watcher() -> None:
+    global _watcher_thread
+    _watcher_stop.set()
+    if _watcher_thread is not None:
+        _watcher_thread.join(timeout=5.0)
+    _watcher_thread = None
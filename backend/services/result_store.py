@@ -0,0 +1,610 @@
+# services/result_store.py
+"""
+Append-only columnar store for quiz results.
+
+Each store is a directory holding a manifest and a list of immutable
+segments. A segment is a directory with one .npy file per column, so
+readers load only the columns they need (numeric columns are memory-mapped).
+Rows are buffered in memory by append(), which does no I/O while the
+background writer is running: the writer thread (start_writer) turns full
+buffers into segments, flushes partial ones every FLUSH_INTERVAL seconds,
+and drains everything on stop_writer() / interpreter exit. Without the
+writer (scripts, CLIs) a full buffer is flushed inline by append().
+
+    logs/store/riasec_results/
+        manifest.json
+        seg-00000001/session_id.npy
+        seg-00000001/R_sum.npy
+        ...
+
+Column types are NumPy dtype strings ("f8", "i8", "i1", ...) or "str" for
+text, which is stored as fixed-width unicode sized per segment.
+
+Several processes (uvicorn workers) may append to the same store: segment
+and manifest writes happen under an exclusive advisory lock on
+<store>/.lock, and the manifest is swapped in atomically, so readers never
+need the lock. Every flush adds a small segment; `compact` merges them.
+
+Usage (from backend/):
+  python -m services.result_store import-csv   # import the legacy CSV logs once
+  python -m services.result_store compact      # merge small segments
+  python -m services.result_store info
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import csv
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, run a single worker there
+    fcntl = None
+
+STORE_DIR = os.getenv("IP_RESULT_STORE_DIR", "logs/store")
+FLUSH_ROWS = int(os.getenv("IP_RESULT_STORE_FLUSH_ROWS", "64"))
+FLUSH_INTERVAL = float(os.getenv("IP_RESULT_STORE_FLUSH_INTERVAL", "5"))
+
+MANIFEST = "manifest.json"
+MANIFEST_VERSION = 1
+LOCK_FILE = ".lock"
+COMPACT_SEGMENT_ROWS = 1_000_000
+
+# Value used for a missing numeric cell, per dtype kind
+_MISSING = {"f": np.nan, "i": 0, "u": 0, "b": False}
+
+
+def _missing_value(dtype: str) -> Any:
+    if dtype == "str":
+        return ""
+    return _MISSING[np.dtype(dtype).kind]
+
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """Exclusive advisory lock on `path` (created if missing), held across processes."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a+") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class ResultStore:
+    def __init__(
+        self,
+        name: str,
+        columns: Sequence[Tuple[str, str]],
+        root: str = STORE_DIR,
+        flush_rows: int = FLUSH_ROWS,
+    ):
+        self.name = name
+        self.columns: List[Tuple[str, str]] = [(c, t) for c, t in columns]
+        self.column_names = [c for c, _t in self.columns]
+        self.path = os.path.join(root, name)
+        self.flush_rows = max(1, flush_rows)
+        self._buffer: List[Tuple[Any, ...]] = []
+        self._lock = threading.Lock()        # guards _buffer; never held during I/O
+        self._write_lock = threading.Lock()  # serialises segment + manifest writes
+
+    # -- manifest -------------------------------------------------------------
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.path, MANIFEST)
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self._manifest_path(), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return {
+                "version": MANIFEST_VERSION,
+                "name": self.name,
+                "columns": self.columns,
+                "segments": [],
+                "next_segment": 1,
+            }
+        if manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"{self._manifest_path()}: unsupported manifest version")
+        return manifest
+
+    def _write_manifest(self, manifest: Dict[str, Any]) -> None:
+        tmp = f"{self._manifest_path()}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, self._manifest_path())
+
+    def segments(self) -> List[Dict[str, Any]]:
+        return list(self._read_manifest()["segments"])
+
+    # -- writing --------------------------------------------------------------
+
+    def append(self, row: Mapping[str, Any]) -> None:
+        """Buffer one row (a mapping of column -> value; missing columns get a default)."""
+        values = tuple(row.get(c, _missing_value(t)) for c, t in self.columns)
+        with self._lock:
+            self._buffer.append(values)
+            full = len(self._buffer) >= self.flush_rows
+        if full:
+            if writer_running():
+                _writer_wake.set()
+            else:
+                self.flush()
+
+    def extend(self, rows: Iterable[Mapping[str, Any]]) -> int:
+        n = 0
+        for row in rows:
+            self.append(row)
+            n += 1
+        return n
+
+    def pending(self) -> int:
+        """Rows buffered in memory, not yet written to a segment."""
+        with self._lock:
+            return len(self._buffer)
+
+    def flush(self) -> int:
+        """Write buffered rows as a new segment; returns the number of rows written."""
+        with self._write_lock:
+            with self._lock:
+                rows, self._buffer = self._buffer, []
+            if not rows:
+                return 0
+            try:
+                self._write_segment(rows)
+            except Exception:
+                # Put the rows back so the next flush retries them
+                with self._lock:
+                    self._buffer[:0] = rows
+                raise
+            return len(rows)
+
+    def _column_array(self, values: Sequence[Any], dtype: str) -> np.ndarray:
+        if dtype == "str":
+            return np.asarray([("" if v is None else str(v)) for v in values], dtype=str)
+        missing = _missing_value(dtype)
+        return np.asarray([missing if v is None else v for v in values], dtype=dtype)
+
+    def _check_schema(self, manifest: Dict[str, Any]) -> None:
+        if [list(c) for c in manifest["columns"]] != [list(c) for c in self.columns]:
+            raise ValueError(f"{self.path}: column schema does not match the manifest")
+
+    def _segment_dirs(self) -> Dict[str, int]:
+        """Committed-looking segment directories on disk: name -> number (temp dirs excluded)."""
+        out = {}
+        for entry in os.listdir(self.path):
+            if entry.startswith("seg-") and not entry.endswith(".tmp") and entry[4:].isdigit():
+                out[entry] = int(entry[4:])
+        return out
+
+    def _save_segment(self, manifest: Dict[str, Any], arrays: Sequence[np.ndarray]) -> Dict[str, Any]:
+        """Write one segment directory and return its manifest entry (caller holds the file lock)."""
+        # A writer that died between renaming its segment into place and
+        # writing the manifest leaves a seg-N the manifest does not know
+        # about; never reuse a number that already exists on disk.
+        on_disk = self._segment_dirs().values()
+        manifest["next_segment"] = max([manifest["next_segment"]] + [n + 1 for n in on_disk])
+        seg_name = f"seg-{manifest['next_segment']:08d}"
+        seg_dir = os.path.join(self.path, seg_name)
+        tmp_dir = f"{seg_dir}.{os.getpid()}.tmp"
+
+        os.makedirs(tmp_dir, exist_ok=True)
+        for (col, _dtype), values in zip(self.columns, arrays):
+            np.save(os.path.join(tmp_dir, f"{col}.npy"), values)
+        os.replace(tmp_dir, seg_dir)
+        manifest["next_segment"] += 1
+        return {"name": seg_name, "rows": int(len(arrays[0]))}
+
+    def _write_segment(self, rows: List[Tuple[Any, ...]]) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        by_column = list(zip(*rows))
+        arrays = [self._column_array(values, dtype) for (_c, dtype), values in zip(self.columns, by_column)]
+
+        # Other workers append to the same manifest; serialise the read-modify-write
+        with file_lock(os.path.join(self.path, LOCK_FILE)):
+            manifest = self._read_manifest()
+            self._check_schema(manifest)
+            manifest["segments"].append(self._save_segment(manifest, arrays))
+            self._write_manifest(manifest)
+
+    def write_columns(self, columns: Mapping[str, np.ndarray]) -> int:
+        """
+        Append a block of rows given as whole columns (bulk jobs); written
+        straight to a new segment after any buffered rows. Missing columns are
+        filled with their default.
+        """
+        lengths = {len(v) for v in columns.values()}
+        if len(lengths) != 1:
+            raise ValueError("write_columns: columns have different lengths")
+        n = lengths.pop()
+        if n == 0:
+            return 0
+        arrays = []
+        for col, dtype in self.columns:
+            if col in columns:
+                values = np.asarray(columns[col])
+                arrays.append(values.astype(str) if dtype == "str" else values.astype(dtype))
+            else:
+                arrays.append(self._column_array([None] * n, dtype))
+
+        self.flush()
+        with self._write_lock:
+            os.makedirs(self.path, exist_ok=True)
+            with file_lock(os.path.join(self.path, LOCK_FILE)):
+                manifest = self._read_manifest()
+                self._check_schema(manifest)
+                manifest["segments"].append(self._save_segment(manifest, arrays))
+                self._write_manifest(manifest)
+        return n
+
+    def compact(self, segment_rows: int = COMPACT_SEGMENT_ROWS) -> Tuple[int, int]:
+        """
+        Merge all segments into as few as possible (at most `segment_rows`
+        rows each). Returns (segments before, segments after).
+
+        Writers block on the store lock while this runs. Readers that still
+        hold the old manifest retry when its segments disappear.
+        """
+        if not os.path.isdir(self.path):
+            return (0, 0)
+        with self._write_lock, file_lock(os.path.join(self.path, LOCK_FILE)):
+            manifest = self._read_manifest()
+            self._check_schema(manifest)
+            old = manifest["segments"]
+            if len(old) <= 1:
+                return (len(old), len(old))
+
+            columns = self._load_segments(old, self.column_names)
+            total = len(columns[self.column_names[0]])
+            new = []
+            for start in range(0, total, max(1, segment_rows)):
+                chunk = [columns[c][start:start + segment_rows] for c in self.column_names]
+                new.append(self._save_segment(manifest, chunk))
+            manifest["segments"] = new
+            self._write_manifest(manifest)
+
+            for seg in old:
+                shutil.rmtree(os.path.join(self.path, seg["name"]), ignore_errors=True)
+            self._remove_orphan_segments(manifest)
+            self._remove_stale_tmp()
+        return (len(old), len(new))
+
+    def _remove_orphan_segments(self, manifest: Dict[str, Any]) -> None:
+        """Drop segment directories no manifest ever listed (crash before the manifest write)."""
+        listed = {seg["name"] for seg in manifest["segments"]}
+        for name in self._segment_dirs():
+            if name not in listed:
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+
+    def _remove_stale_tmp(self, max_age: float = 3600.0) -> None:
+        """Drop temp segment directories left behind by crashed writers."""
+        now = time.time()
+        for entry in os.listdir(self.path):
+            path = os.path.join(self.path, entry)
+            if entry.endswith(".tmp") and os.path.isdir(path):
+                if now - os.path.getmtime(path) > max_age:
+                    shutil.rmtree(path, ignore_errors=True)
+
+    # -- reading --------------------------------------------------------------
+
+    def __len__(self) -> int:
+        with self._write_lock:
+            flushed = sum(seg["rows"] for seg in self.segments())
+            return flushed + self.pending()
+
+    def read_columns(
+        self, names: Optional[Sequence[str]] = None, include_buffer: bool = True
+    ) -> Dict[str, np.ndarray]:
+        """
+        Concatenate the requested columns across all segments (plus rows still
+        buffered in this process). Returns {column: 1-D array}.
+        """
+        names = list(names) if names is not None else self.column_names
+        dtypes = dict(self.columns)
+        unknown = [n for n in names if n not in dtypes]
+        if unknown:
+            raise KeyError(f"{self.name}: unknown columns {unknown}")
+
+        # Holding the write lock keeps a concurrent flush from moving rows
+        # between the buffer and the manifest while we look at both
+        for attempt in range(3):
+            with self._write_lock:
+                segments = self.segments()
+                with self._lock:
+                    buffered = list(self._buffer) if include_buffer else []
+            try:
+                parts = self._load_segments(segments, names, concat=False)
+                break
+            except FileNotFoundError:
+                # Segments were merged away by a concurrent compaction
+                if attempt == 2:
+                    raise
+
+        if buffered:
+            idx = {c: i for i, c in enumerate(self.column_names)}
+            for n in names:
+                parts[n].append(
+                    self._column_array([r[idx[n]] for r in buffered], dtypes[n])
+                )
+
+        out = {}
+        for n in names:
+            if parts[n]:
+                out[n] = np.concatenate(parts[n])
+            else:
+                out[n] = np.empty(0, dtype=str if dtypes[n] == "str" else dtypes[n])
+        return out
+
+    def iter_columns(
+        self, names: Optional[Sequence[str]] = None, chunk_rows: int = 100_000
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Stream flushed rows as {column: array} chunks of `chunk_rows` rows
+        (the last one may be shorter), loading one segment at a time.
+        """
+        names = list(names) if names is not None else self.column_names
+        carry: Dict[str, List[np.ndarray]] = {n: [] for n in names}
+        carried = 0
+        for seg in self.segments():
+            block = self._load_segments([seg], names)
+            carried += seg["rows"]
+            for n in names:
+                carry[n].append(block[n])
+            while carried >= chunk_rows:
+                merged = {n: np.concatenate(carry[n]) for n in names}
+                yield {n: merged[n][:chunk_rows] for n in names}
+                carry = {n: [merged[n][chunk_rows:]] for n in names}
+                carried -= chunk_rows
+        if carried:
+            yield {n: np.concatenate(carry[n]) for n in names}
+
+    def _load_segments(
+        self, segments: Sequence[Dict[str, Any]], names: Sequence[str], concat: bool = True
+    ):
+        dtypes = dict(self.columns)
+        parts: Dict[str, List[np.ndarray]] = {n: [] for n in names}
+        for seg in segments:
+            seg_dir = os.path.join(self.path, seg["name"])
+            for n in names:
+                mmap = None if dtypes[n] == "str" else "r"
+                parts[n].append(np.load(os.path.join(seg_dir, f"{n}.npy"), mmap_mode=mmap))
+        if not concat:
+            return parts
+        return {
+            n: np.concatenate(parts[n]) if parts[n] else
+            np.empty(0, dtype=str if dtypes[n] == "str" else dtypes[n])
+            for n in names
+        }
+
+    def clear(self) -> None:
+        """Drop all rows (flushed and buffered)."""
+        with self._write_lock:
+            with self._lock:
+                self._buffer = []
+            if os.path.isdir(self.path):
+                with file_lock(os.path.join(self.path, LOCK_FILE)):
+                    for entry in os.listdir(self.path):
+                        path = os.path.join(self.path, entry)
+                        if entry == LOCK_FILE:
+                            continue
+                        if os.path.isdir(path):
+                            shutil.rmtree(path, ignore_errors=True)
+                        else:
+                            os.remove(path)
+
+
+# ---------------------------------------------------------------------------
+# Registry
+# ---------------------------------------------------------------------------
+
+_STORES: Dict[str, ResultStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def open_store(name: str, columns: Sequence[Tuple[str, str]], **kwargs) -> ResultStore:
+    """Return the process-wide store called `name`, creating it on first use."""
+    with _STORES_LOCK:
+        store = _STORES.get(name)
+        if store is None:
+            store = _STORES[name] = ResultStore(name, columns, **kwargs)
+        return store
+
+
+# Callables run after each flush pass (e.g. persisting derived snapshots)
+_FLUSH_CALLBACKS: List[Callable[[], None]] = []
+
+
+def register_flush_callback(fn: Callable[[], None]) -> None:
+    if fn not in _FLUSH_CALLBACKS:
+        _FLUSH_CALLBACKS.append(fn)
+
+
+def flush_all(full_only: bool = False) -> None:
+    """Flush every store (only those with a full buffer when `full_only`), then run the callbacks."""
+    for store in list(_STORES.values()):
+        if full_only and store.pending() < store.flush_rows:
+            continue
+        try:
+            store.flush()
+        except Exception as e:
+            print(f"[warn] failed to flush result store {store.name}: {e}")
+    for fn in list(_FLUSH_CALLBACKS):
+        try:
+            fn()
+        except Exception as e:
+            print(f"[warn] result store flush callback failed: {e}")
+
+
+atexit.register(flush_all)
+
+
+# ---------------------------------------------------------------------------
+# Background writer
+# ---------------------------------------------------------------------------
+
+_writer_thread: Optional[threading.Thread] = None
+_writer_stop = threading.Event()
+_writer_wake = threading.Event()
+
+
+def writer_running() -> bool:
+    return _writer_thread is not None and _writer_thread.is_alive()
+
+
+def start_writer(interval: float = FLUSH_INTERVAL) -> None:
+    """
+    Start the daemon thread that writes result rows off the request path
+    (idempotent). Full buffers are flushed as soon as append() signals them,
+    partial ones every `interval` seconds.
+    """
+    global _writer_thread
+    if interval <= 0 or writer_running():
+        return
+    _writer_stop.clear()
+    _writer_wake.clear()
+
+    def _run():
+        deadline = time.monotonic() + interval
+        while not _writer_stop.is_set():
+            woke = _writer_wake.wait(max(0.0, deadline - time.monotonic()))
+            _writer_wake.clear()
+            if _writer_stop.is_set():
+                break
+            if woke and time.monotonic() < deadline:
+                flush_all(full_only=True)
+            else:
+                flush_all()
+                deadline = time.monotonic() + interval
+
+    _writer_thread = threading.Thread(target=_run, name="result-writer", daemon=True)
+    _writer_thread.start()
+
+
+def stop_writer() -> None:
+    """Stop the writer thread and flush every buffered row."""
+    global _writer_thread
+    _writer_stop.set()
+    _writer_wake.set()
+    if _writer_thread is not None:
+        _writer_thread.join(timeout=10.0)
+    _writer_thread = None
+    flush_all()
+
+
+# ---------------------------------------------------------------------------
+# Legacy CSV import
+# ---------------------------------------------------------------------------
+
+LEGACY_RIASEC_RESULTS = "logs/riasec_results.csv"
+LEGACY_RIASEC_RESPONSES = "logs/riasec_detailed_responses.csv"
+LEGACY_MBTI_RESULTS = "logs/session_results.csv"
+
+
+def _coerce(value: str, dtype: str) -> Any:
+    if dtype == "str":
+        return value
+    if value == "" or value is None:
+        return None
+    kind = np.dtype(dtype).kind
+    if kind in "iu":
+        return int(float(value))
+    if kind == "b":
+        return value.strip().lower() in ("1", "true", "yes")
+    return float(value)
+
+
+def import_csv(
+    store: ResultStore, csv_path: str, header: Optional[Sequence[str]] = None
+) -> int:
+    """
+    Append the rows of a CSV file to `store`. `header` gives the column names
+    for files written without a header row.
+    """
+    dtypes = dict(store.columns)
+    n = 0
+    with open(csv_path, "r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        names = list(header) if header is not None else next(reader, [])
+        for row in reader:
+            if header is not None and row and row[0] == names[0]:
+                continue  # stray header row
+            if len(row) < len(names):
+                continue  # truncated write
+            record = {
+                c: _coerce(v, dtypes[c]) for c, v in zip(names, row) if c in dtypes
+            }
+            store.append(record)
+            n += 1
+    store.flush()
+    return n
+
+
+def _legacy_imports(args) -> List[Tuple[str, ResultStore, Optional[Sequence[str]]]]:
+    from .riasec import RESULTS_STORE, RESPONSES_STORE, RESULT_COLUMNS
+    from .mbti_inference import RESULTS_STORE as MBTI_RESULTS_STORE
+
+    return [
+        # riasec_results.csv was written without a header row
+        (args.riasec_results, RESULTS_STORE, [c for c, _t in RESULT_COLUMNS]),
+        (args.riasec_responses, RESPONSES_STORE, None),
+        (args.mbti_results, MBTI_RESULTS_STORE, None),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser("Columnar result store tools")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    imp = sub.add_parser("import-csv", help="import the legacy CSV logs")
+    imp.add_argument("--riasec-results", default=LEGACY_RIASEC_RESULTS)
+    imp.add_argument("--riasec-responses", default=LEGACY_RIASEC_RESPONSES)
+    imp.add_argument("--mbti-results", default=LEGACY_MBTI_RESULTS)
+    imp.add_argument("--replace", action="store_true", help="clear each store before importing")
+
+    comp = sub.add_parser("compact", help="merge small segments")
+    comp.add_argument("--segment-rows", type=int, default=COMPACT_SEGMENT_ROWS)
+
+    sub.add_parser("info", help="print row and segment counts")
+    args = parser.parse_args()
+
+    if args.cmd == "import-csv":
+        for csv_path, store, header in _legacy_imports(args):
+            if not os.path.exists(csv_path):
+                print(f"skip {csv_path} (not found)")
+                continue
+            if args.replace:
+                store.clear()
+            n = import_csv(store, csv_path, header)
+            print(f"{csv_path} -> {store.path}: {n} rows")
+
+        # The running α/SD/percentile snapshot must include the imported rows
+        from .riasec_reliability import RunningReliability
+        RunningReliability().rebuild()
+    else:
+        stores = [store for _csv, store, _h in _legacy_imports(argparse.Namespace(
+            riasec_results=None, riasec_responses=None, mbti_results=None
+        ))]
+        for store in stores:
+            if args.cmd == "compact":
+                before, after = store.compact(args.segment_rows)
+                print(f"{store.name}: {before} -> {after} segments")
+            else:
+                print(f"{store.name}: {len(store)} rows in {len(store.segments())} segments")
+
+
+if __name__ == "__main__":
+    main()
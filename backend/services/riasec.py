@@ -1,11 +1,21 @@
 # backend/services/riasec.py
 from __future__ import annotations
-import uuid, os, csv, datetime
+import uuid, datetime, random
+from array import array
 from typing import Dict, Any, List, Tuple
-import pandas as pd
 import numpy as np
 
 from .riasec_items import load_riasec_items
+from .result_store import ResultStore, open_store
+from .runtime_data import load_section, read_table
+from .session_store import (
+    STATELESS_SESSIONS,
+    SessionBackend,
+    decode_session,
+    encode_session,
+    make_backend,
+    token_int,
+)
 
 QUESTIONS_PATH = "data/riasec_items.csv"
 
@@ -15,87 +25,184 @@ LIKERT_MIN, LIKERT_MAX = 1, 5
 SHUFFLE_SEED = None
 
 
-def _load_questions(path: str) -> pd.DataFrame:
+def _load_questions(path: str) -> List[Tuple[str, str, str]]:
     # you already have a loader; this keeps your flexibility
     try:
         return load_riasec_items(path)
     except Exception:
         # fallback to generic loader if needed
-        df = (
-            pd.read_excel(path)
-            if path.lower().endswith(".xlsx")
-            else pd.read_csv(path)
-        )
-        df.columns = [c.strip().lower() for c in df.columns]
+        header, rows = read_table(path)
+        columns = [str(c).strip().lower() for c in header]
 
-        if {"qid", "question", "key"}.issubset(df.columns):
-            df = df.rename(
-                columns={"qid": "id", "question": "text", "key": "scale"}
-            )
+        if {"qid", "question", "key"}.issubset(columns):
+            renames = {"qid": "id", "question": "text", "key": "scale"}
+            columns = [renames.get(c, c) for c in columns]
 
         needed = {"id", "text", "scale"}
-        if not needed.issubset(df.columns):
+        if not needed.issubset(columns):
             raise ValueError(f"{path} must have columns {needed}")
+        col_id, col_text, col_scale = (columns.index(c) for c in ("id", "text", "scale"))
 
-        df["id"] = df["id"].astype(str)
-        df["text"] = df["text"].astype(str)
-        df["scale"] = df["scale"].astype(str).str.strip().str.upper()
+        items = [
+            (str(row[col_id]), str(row[col_text]), str(row[col_scale]).strip().upper())
+            for row in rows
+        ]
 
-        bad = set(df["scale"].unique()) - set(SCALES)
+        bad = {scale for _qid, _text, scale in items} - set(SCALES)
         if bad:
             raise ValueError(
                 f"Unknown scales in {path}: {bad} (must be one of {SCALES})"
             )
-        return df
+        return items
+
+
+def _load_items(path: str) -> Tuple[Tuple[str, str, str], ...]:
+    """(id, text, scale) tuples from the runtime artifact, else parsed from `path`."""
+    section = load_section("riasec_items", [path])
+    if section is not None:
+        return tuple(zip(section["id"].tolist(), section["text"].tolist(), section["scale"].tolist()))
+    return tuple(_load_questions(path))
+
+
+# Shared (id, text, scale) tuples in file order; sessions index into these
+ITEMS: Tuple[Tuple[str, str, str], ...] = _load_items(QUESTIONS_PATH)
+N_ITEMS = len(ITEMS)
+QID_TO_INDEX: Dict[str, int] = {qid: i for i, (qid, _text, _scale) in enumerate(ITEMS)}
+QID_TO_SCALE: Dict[str, str] = {qid: scale for qid, _text, scale in ITEMS}
+
+# Session store (in-process by default; see session_store.make_backend)
+SESSIONS: SessionBackend = make_backend(namespace="riasec")
+
+# Result logs (columnar; see result_store)
+RESULT_COLUMNS = (
+    [("session_id", "str"), ("user_id", "str"), ("code", "str"), ("confidence_pct", "f8")]
+    + [(f"{k}_sum", "f8") for k in SCALES]
+    + [(f"{k}_perc", "f8") for k in SCALES]
+    + [(f"{k}_norm", "f8") for k in SCALES]
+    + [("timestamp", "str")]
+)
+# Item-level answers for Cronbach's α; q_<id> is the Likert value, 0 = unanswered
+RESPONSE_COLUMNS = (
+    [("session_id", "str"), ("user_id", "str"), ("timestamp", "str")]
+    + [(f"q_{qid}", "i1") for qid, _text, _scale in ITEMS]
+    + [(f"{k}_sum", "f8") for k in SCALES]
+    + [(f"{k}_perc", "f8") for k in SCALES]
+)
+RESULTS_STORE: ResultStore = open_store("riasec_results", RESULT_COLUMNS)
+RESPONSES_STORE: ResultStore = open_store("riasec_responses", RESPONSE_COLUMNS)
+
+
+def _to_token_state(s: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact session state for stateless tokens; the order is rebuilt from the seed."""
+    return {
+        "k": "riasec",
+        "u": s["user_id"],
+        "n": s["session_name"],
+        "seed": s["seed"],
+        "i": s["idx"],
+        "a": s["answers"].tolist(),
+    }
 
 
-QDF = _load_questions(QUESTIONS_PATH)
-QID_TO_SCALE: Dict[str, str] = {
-    str(r["id"]): str(r["scale"]) for _, r in QDF.iterrows()
-}
+def _valid_token_state(state: Dict[str, Any]) -> bool:
+    """Bounds-check a verified token; a malformed one reads as a missing session."""
+    try:
+        a = state["a"]
+        return (
+            isinstance(state["u"], str) and isinstance(state["n"], str)
+            and token_int(state["seed"], 0) and token_int(state["i"], 0)
+            # a different length means a token from a different item bank
+            and isinstance(a, list) and len(a) == N_ITEMS
+            and all(v == 0 or token_int(v, LIKERT_MIN, LIKERT_MAX) for v in a)
+        )
+    except (KeyError, TypeError):
+        return False
+
 
-SESSIONS: Dict[str, Dict[str, Any]] = {}
+def _from_token_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    if not _valid_token_state(state):
+        raise KeyError("Session not found")
+    answers = array("b", state["a"])
+    return {
+        "user_id": state["u"],
+        "session_name": state["n"],
+        "answers": answers,
+        "idx": state["i"],
+        "seed": state["seed"],
+        "order": _permutation(state["seed"]),
+    }
 
 
 def _ensure_session(session_id: str) -> Dict[str, Any]:
-    if session_id not in SESSIONS:
+    if STATELESS_SESSIONS:
+        state = decode_session(session_id)
+        if state is None or state.get("k") != "riasec":
+            raise KeyError("Session not found")
+        return _from_token_state(state)
+
+    s = SESSIONS.get(session_id)
+    if s is None:
         raise KeyError("Session not found")
-    return SESSIONS[session_id]
+    # Out-of-process backends hold the compact (validated) token state
+    return s if SESSIONS.in_process else _from_token_state(s)
+
+
+def _save_session(session_id: str, s: Dict[str, Any]) -> str:
+    """Persist the session; returns the id the client must send next (a fresh token when stateless)."""
+    if STATELESS_SESSIONS:
+        return encode_session(_to_token_state(s))
+    SESSIONS.put(session_id, s if SESSIONS.in_process else _to_token_state(s))
+    return session_id
+
+
+def _permutation(seed: int) -> array:
+    """Question order for a session: a seeded shuffle of item indices."""
+    order = array("H", range(N_ITEMS))
+    random.Random(seed).shuffle(order)
+    return order
+
+
+def _answers_by_qid(answers: array) -> Dict[str, int]:
+    """Expand the per-item answer array into {qid: value} for answered items."""
+    return {ITEMS[i][0]: v for i, v in enumerate(answers) if v}
 
 
 def start_session(user_id: str) -> Dict[str, Any]:
     session_id = f"riasec-{user_id}-{uuid.uuid4().hex[:6]}"
-    order = (
-        QDF.sample(frac=1.0, random_state=SHUFFLE_SEED).reset_index(drop=True)
-        if SHUFFLE_SEED is not None
-        else QDF.sample(frac=1.0).reset_index(drop=True)
-    )
+    seed = SHUFFLE_SEED if SHUFFLE_SEED is not None else random.getrandbits(32)
 
-    SESSIONS[session_id] = {
+    s = {
         "user_id": str(user_id),
-        "answers": {},  # qid -> int
+        "session_name": session_id,  # stable name for logs (sessionID is a token when stateless)
+        "answers": array("b", bytes(N_ITEMS)),  # item index -> Likert value, 0 = unanswered
         "idx": 0,
-        "order": order,
+        "seed": seed,
+        "order": _permutation(seed),  # item indices in presentation order
     }
-    return _next_question_payload(session_id)
+    session_id = _save_session(session_id, s)
+    return _next_question_payload(session_id, s)
 
 
-def _next_question_payload(session_id: str) -> Dict[str, Any]:
-    s = _ensure_session(session_id)
+def _next_question_payload(session_id: str, s: Dict[str, Any]) -> Dict[str, Any]:
     i = s["idx"]
     total = int(len(s["order"]))
     if i >= total:
-        return {"sentinel": 1, "result_ready": True, "message": "RIASEC complete."}
+        return {
+            "sessionID": session_id,
+            "sentinel": 1,
+            "result_ready": True,
+            "message": "RIASEC complete.",
+        }
 
-    row = s["order"].iloc[i]
+    qid, text, _scale = ITEMS[s["order"][i]]
     choices = [
         {"value": v, "label": str(v)} for v in range(LIKERT_MIN, LIKERT_MAX + 1)
     ]
 
     return {
         "sessionID": session_id,
-        "questionID": str(row["id"]),
-        "questionText": str(row["text"]),
+        "questionID": qid,
+        "questionText": text,
         "index": i + 1,
         "total": total,
         "likert_min": LIKERT_MIN,
@@ -118,15 +225,17 @@ def capture_answer(session_id: str, question_id: str, value: int) -> Dict[str, A
         v = LIKERT_MIN
     v = max(LIKERT_MIN, min(LIKERT_MAX, v))
 
-    if qid in QID_TO_SCALE:
-        s["answers"][qid] = v
+    item_idx = QID_TO_INDEX.get(qid)
+    if item_idx is not None:
+        s["answers"][item_idx] = v
     # else: silently ignore invalid qids if any
 
     s["idx"] += 1
+    session_id = _save_session(session_id, s)
     print("capture_answer received:", qid, value, "scale=", QID_TO_SCALE.get(qid))
     
     try:
-        return _next_question_payload(session_id)
+        return _next_question_payload(session_id, s)
     except Exception as e:
         print(f"Error in _next_question_payload: {e}")
         raise
@@ -135,6 +244,55 @@ def capture_answer(session_id: str, question_id: str, value: int) -> Dict[str, A
 # ---------- Scoring ----------
 
 
+# Item -> scale one-hot matrix (N_ITEMS x 6) in ITEMS order; items whose scale
+# is not one of SCALES have an all-zero row and are ignored by scoring
+SCALE_MATRIX = np.zeros((N_ITEMS, len(SCALES)), dtype=np.float64)
+for _i, (_qid, _text, _scale) in enumerate(ITEMS):
+    if _scale in SCALES:
+        SCALE_MATRIX[_i, SCALES.index(_scale)] = 1.0
+# Column order used to break ties in the Holland code
+_TIE_COLUMNS = np.array([SCALES.index(k) for k in TIE_ORDER])
+
+
+def score_answer_matrix(
+    answers: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Score one or many sessions at once.
+
+    answers: (N_ITEMS,) or (B, N_ITEMS) Likert values in ITEMS order, 0 = unanswered
+    Returns (sums, means, percents_100, norm_0_32), each (6,) or (B, 6) in SCALES
+    order. Scales with no answered items score the Likert midpoint (sum 0).
+    """
+    A = np.asarray(answers, dtype=np.float64)
+    answered = (A != 0).astype(np.float64)
+    sums = A @ SCALE_MATRIX
+    counts = answered @ SCALE_MATRIX
+
+    mid = (LIKERT_MIN + LIKERT_MAX) / 2.0
+    means = np.divide(sums, counts, out=np.full_like(sums, mid), where=counts > 0)
+
+    rng = float(LIKERT_MAX - LIKERT_MIN) or 1.0
+    scaled = (means - LIKERT_MIN) / rng
+    percents_100 = np.round(100.0 * scaled, 2)
+    norm_0_32 = np.round(32.0 * scaled, 2)
+    return sums, means, percents_100, norm_0_32
+
+
+def answers_vector(answers: Dict[str, int]) -> np.ndarray:
+    """{qid: value} -> (N_ITEMS,) int8 vector in ITEMS order (unknown ids are ignored)."""
+    vec = np.zeros(N_ITEMS, dtype=np.int8)
+    for qid, val in answers.items():
+        i = QID_TO_INDEX.get(str(qid))
+        if i is not None:
+            vec[i] = int(val)
+    return vec
+
+
+def _scale_dict(values: np.ndarray) -> Dict[str, float]:
+    return dict(zip(SCALES, values.tolist()))
+
+
 def _score_answers(answers: Dict[str, int]) -> Tuple[Dict[str, float], Dict[str, float], Dict[str, float]]:
     """
     Returns:
@@ -142,40 +300,16 @@ def _score_answers(answers: Dict[str, int]) -> Tuple[Dict[str, float], Dict[str,
       percents_100 : 0..100 per scale (nice for charts)
       norm_0_32    : 0..32 normalized means (classic RIASEC scaling)
     """
-    sums = {k: 0.0 for k in SCALES}
-    counts = {k: 0 for k in SCALES}
+    sums, _means, perc, norm = score_answer_matrix(answers_vector(answers))
+    return _scale_dict(sums), _scale_dict(perc), _scale_dict(norm)
 
-    for qid, val in answers.items():
-        sc = QID_TO_SCALE.get(str(qid))
-        if sc in SCALES:
-            sums[sc] += float(val)
-            counts[sc] += 1
-
-    if sum(counts.values()) == 0:
-        rng = float(LIKERT_MAX - LIKERT_MIN) or 1.0
-        mid = (LIKERT_MIN + LIKERT_MAX) / 2.0
-        percents_100 = {
-            k: round(100.0 * (mid - LIKERT_MIN) / rng, 2) for k in SCALES
-        }
-        norm_0_32 = {
-            k: round(32.0 * (mid - LIKERT_MIN) / rng, 2) for k in SCALES
-        }
-        return {k: 0.0 for k in SCALES}, percents_100, norm_0_32
-
-    means = {}
-    for k in SCALES:
-        means[k] = (
-            sums[k] / counts[k]
-            if counts[k] > 0
-            else (LIKERT_MIN + LIKERT_MAX) / 2.0
-        )
 
-    rng = float(LIKERT_MAX - LIKERT_MIN) or 1.0
-    norm_0_32 = {k: round(32.0 * (means[k] - LIKERT_MIN) / rng, 2) for k in SCALES}
-    percents_100 = {
-        k: round(100.0 * (means[k] - LIKERT_MIN) / rng, 2) for k in SCALES
-    }
-    return sums, percents_100, norm_0_32
+def top3_codes(sums: np.ndarray) -> List[str]:
+    """Holland codes for a (B, 6) matrix of scale sums (ties broken by TIE_ORDER)."""
+    ordered = np.asarray(sums)[:, _TIE_COLUMNS]
+    top = np.argsort(-ordered, axis=1, kind="stable")[:, :3]
+    letters = np.array(TIE_ORDER)[top]
+    return ["".join(row) for row in letters.tolist()]
 
 
 def _top3_code(sums: Dict[str, float]) -> str:
@@ -196,28 +330,34 @@ def _confidence_from_scores(percents_100: Dict[str, float]) -> float:
     - Higher = clearer, more distinct interest pattern
     - Lower = more balanced, unclear preferences
     """
-    vals = np.array([percents_100[k] for k in SCALES], dtype=np.float32)
-    
-    # Check if all values are equal (fallback case)
-    if np.allclose(vals, vals[0]):
-        return 0.0
+    vals = np.array([[percents_100[k] for k in SCALES]], dtype=np.float32)
+    return round(float(pattern_confidence_matrix(vals)[0]), 2)
+
+
+def pattern_confidence_matrix(percents: np.ndarray) -> np.ndarray:
+    """
+    Vectorized _confidence_from_scores for a (B, 6) matrix of percents;
+    returns (B,) unrounded confidences (callers round to 2 decimals).
+    """
+    vals = np.asarray(percents, dtype=np.float32)
     
     # Calculate variance (spread of scores)
-    variance = float(np.var(vals))
+    variance = vals.var(axis=1).astype(np.float64)
     # Normalize variance: max variance when scores range from 0-100 = 2500 (when one is 100, others are 0)
     max_variance = 2500.0
-    variance_contribution = min(100.0, (variance / max_variance) * 100.0)
+    variance_contribution = np.minimum(100.0, (variance / max_variance) * 100.0)
     
     # Calculate range (difference between max and min)
-    score_range = float(np.max(vals) - np.min(vals))
+    top_score = vals.max(axis=1).astype(np.float64)
+    score_range = (vals.max(axis=1) - vals.min(axis=1)).astype(np.float64)
     # Normalize range: max range is 100 (when one is 100, one is 0)
     range_contribution = score_range  # Already 0-100 scale
     
     # Calculate dominance (how much the top score exceeds the mean)
-    top_score = float(np.max(vals))
-    mean_score = float(np.mean(vals))
-    dominance = max(0.0, (top_score - mean_score) / mean_score * 100.0) if mean_score > 0 else 0.0
-    dominance_contribution = min(100.0, dominance)
+    mean_score = vals.mean(axis=1).astype(np.float64)
+    safe_mean = np.where(mean_score > 0, mean_score, 1.0)
+    dominance = np.where(mean_score > 0, np.maximum(0.0, (top_score - mean_score) / safe_mean * 100.0), 0.0)
+    dominance_contribution = np.minimum(100.0, dominance)
     
     # Combine metrics (weighted average)
     # Variance shows spread, range shows separation, dominance shows top preference strength
@@ -228,14 +368,19 @@ def _confidence_from_scores(percents_100: Dict[str, float]) -> float:
     )
     
     # Ensure confidence is between 0-100
-    confidence = max(0.0, min(100.0, confidence))
+    confidence = np.clip(confidence, 0.0, 100.0)
     
-    return round(confidence, 2)
+    # All scales equal (e.g. nothing answered): no pattern at all
+    flat = np.isclose(vals, vals[:, :1]).all(axis=1)
+    return np.where(flat, 0.0, confidence)
 
 
 def compute_result(session_id: str) -> Dict[str, Any]:
     s = _ensure_session(session_id)
-    sums, perc, norm = _score_answers(s["answers"])
+    session_name = s.get("session_name", session_id)
+    answers = _answers_by_qid(s["answers"])
+    sum_vec, _means, perc_vec, norm_vec = score_answer_matrix(np.frombuffer(s["answers"], dtype=np.int8))
+    sums, perc, norm = _scale_dict(sum_vec), _scale_dict(perc_vec), _scale_dict(norm_vec)
     code = _top3_code(sums)
     confidence = _confidence_from_scores(perc)
 
@@ -244,15 +389,13 @@ def compute_result(session_id: str) -> Dict[str, Any]:
         from .riasec_reliability import (
             compute_comprehensive_confidence,
             deduce_holland_code_with_confidence,
-            _load_historical_scores
         )
         
-        # Compute comprehensive confidence metrics (STEPS 3-10)
-        historical_data = _load_historical_scores()
+        # Compute comprehensive confidence metrics (STEPS 3-10) against the
+        # cached historical statistics
         trait_metrics = compute_comprehensive_confidence(
             trait_scores=perc,
             raw_sums=sums,
-            historical_data=historical_data
         )
         
         # Deduce Holland code with confidence analysis (STEP 9)
@@ -268,7 +411,7 @@ def compute_result(session_id: str) -> Dict[str, Any]:
         combined_confidence = (avg_trait_confidence * 0.6 + pattern_confidence * 0.4)
         
         # Store detailed item-level responses for future Cronbach's α calculation
-        _log_detailed_responses(session_id, s["user_id"], s["answers"], sums, perc)
+        _log_detailed_responses(session_name, s["user_id"], answers, sums, perc)
         
     except Exception as e:
         print(f"Warning: Could not compute comprehensive confidence metrics: {e}")
@@ -276,28 +419,34 @@ def compute_result(session_id: str) -> Dict[str, Any]:
         holland_analysis = None
         combined_confidence = confidence
 
-    os.makedirs("logs", exist_ok=True)
-    with open("logs/riasec_results.csv", "a", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        w.writerow(
-            [
-                session_id,
-                s["user_id"],
-                code,
-                combined_confidence,
-                *(sums[k] for k in SCALES),
-                *(perc[k] for k in SCALES),
-                *(norm[k] for k in SCALES),
-                datetime.datetime.utcnow().isoformat(),
-            ]
+    try:
+        RESULTS_STORE.append(
+            {
+                "session_id": session_name,
+                "user_id": s["user_id"],
+                "code": code,
+                "confidence_pct": combined_confidence,
+                **{f"{k}_sum": sums[k] for k in SCALES},
+                **{f"{k}_perc": perc[k] for k in SCALES},
+                **{f"{k}_norm": norm[k] for k in SCALES},
+                "timestamp": datetime.datetime.utcnow().isoformat(),
+            }
         )
+    except Exception as e:
+        print(f"Warning: Could not log RIASEC result: {e}")
+
+    try:
+        from .riasec_reliability import record_result
+        record_result(answers, sums, perc)
+    except Exception as e:
+        print(f"Warning: Could not update running reliability statistics: {e}")
 
     result = {
         "riasec_code": code,
         "confidence_pct": round(combined_confidence, 2),
         "axis_percents": perc,   # for radar chart
         "raw_scores": sums,      # raw R,I,A,S,E,C sums for recommender
-        "answered": len(s["answers"]),
+        "answered": len(answers),
         "total": int(len(s["order"])),
     }
     
@@ -333,48 +482,28 @@ def _log_detailed_responses(
     percents: Dict[str, float]
 ) -> None:
     """Log item-level responses for future Cronbach's α calculation."""
-    os.makedirs("logs", exist_ok=True)
-    log_file = "logs/riasec_detailed_responses.csv"
-    
-    # Check if file exists to determine if we need headers
-    file_exists = os.path.exists(log_file)
-    
-    # Prepare row data
     row_data = {
         "session_id": session_id,
         "user_id": user_id,
         "timestamp": datetime.datetime.utcnow().isoformat(),
     }
     
-    # Add item-level responses
+    # Add item-level responses (0 = unanswered)
     for qid in QID_TO_SCALE.keys():
-        row_data[f"q_{qid}"] = answers.get(qid, None)
+        row_data[f"q_{qid}"] = answers.get(qid, 0)
     
     # Add trait scores for reference
     for scale in SCALES:
         row_data[f"{scale}_sum"] = sums.get(scale, 0.0)
         row_data[f"{scale}_perc"] = percents.get(scale, 0.0)
     
-    # Write to CSV
     try:
-        with open(log_file, "a", newline="", encoding="utf-8") as f:
-            # Get all possible columns
-            all_columns = ["session_id", "user_id", "timestamp"]
-            all_columns.extend([f"q_{qid}" for qid in QID_TO_SCALE.keys()])
-            all_columns.extend([f"{scale}_sum" for scale in SCALES])
-            all_columns.extend([f"{scale}_perc" for scale in SCALES])
-            
-            writer = csv.DictWriter(f, fieldnames=all_columns)
-            
-            if not file_exists:
-                writer.writeheader()
-            
-            writer.writerow(row_data)
+        RESPONSES_STORE.append(row_data)
     except Exception as e:
         print(f"Warning: Could not log detailed responses: {e}")
 
 
 def end_session(session_id: str) -> Dict[str, Any]:
-    if session_id in SESSIONS:
-        del SESSIONS[session_id]
+    if not STATELESS_SESSIONS:
+        SESSIONS.delete(session_id)
     return {"success": True}
@@ -10,46 +10,45 @@ This module converts that into the normalized schema riasec.py already uses:
 """
 
 from __future__ import annotations
-from typing import Set
-import pandas as pd
+from typing import List, Set, Tuple
+
+from .runtime_data import read_table
 
 RIASEC_CODES: Set[str] = {"R", "I", "A", "S", "E", "C"}
 
-def load_riasec_items(path: str) -> pd.DataFrame:
+def load_riasec_items(path: str) -> List[Tuple[str, str, str]]:
     """
-    Read CSV/XLSX, sanitize, and return a DataFrame with columns:
+    Read CSV/XLSX, sanitize, and return (id, text, scale) tuples:
       id (str), text (str), scale (str in {"R","I","A","S","E","C"})
     """
     # 1) Read
-    if path.lower().endswith(".xlsx"):
-        df = pd.read_excel(path)
-    else:
-        df = pd.read_csv(path)
+    header, rows = read_table(path)
 
     # 2) Normalize/rename incoming headers
     #    Works for exactly: QID, Question, Key   (your file)
-    df = df.rename(
-        columns={
-            "QID": "id",
-            "Question": "text",
-            "Key": "scale",
-        }
-    )
+    renames = {
+        "QID": "id",
+        "Question": "text",
+        "Key": "scale",
+    }
+    columns = [renames.get(c, c) for c in header]
 
     # 3) Basic presence validation 
     required = {"id", "text", "scale"}
-    if not required.issubset(df.columns):
+    if not required.issubset(columns):
         raise ValueError(
-            f"{path} must contain columns {sorted(required)}; found {sorted(df.columns)}"
+            f"{path} must contain columns {sorted(required)}; found {sorted(columns)}"
         )
+    col_id, col_text, col_scale = (columns.index(c) for c in ("id", "text", "scale"))
 
     # 4) Clean up values
-    df["id"] = df["id"].astype(str).str.strip()
-    df["text"] = df["text"].astype(str).str.strip()
-    df["scale"] = df["scale"].astype(str).str.strip().str.upper()
+    items = [
+        (str(row[col_id]).strip(), str(row[col_text]).strip(), str(row[col_scale]).strip().upper())
+        for row in rows
+    ]
 
     # 5) Validate scales
-    bad = sorted(set(df["scale"].unique()) - RIASEC_CODES)
+    bad = sorted({scale for _qid, _text, scale in items} - RIASEC_CODES)
     if bad:
         raise ValueError(
             f"Unknown RIASEC codes found {bad}. Valid codes are {sorted(RIASEC_CODES)}."
@@ -58,10 +57,9 @@ def load_riasec_items(path: str) -> pd.DataFrame:
     # 6) (Optional) Ensure sorted by numeric id if QID is numeric-like
     #     This keeps a stable order before your per-session shuffle.
     try:
-        df["_idnum"] = df["id"].astype(int)
-        df = df.sort_values("_idnum").drop(columns=["_idnum"])
-    except Exception:
+        items.sort(key=lambda item: int(item[0]))
+    except ValueError:
         pass
 
     # 7) Final shape & types
-    return df[["id", "text", "scale"]].reset_index(drop=True)
+    return items
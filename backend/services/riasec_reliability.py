@@ -5,45 +5,74 @@ Implements scientific confidence calculation based on Cronbach's α, SEM, and CI
 
 from __future__ import annotations
 import os
-import csv
-from typing import Dict, List, Tuple, Optional
-import pandas as pd
+import json
+import time
+import threading
+from typing import Any, Dict, List, Mapping, Tuple, Optional
 import numpy as np
 
 # Reference to the main module's constants
-from .riasec import SCALES, LIKERT_MIN, LIKERT_MAX, QDF, QID_TO_SCALE
+from .riasec import (
+    SCALES, LIKERT_MIN, LIKERT_MAX, QID_TO_SCALE, ITEMS,
+    RESULTS_STORE, RESPONSES_STORE,
+)
+from .result_store import file_lock, register_flush_callback, writer_running
 
-# Paths
-RESULTS_LOG = "logs/riasec_results.csv"
-DETAILED_LOG = "logs/riasec_detailed_responses.csv"  # We'll create this for item-level data
+# Running α/SD accumulators, updated on every logged result
+STATS_SNAPSHOT = os.getenv("IP_RELIABILITY_SNAPSHOT", "logs/riasec_stats.json")
+SNAPSHOT_VERSION = 2  # snapshots from another version are rebuilt from the result store
 
+# Minimum seconds between checks for a snapshot written by another worker;
+# it is only re-read when its mtime/size changed since the last load.
+STATS_REFRESH_INTERVAL = float(os.getenv("IP_RELIABILITY_REFRESH", "30"))
 
-def _load_historical_scores() -> pd.DataFrame:
-    """Load all historical RIASEC scores from the results log."""
-    if not os.path.exists(RESULTS_LOG):
-        return pd.DataFrame()
-    
+# Literature defaults used until enough historical data exists
+DEFAULT_ALPHAS = {'R': 0.80, 'I': 0.82, 'A': 0.79, 'S': 0.81, 'E': 0.80, 'C': 0.78}
+DEFAULT_SD = 7.0
+
+# Result-store columns (name -> values, as ResultStore.read_columns() returns
+# them); a DataFrame with the same columns works as well
+Columns = Mapping[str, Any]
+
+
+def _n_rows(columns: Columns) -> int:
+    for name in columns:
+        return len(columns[name])
+    return 0
+
+
+def _column_values(columns: Columns, name: str) -> np.ndarray:
+    """Non-NaN values of one column as float64."""
+    values = np.asarray(columns[name], dtype=np.float64)
+    return values[~np.isnan(values)]
+
+
+def _load_historical_scores() -> Columns:
+    """Load all historical RIASEC scores from the result store."""
     try:
-        df = pd.read_csv(RESULTS_LOG)
-        # Expected columns: session_id, user_id, code, confidence_pct, R_sum, I_sum, A_sum, S_sum, E_sum, C_sum, R_perc, I_perc, A_perc, S_perc, E_perc, C_perc, ...
-        if len(df) == 0:
-            return pd.DataFrame()
-        return df
+        cols = RESULTS_STORE.read_columns()
+        if _n_rows(cols) == 0:
+            return {}
+        return cols
     except Exception as e:
         print(f"Warning: Could not load historical scores: {e}")
-        return pd.DataFrame()
+        return {}
 
 
-def _load_detailed_responses() -> Optional[pd.DataFrame]:
+def _load_detailed_responses() -> Optional[Columns]:
     """Load item-level responses for Cronbach's α calculation."""
-    if not os.path.exists(DETAILED_LOG):
-        return None
-    
     try:
-        df = pd.read_csv(DETAILED_LOG)
-        return df
+        cols = RESPONSES_STORE.read_columns()
     except Exception:
         return None
+    if len(cols["session_id"]) == 0:
+        return None
+    
+    # Unanswered items are stored as 0; expose them as NaN like the CSV log did
+    for qid in QID_TO_SCALE:
+        col = f"q_{qid}"
+        cols[col] = np.where(cols[col] != 0, cols[col], np.nan)
+    return cols
 
 
 def calculate_cronbach_alpha(item_responses: np.ndarray) -> float:
@@ -80,46 +109,46 @@ def calculate_cronbach_alpha(item_responses: np.ndarray) -> float:
     return max(0.0, min(1.0, alpha))  # Clamp between 0 and 1
 
 
-def compute_reliability_from_historical_data() -> Dict[str, float]:
+def compute_reliability_from_historical_data(
+    detailed_df: Optional[Columns] = None
+) -> Dict[str, float]:
     """
     STEP 3: Compute Cronbach's α for each trait scale from historical data.
     
+    Args:
+        detailed_df: Item-level responses; read from the result store when omitted
+    
     Returns:
         Dictionary mapping scale -> Cronbach's α
     """
-    detailed_df = _load_detailed_responses()
+    if detailed_df is None:
+        detailed_df = _load_detailed_responses()
     
-    if detailed_df is None or len(detailed_df) == 0:
+    if detailed_df is None or _n_rows(detailed_df) == 0:
         # Fallback: use default values based on typical RIASEC reliability
-        # Typical values from literature: R=0.80, I=0.82, A=0.79, S=0.81, E=0.80, C=0.78
-        return {
-            'R': 0.80,
-            'I': 0.82,
-            'A': 0.79,
-            'S': 0.81,
-            'E': 0.80,
-            'C': 0.78
-        }
+        return dict(DEFAULT_ALPHAS)
     
     alphas = {}
     
     for scale in SCALES:
         # Get all items for this scale
-        scale_items = QDF[QDF['scale'] == scale]['id'].tolist()
+        scale_items = [qid for qid, _text, item_scale in ITEMS if item_scale == scale]
         
         if len(scale_items) == 0:
             alphas[scale] = 0.75  # Default fallback
             continue
         
         # Extract item responses for this scale
-        item_cols = [f"q_{qid}" for qid in scale_items if f"q_{qid}" in detailed_df.columns]
+        item_cols = [f"q_{qid}" for qid in scale_items if f"q_{qid}" in detailed_df]
         
         if len(item_cols) < 2:
             alphas[scale] = 0.75
             continue
         
         # Get responses as numpy array
-        item_data = detailed_df[item_cols].values
+        item_data = np.column_stack(
+            [np.asarray(detailed_df[c], dtype=np.float64) for c in item_cols]
+        )
         
         # Remove rows with any NaN
         item_data = item_data[~np.isnan(item_data).any(axis=1)]
@@ -135,33 +164,37 @@ def compute_reliability_from_historical_data() -> Dict[str, float]:
     return alphas
 
 
-def compute_standard_deviations() -> Dict[str, float]:
+def compute_standard_deviations(df: Optional[Columns] = None) -> Dict[str, float]:
     """
     STEP 4: Compute Standard Deviation (SD) for each trait across all participants.
     
+    Args:
+        df: Historical results; read from the result store when omitted
+    
     Returns:
         Dictionary mapping scale -> SD
     """
-    df = _load_historical_scores()
+    if df is None:
+        df = _load_historical_scores()
     
-    if len(df) == 0:
+    if _n_rows(df) == 0:
         # Fallback: use typical SD values from RIASEC literature
         # Typical SD for 1-5 Likert scales with 10 items: ~6-8
-        return {scale: 7.0 for scale in SCALES}
+        return {scale: DEFAULT_SD for scale in SCALES}
     
     sds = {}
     
     for scale in SCALES:
         # Try to find the raw sum column (before normalization)
-        sum_col = f"{scale}_sum" if f"{scale}_sum" in df.columns else None
-        perc_col = f"{scale}_perc" if f"{scale}_perc" in df.columns else None
+        sum_col = f"{scale}_sum" if f"{scale}_sum" in df else None
+        perc_col = f"{scale}_perc" if f"{scale}_perc" in df else None
         
-        if sum_col and sum_col in df.columns:
-            values = df[sum_col].dropna().values
-        elif perc_col and perc_col in df.columns:
+        if sum_col and sum_col in df:
+            values = _column_values(df, sum_col)
+        elif perc_col and perc_col in df:
             # Use percentages, but we need to estimate raw scores
             # Assuming mean percentage corresponds to middle of scale
-            values = df[perc_col].dropna().values
+            values = _column_values(df, perc_col)
         else:
             sds[scale] = 7.0
             continue
@@ -175,6 +208,473 @@ def compute_standard_deviations() -> Dict[str, float]:
     return sds
 
 
+def _file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    # The snapshot is replaced via rename, so the inode changes on every write
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+# ---------------------------------------------------------------------------
+# Percentile index
+# ---------------------------------------------------------------------------
+
+PERCENT_RESOLUTION = 100                 # bins per percentage point (scores are rounded to 0.01)
+PERCENT_BINS = 100 * PERCENT_RESOLUTION + 1
+
+
+def _percent_bin(score: float) -> int:
+    b = int(round(float(score) * PERCENT_RESOLUTION))
+    return min(max(b, 0), PERCENT_BINS - 1)
+
+
+class PercentileIndex:
+    """
+    Fixed-bin histogram over the 0-100 percent scale backed by a Fenwick
+    (binary indexed) tree, so both adding a score and ranking one are
+    O(log bins) instead of a scan over the whole history.
+    """
+
+    def __init__(self, n_bins: int = PERCENT_BINS):
+        self.n_bins = n_bins
+        self.total = 0
+        self._tree = [0] * (n_bins + 1)    # 1-based Fenwick array
+        self._counts: Dict[int, int] = {}  # sparse per-bin counts, for snapshots
+
+    def add(self, score: float, count: int = 1) -> None:
+        self._add_bin(_percent_bin(score), count)
+
+    def merge(self, other: "PercentileIndex") -> None:
+        for b, c in other._counts.items():
+            self._add_bin(b, c)
+
+    def _add_bin(self, b: int, count: int) -> None:
+        self._counts[b] = self._counts.get(b, 0) + count
+        self.total += count
+        i = b + 1
+        tree = self._tree
+        while i <= self.n_bins:
+            tree[i] += count
+            i += i & -i
+
+    def _prefix(self, b: int) -> int:
+        """Number of scores in bins [0, b)."""
+        total, tree = 0, self._tree
+        while b > 0:
+            total += tree[b]
+            b -= b & -b
+        return total
+
+    def percentile(self, score: float) -> float:
+        """Same definition as compute_percentile_rank: (below + 0.5 * equal) / n."""
+        if self.total == 0:
+            return 50.0
+        b = _percent_bin(score)
+        below = self._prefix(b)
+        equal = self._counts.get(b, 0)
+        return (below + 0.5 * equal) / self.total * 100.0
+
+    def percentile_array(self, scores: np.ndarray) -> np.ndarray:
+        """percentile() for an array of scores (dense cumulative counts, no per-item loop)."""
+        scores = np.asarray(scores, dtype=np.float64)
+        if self.total == 0:
+            return np.full(scores.shape, 50.0)
+        counts = np.zeros(self.n_bins, dtype=np.int64)
+        for b, c in self._counts.items():
+            counts[b] = c
+        below = np.cumsum(counts) - counts
+        bins = np.clip(np.rint(scores * PERCENT_RESOLUTION).astype(np.int64), 0, self.n_bins - 1)
+        return (below[bins] + 0.5 * counts[bins]) / self.total * 100.0
+
+    def to_dict(self) -> Dict[str, int]:
+        return {str(b): c for b, c in sorted(self._counts.items())}
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, int], n_bins: int = PERCENT_BINS) -> "PercentileIndex":
+        index = cls(n_bins)
+        counts = {int(b): int(c) for b, c in d.items()}
+        tree = index._tree
+        for b, c in counts.items():
+            tree[b + 1] += c
+        # Linear-time Fenwick construction
+        for i in range(1, n_bins + 1):
+            j = i + (i & -i)
+            if j <= n_bins:
+                tree[j] += tree[i]
+        index._counts = counts
+        index.total = sum(counts.values())
+        return index
+
+
+# ---------------------------------------------------------------------------
+# Streaming α / SD accumulators
+# ---------------------------------------------------------------------------
+
+# Item ids per scale, in question-bank order
+SCALE_ITEMS: Dict[str, List[str]] = {
+    scale: [qid for qid, _text, item_scale in ITEMS if item_scale == scale]
+    for scale in SCALES
+}
+
+
+class RunningMoments:
+    """
+    Welford accumulator for a vector: count, mean and the co-moment matrix
+    Σ (x - mean)(x - mean)ᵀ. Each update is O(k²); the sample covariance is
+    comoment / (n - 1).
+    """
+
+    def __init__(self, k: int):
+        self.n = 0
+        self.mean = np.zeros(k, dtype=np.float64)
+        self.comoment = np.zeros((k, k), dtype=np.float64)
+
+    def update(self, x: np.ndarray) -> None:
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.comoment += np.outer(delta, x - self.mean)
+
+    def update_batch(self, X: np.ndarray) -> None:
+        """Merge a block of rows."""
+        if X.shape[0] == 0:
+            return
+        block = RunningMoments(X.shape[1])
+        block.n = X.shape[0]
+        block.mean = X.mean(axis=0)
+        centered = X - block.mean
+        block.comoment = centered.T @ centered
+        self.merge(block)
+
+    def merge(self, other: "RunningMoments") -> None:
+        """Fold in another accumulator (Chan et al. pairwise combination)."""
+        if other.n == 0:
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.comoment += other.comoment + np.outer(delta, delta) * (self.n * other.n / n)
+        self.mean += delta * (other.n / n)
+        self.n = n
+
+    def covariance(self) -> np.ndarray:
+        return self.comoment / (self.n - 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"n": self.n, "mean": self.mean.tolist(), "comoment": self.comoment.tolist()}
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "RunningMoments":
+        m = cls(len(d["mean"]))
+        m.n = int(d["n"])
+        m.mean = np.asarray(d["mean"], dtype=np.float64)
+        m.comoment = np.asarray(d["comoment"], dtype=np.float64)
+        return m
+
+
+def _alpha_from_covariance(cov: np.ndarray) -> float:
+    """Cronbach's α from an item covariance matrix (same formula as calculate_cronbach_alpha)."""
+    n_items = cov.shape[0]
+    total_variance = float(cov.sum())
+    if total_variance == 0:
+        return 0.0
+    alpha = (n_items / (n_items - 1)) * (1 - float(np.trace(cov)) / total_variance)
+    return max(0.0, min(1.0, alpha))
+
+
+class ReliabilityAccumulators:
+    """
+    Per-scale item moments (for α), moments of the six raw sums (for SD) and
+    percentile indexes of the percentage scores. Accumulators from different
+    workers combine exactly with merge().
+
+    Results with unanswered items on a scale are left out of that scale's α,
+    matching the NaN-row filtering of compute_reliability_from_historical_data.
+    """
+
+    def __init__(self):
+        self.items = {scale: RunningMoments(len(SCALE_ITEMS[scale])) for scale in SCALES}
+        self.sums = RunningMoments(len(SCALES))
+        self.percs = {scale: PercentileIndex() for scale in SCALES}
+
+    def add(
+        self, answers: Dict[str, Any], sums: Dict[str, float], percents: Dict[str, float]
+    ) -> None:
+        for scale in SCALES:
+            qids = SCALE_ITEMS[scale]
+            values = [answers.get(qid) for qid in qids]
+            if len(qids) >= 2 and all(v is not None and v == v for v in values):
+                self.items[scale].update(np.asarray(values, dtype=np.float64))
+        self.sums.update(np.asarray([float(sums[s]) for s in SCALES], dtype=np.float64))
+        for scale in SCALES:
+            self.percs[scale].add(percents[scale])
+
+    def merge(self, other: "ReliabilityAccumulators") -> None:
+        for scale in SCALES:
+            self.items[scale].merge(other.items[scale])
+            self.percs[scale].merge(other.percs[scale])
+        self.sums.merge(other.sums)
+
+    # -- derived statistics ---------------------------------------------------
+
+    def alphas(self) -> Dict[str, float]:
+        if not any(m.n for m in self.items.values()):
+            return dict(DEFAULT_ALPHAS)
+        alphas = {}
+        for scale in SCALES:
+            moments = self.items[scale]
+            if moments.n < 2:
+                alphas[scale] = 0.75
+            else:
+                alpha = _alpha_from_covariance(moments.covariance())
+                alphas[scale] = alpha if alpha > 0 else 0.75
+        return alphas
+
+    def sds(self) -> Dict[str, float]:
+        if self.sums.n < 2:
+            return {scale: DEFAULT_SD for scale in SCALES}
+        variances = np.diag(self.sums.covariance())
+        return {scale: float(np.sqrt(max(v, 0.0))) for scale, v in zip(SCALES, variances)}
+
+    def percentile(self, scale: str, score: float) -> float:
+        """Percentile rank of `score` among the historical `scale` percentages."""
+        return self.percs[scale].percentile(score)
+
+    # -- (de)serialisation ----------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": SNAPSHOT_VERSION,
+            "scales": SCALES,
+            "items": {
+                scale: {"qids": SCALE_ITEMS[scale], **self.items[scale].to_dict()}
+                for scale in SCALES
+            },
+            "sums": self.sums.to_dict(),
+            "percs": {scale: self.percs[scale].to_dict() for scale in SCALES},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> Optional["ReliabilityAccumulators"]:
+        """None when the snapshot has another layout (it is then rebuilt)."""
+        if data.get("version") != SNAPSHOT_VERSION or data.get("scales") != SCALES:
+            return None
+        acc = cls()
+        for scale in SCALES:
+            entry = data["items"].get(scale)
+            # A changed item bank invalidates that scale's item moments
+            if entry and entry.get("qids") == SCALE_ITEMS[scale]:
+                acc.items[scale] = RunningMoments.from_dict(entry)
+        acc.sums = RunningMoments.from_dict(data["sums"])
+        acc.percs = {scale: PercentileIndex.from_dict(data["percs"][scale]) for scale in SCALES}
+        return acc
+
+    def rebuild_from_store(self) -> None:
+        """Recompute the accumulators from the result store (column reads, no row loop)."""
+        ReliabilityAccumulators.__init__(self)
+
+        responses = RESPONSES_STORE.read_columns(
+            [f"q_{qid}" for scale in SCALES for qid in SCALE_ITEMS[scale]]
+        )
+        for scale in SCALES:
+            qids = SCALE_ITEMS[scale]
+            if len(qids) < 2:
+                continue
+            X = np.column_stack([responses[f"q_{qid}"] for qid in qids]).astype(np.float64)
+            self.items[scale].update_batch(X[(X != 0).all(axis=1)])
+
+        results = RESULTS_STORE.read_columns(
+            [f"{scale}_sum" for scale in SCALES] + [f"{scale}_perc" for scale in SCALES]
+        )
+        self.sums.update_batch(
+            np.column_stack([results[f"{scale}_sum"] for scale in SCALES]).astype(np.float64)
+        )
+        for scale in SCALES:
+            percs = results[f"{scale}_perc"]
+            bins, counts = np.unique(np.round(percs[~np.isnan(percs)], 2), return_counts=True)
+            for score, count in zip(bins.tolist(), counts.tolist()):
+                self.percs[scale].add(score, count)
+
+
+def _read_snapshot_file(path: str) -> Optional[ReliabilityAccumulators]:
+    """Accumulators from a snapshot file; None if missing, unreadable or of another layout."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not read reliability snapshot: {e}")
+        return None
+    return ReliabilityAccumulators.from_dict(data)
+
+
+class RunningReliability(ReliabilityAccumulators):
+    """
+    Process-wide accumulators persisted as a JSON snapshot shared by all
+    workers.
+
+    Results added here are also kept in `_pending` until they are saved.
+    Saving takes an advisory lock on the snapshot, re-reads it if another
+    worker wrote it, merges the pending results in and writes it back, so
+    concurrent workers never overwrite each other's results. Between saves
+    the in-memory view is always (last snapshot read) + pending.
+    """
+
+    def __init__(self, path: str = STATS_SNAPSHOT, refresh_interval: float = STATS_REFRESH_INTERVAL):
+        super().__init__()
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.checked_at: Optional[float] = None
+        self._pending = ReliabilityAccumulators()
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # keeps snapshot writes in order
+
+    def _lock_path(self) -> str:
+        return f"{self.path}.lock"
+
+    def _adopt(self, acc: ReliabilityAccumulators) -> None:
+        self.items, self.sums, self.percs = acc.items, acc.sums, acc.percs
+
+    def update(
+        self, answers: Dict[str, Any], sums: Dict[str, float], percents: Dict[str, float]
+    ) -> None:
+        """
+        Fold one result into the accumulators. The snapshot is written by the
+        result-store writer thread when it runs, otherwise right away.
+        """
+        with self._lock:
+            self.add(answers, sums, percents)
+            self._pending.add(answers, sums, percents)
+        if not writer_running():
+            self.save_if_dirty()
+
+    def save_if_dirty(self) -> None:
+        """Merge unsaved results into the shared snapshot."""
+        with self._save_lock:
+            if self._pending.sums.n == 0:
+                return
+            with file_lock(self._lock_path()):
+                with self._lock:
+                    pending, self._pending = self._pending, ReliabilityAccumulators()
+                    signature = _file_signature(self.path)
+                    if signature != self._signature:
+                        disk = self._read_snapshot()
+                        if disk is not None:
+                            disk.merge(pending)
+                            self._adopt(disk)
+                    data = self.to_dict()
+                self._write(data)
+
+    def refresh(self) -> "RunningReliability":
+        """Pick up results saved by other workers (checked at most every refresh_interval)."""
+        now = time.monotonic()
+        if self.checked_at is not None and now - self.checked_at < self.refresh_interval:
+            return self
+        with self._lock:
+            signature = _file_signature(self.path)
+            if signature != self._signature:
+                disk = self._read_snapshot()
+                if disk is not None:
+                    disk.merge(self._pending)
+                    self._adopt(disk)
+                    self._signature = signature
+            self.checked_at = now
+        return self
+
+    # -- persistence ----------------------------------------------------------
+
+    def _read_snapshot(self) -> Optional[ReliabilityAccumulators]:
+        return _read_snapshot_file(self.path)
+
+    def _write(self, data: Dict[str, Any]) -> None:
+        """Atomically replace the snapshot (caller holds the file lock)."""
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+            signature = _file_signature(self.path)
+            with self._lock:
+                self._signature = signature
+        except OSError as e:
+            print(f"Warning: Could not write reliability snapshot: {e}")
+
+    def rebuild(self) -> "RunningReliability":
+        """Rebuild from the result store and overwrite the snapshot."""
+        with self._save_lock, file_lock(self._lock_path()):
+            with self._lock:
+                self.rebuild_from_store()
+                self._pending = ReliabilityAccumulators()
+                data = self.to_dict()
+            self._write(data)
+        return self
+
+    def load_or_rebuild(self) -> "RunningReliability":
+        """Load the snapshot, or rebuild it from the result store when there is none."""
+        with self._save_lock, file_lock(self._lock_path()):
+            signature = _file_signature(self.path)
+            disk = self._read_snapshot()
+            if disk is not None:
+                with self._lock:
+                    self._adopt(disk)
+                    self._signature = signature
+                return self
+            # Written even when empty: a worker that found no snapshot must not
+            # rebuild from rows that other workers also hold as pending results
+            with self._lock:
+                self.rebuild_from_store()
+                data = self.to_dict()
+            self._write(data)
+        return self
+
+
+_RUNNING: Optional[RunningReliability] = None
+_RUNNING_LOCK = threading.Lock()
+
+
+def get_running_reliability() -> RunningReliability:
+    """Shared accumulators, loaded (or rebuilt from the result store) on first use."""
+    global _RUNNING
+    if _RUNNING is None:
+        with _RUNNING_LOCK:
+            if _RUNNING is None:
+                _RUNNING = RunningReliability().load_or_rebuild()
+    return _RUNNING.refresh()
+
+
+def read_reliability_snapshot(path: str = STATS_SNAPSHOT) -> ReliabilityAccumulators:
+    """
+    Read-only view of the running statistics for offline tools: the shared
+    snapshot if there is one, else rebuilt in memory from the result store.
+    Unlike get_running_reliability() it never creates or writes the snapshot.
+    """
+    acc = _read_snapshot_file(path)
+    if acc is None:
+        acc = ReliabilityAccumulators()
+        acc.rebuild_from_store()
+    return acc
+
+
+def record_result(
+    answers: Dict[str, Any], sums: Dict[str, float], percents: Dict[str, float]
+) -> None:
+    """Fold a completed RIASEC result into the running statistics."""
+    get_running_reliability().update(answers, sums, percents)
+
+
+def _save_running_snapshot() -> None:
+    if _RUNNING is not None:
+        _RUNNING.save_if_dirty()
+
+
+# Snapshot writes ride along with the result-store flushes
+register_flush_callback(_save_running_snapshot)
+
+
 def compute_sem(sd: float, alpha: float) -> float:
     """
     STEP 5: Compute Standard Error of Measurement (SEM).
@@ -278,7 +778,7 @@ def check_ci_overlap(ci1: Tuple[float, float], ci2: Tuple[float, float]) -> bool
 def compute_comprehensive_confidence(
     trait_scores: Dict[str, float],
     raw_sums: Dict[str, float],
-    historical_data: Optional[pd.DataFrame] = None
+    historical_data: Optional[Columns] = None
 ) -> Dict[str, Any]:
     """
     Compute comprehensive confidence metrics for all RIASEC traits.
@@ -288,20 +788,17 @@ def compute_comprehensive_confidence(
     Args:
         trait_scores: Dictionary mapping scale -> score (normalized 0-100 or raw)
         raw_sums: Dictionary mapping scale -> raw sum scores
-        historical_data: Optional DataFrame of historical data
+        historical_data: Optional historical result columns to rank against;
+                         the running percentile index is used when omitted
     
     Returns:
         Dictionary containing all confidence metrics for each trait
     """
-    # STEP 3: Get reliability coefficients (Cronbach's α)
-    alphas = compute_reliability_from_historical_data()
-    
-    # STEP 4: Get standard deviations
-    sds = compute_standard_deviations()
-    
-    # Load historical data if not provided
-    if historical_data is None:
-        historical_data = _load_historical_scores()
+    # STEPS 3-4: reliability coefficients (Cronbach's α) and SDs from the
+    # running accumulators
+    running = get_running_reliability()
+    alphas = running.alphas()
+    sds = running.sds()
     
     # Calculate metrics for each trait
     trait_metrics = {}
@@ -310,7 +807,7 @@ def compute_comprehensive_confidence(
         score = trait_scores.get(scale, 0.0)
         raw_sum = raw_sums.get(scale, 0.0)
         alpha = alphas.get(scale, 0.75)
-        sd = sds.get(scale, 7.0)
+        sd = sds.get(scale, DEFAULT_SD)
         
         # STEP 5: Calculate SEM
         sem = compute_sem(sd, alpha)
@@ -318,14 +815,16 @@ def compute_comprehensive_confidence(
         # STEP 6: Calculate 95% CI
         ci_lower, ci_upper = compute_confidence_interval(score, sem)
         
-        # STEP 7: Calculate percentile rank
-        percentile = 50.0  # Default
-        if historical_data is not None and len(historical_data) > 0:
+        # STEP 7: Calculate percentile rank (explicit data wins over the cache)
+        if historical_data is not None:
+            percentile = 50.0
             perc_col = f"{scale}_perc"
-            if perc_col in historical_data.columns:
-                all_scores = historical_data[perc_col].dropna().values
+            if _n_rows(historical_data) > 0 and perc_col in historical_data:
+                all_scores = _column_values(historical_data, perc_col)
                 if len(all_scores) > 0:
                     percentile = compute_percentile_rank(score, all_scores)
+        else:
+            percentile = running.percentile(scale, score)
         
         # STEP 10: Calculate trait confidence score
         # Estimate score range: if we have ~10 items on 1-5 scale, range is ~40 (10-50)
@@ -0,0 +1,243 @@
+# services/runtime_data.py
+"""
+Pre-compiled runtime data artifact.
+
+All data the API reads at startup (MBTI question bank, RIASEC items,
+recommender tables, career clusters, BNN weights) compiled into one .npz so
+a cold start needs neither pandas nor openpyxl. Each section records the
+sha256 of the source files it was built from; load_section() only serves a
+section while those still match (or the sources are not deployed at all),
+so editing a CSV without rebuilding falls back to parsing it.
+
+Arrays are stored as "<section>/<field>" (no pickles); "__index__" holds a
+small JSON index: {"format", "built_at", "sections": {name: {"sources", "paths", "fields"}}}.
+
+Usage (from backend/):
+  python -m services.runtime_data build            # writes IP_RUNTIME_ARTIFACT
+  python -m services.runtime_data info
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+RUNTIME_ARTIFACT = os.getenv("IP_RUNTIME_ARTIFACT", "artifacts/runtime_data.npz")
+ARTIFACT_FORMAT = 1
+
+_artifact: Optional[Dict[str, Any]] = None
+
+
+def artifact_path(path: str = RUNTIME_ARTIFACT) -> str:
+    """Resolve the artifact (also tried under backend/, like models.bnn.weights_path)."""
+    if path and not os.path.exists(path) and os.path.exists(os.path.join("backend", path)):
+        path = os.path.join("backend", path)
+    return path
+
+
+def _sha256(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def _open_artifact() -> Dict[str, Any]:
+    """The artifact's index and arrays, read once per process ({} when absent/unreadable)."""
+    global _artifact
+    if _artifact is None:
+        _artifact = {}
+        path = artifact_path()
+        if path and os.path.exists(path):
+            try:
+                with np.load(path, allow_pickle=False) as npz:
+                    arrays = {name: npz[name] for name in npz.files}
+                index = json.loads(arrays.pop("__index__").tobytes().decode("utf-8"))
+                if index.get("format") == ARTIFACT_FORMAT:
+                    _artifact = {"index": index, "arrays": arrays}
+                else:
+                    print(f"[warn] {path}: unsupported format {index.get('format')}, rebuild it")
+            except Exception as e:
+                print(f"[warn] failed to read runtime artifact {path}: {e}")
+    return _artifact
+
+
+def load_section(name: str, sources: Sequence[str]) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Arrays of section `name` if the artifact has it and it was built from
+    the current contents of `sources`; None means "parse the sources".
+    Source files that are not deployed are not checked.
+    """
+    artifact = _open_artifact()
+    section = artifact.get("index", {}).get("sections", {}).get(name)
+    if section is None:
+        return None
+    recorded = section["sources"]
+    for path in sources:
+        digest = _sha256(path)
+        if digest is not None and recorded.get(os.path.basename(path)) != digest:
+            return None
+    return {field: artifact["arrays"][f"{name}/{field}"] for field in section["fields"]}
+
+
+# -----------------------------
+# SOURCE READERS
+# -----------------------------
+def read_table(path) -> Tuple[List[str], List[List[Any]]]:
+    """
+    Header and data rows of a CSV or XLSX (first sheet) file, skipping blank
+    rows and padding short ones with "". CSV cells are str; XLSX cells keep
+    their type, with integral numbers as int and empty cells as "".
+    """
+    if str(path).lower().endswith(".xlsx"):
+        import openpyxl
+
+        wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            raw = [
+                ["" if v is None else int(v) if isinstance(v, float) and v.is_integer() else v
+                 for v in row]
+                for row in wb.worksheets[0].iter_rows(values_only=True)
+            ]
+        finally:
+            wb.close()
+    else:
+        with open(path, "r", newline="", encoding="utf-8-sig") as f:
+            raw = list(csv.reader(f))
+
+    raw = [row for row in raw if any(str(v).strip() for v in row)]
+    if not raw:
+        return [], []
+    header = [str(h) for h in raw[0]]
+    rows = [row + [""] * (len(header) - len(row)) for row in raw[1:]]
+    return header, rows
+
+
+# -----------------------------
+# BUILD
+# -----------------------------
+def _str_array(values: Sequence[Any]) -> np.ndarray:
+    return np.array([str(v) for v in values], dtype=str)
+
+
+def _collect_sections() -> Dict[str, Any]:
+    """Parse every source with the modules' own loaders -> {name: (sources, fields)}."""
+    from models.bnn import weights_path
+    from .mbti_inference import CAREER_FILE, _read_career_rows
+    from .mbti_questions import QUESTIONS_XLSX, load_questions
+    from .recommender import (
+        CAREER_CLUSTERS_CSV,
+        MBTI_CLUSTER_PRIOR_CSV,
+        RIASEC_CLUSTER_MATRIX_CSV,
+        CareerClusterRecommender,
+    )
+    from .riasec import QUESTIONS_PATH, _load_questions
+
+    sections: Dict[str, Any] = {}
+
+    items, _traits = load_questions(QUESTIONS_XLSX)
+    sections["mbti_questions"] = ([QUESTIONS_XLSX], {
+        "id": _str_array([q["id"] for q in items]),
+        "text": _str_array([q["text"] for q in items]),
+        "yes_trait": _str_array([q["yes_trait"] for q in items]),
+        "no_trait": _str_array([q["no_trait"] for q in items]),
+    })
+
+    riasec_items = _load_questions(QUESTIONS_PATH)
+    sections["riasec_items"] = ([QUESTIONS_PATH], {
+        "id": _str_array([qid for qid, _text, _scale in riasec_items]),
+        "text": _str_array([text for _qid, text, _scale in riasec_items]),
+        "scale": _str_array([scale for _qid, _text, scale in riasec_items]),
+    })
+
+    tables = CareerClusterRecommender.read_source_tables()
+    sections["recommender"] = (
+        [str(MBTI_CLUSTER_PRIOR_CSV), str(RIASEC_CLUSTER_MATRIX_CSV), str(CAREER_CLUSTERS_CSV)],
+        {
+            "prior_index": _str_array(tables["prior_index"]),
+            "clusters": _str_array(tables["clusters"]),
+            "prior_values": tables["prior_values"],
+            "matrix_index": _str_array(tables["matrix_index"]),
+            "matrix_values": tables["matrix_values"],
+            "description_keys": _str_array(list(tables["descriptions"])),
+            "description_values": _str_array(list(tables["descriptions"].values())),
+        },
+    )
+
+    careers = _read_career_rows()
+    sections["mbti_careers"] = ([str(CAREER_FILE)], {
+        "cluster": _str_array([r[0] for r in careers]),
+        "about": _str_array([r[1] for r in careers]),
+        "mbti": _str_array([r[2] for r in careers]),
+    })
+
+    path = weights_path()
+    with open(path, "r") as f:
+        weights = json.load(f)
+    sections["bnn_weights"] = ([path], {
+        k: np.array(weights[k], dtype=np.float32)
+        for k in ("l1_weight", "l1_bias", "l2_weight", "l2_bias", "l3_weight", "l3_bias")
+    })
+    return sections
+
+
+def build(out: str = RUNTIME_ARTIFACT) -> Dict[str, Any]:
+    """Compile every section into `out` (atomic replace); returns the index."""
+    sections = _collect_sections()
+    index: Dict[str, Any] = {"format": ARTIFACT_FORMAT, "built_at": time.time(), "sections": {}}
+    arrays: Dict[str, np.ndarray] = {}
+    for name, (sources, fields) in sections.items():
+        index["sections"][name] = {
+            "sources": {os.path.basename(p): _sha256(p) for p in sources},
+            "paths": [os.path.relpath(p) for p in sources],
+            "fields": list(fields),
+        }
+        for field, values in fields.items():
+            arrays[f"{name}/{field}"] = values
+    arrays["__index__"] = np.frombuffer(json.dumps(index).encode("utf-8"), dtype=np.uint8)
+
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    tmp = out + ".tmp.npz"
+    np.savez_compressed(tmp, **arrays)
+    os.replace(tmp, out)
+    return index
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser("Compile the runtime data artifact")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="Parse all data sources and write the artifact.")
+    b.add_argument("--out", default=RUNTIME_ARTIFACT)
+    sub.add_parser("info", help="Show the artifact's sections and whether they are current.")
+    args = parser.parse_args()
+
+    if args.cmd == "build":
+        t0 = time.perf_counter()
+        index = build(args.out)
+        size = os.path.getsize(args.out)
+        print(f"Wrote {args.out} ({size / 1024:.1f} KiB, {len(index['sections'])} sections) "
+              f"in {time.perf_counter() - t0:.2f}s")
+    else:
+        artifact = _open_artifact()
+        if not artifact:
+            print(f"No artifact at {artifact_path()}")
+            return
+        for name, section in artifact["index"]["sections"].items():
+            stale = [
+                path for path in section["paths"]
+                if _sha256(path) not in (None, section["sources"][os.path.basename(path)])
+            ]
+            state = f"stale ({', '.join(stale)})" if stale else "current"
+            print(f"  {name:16s} {len(section['fields'])} fields  {state}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,13 @@
 # backend/services/session_store.py
 """
-Session storage abstraction for serverless environments.
-Uses JWT tokens to encode session state, eliminating need for server-side storage.
+Session storage abstraction.
+
+- SessionBackend: get/put/delete/touch with TTL, shared by the MBTI and RIASEC
+  engines. Implementations: in-process LRU (MemoryBackend), SQLite in WAL mode
+  (SQLiteBackend) and a Redis-protocol client (RedisBackend), selected with
+  IP_SESSION_BACKEND ("memory", "sqlite:///path/to.db", "redis://host:6379/0").
+- Signed tokens that encode session state for serverless environments
+  (IP_STATELESS_SESSIONS=1 makes the quiz engines use them instead of a backend).
 """
 
 import json
@@ -9,17 +15,708 @@ import base64
 import hmac
 import hashlib
 import os
-from typing import Dict, Any, Optional
+import secrets
+import socket
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from array import array
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlparse, unquote
+
+# Secret key for signing tokens; must be set (and shared by all workers) in stateless mode
+SECRET_KEY = os.getenv("SESSION_SECRET", "")
+
+# Backend selection and idle lifetime (seconds) of quiz sessions
+SESSION_BACKEND_URL = os.getenv("IP_SESSION_BACKEND", "memory")
+SESSION_TTL = int(os.getenv("IP_SESSION_TTL", "7200"))
+SESSION_MAX_ENTRIES = int(os.getenv("IP_SESSION_MAX_ENTRIES", "100000"))
+# How often (seconds) the background sweeper purges expired sessions
+SESSION_SWEEP_INTERVAL = float(os.getenv("IP_SESSION_SWEEP_INTERVAL", "60"))
+# Opt-in stateless mode: the quiz engines return the whole compact session state
+# as a signed token in "sessionID" instead of keeping it server-side
+STATELESS_SESSIONS = os.getenv("IP_STATELESS_SESSIONS", "0") == "1"
+
+# Former hard-coded default; treated as unset so it can never sign real tokens
+_PLACEHOLDER_SECRET = "your-secret-key-change-in-production"
+if not SECRET_KEY or SECRET_KEY == _PLACEHOLDER_SECRET:
+    if STATELESS_SESSIONS:
+        raise RuntimeError(
+            "IP_STATELESS_SESSIONS=1 requires SESSION_SECRET to be set to a strong random "
+            "value shared by every worker; refusing to sign session tokens with a default key"
+        )
+    # Tokens are then only minted and checked inside this process
+    SECRET_KEY = secrets.token_hex(32)
+
+
+# -----------------------------
+# SESSION BACKENDS
+# -----------------------------
+class SessionBackend:
+    """
+    Key/value store for quiz session dicts.
+
+    Engines load a session with get(), mutate it, and write it back with
+    put(); every put() restarts the idle TTL. Backends that are not
+    `in_process` serialize values with the session token codec (pack_state),
+    so they only hold plain data (None/bool/int/float/str/bytes/list/dict);
+    the engines store their compact token state there, never live objects.
+    """
+
+    kind = "base"
+    # True when values are kept by reference (no serialization)
+    in_process = False
+
+    def __init__(self, namespace: str = "", ttl: int = SESSION_TTL):
+        self.namespace = namespace
+        self.ttl = int(ttl)
+        self.evicted_ttl = 0
+        self.evicted_lru = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}" if self.namespace else key
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def put(self, key: str, value: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def touch(self, key: str, ttl: Optional[int] = None) -> bool:
+        """Restart the idle TTL without rewriting the value. Returns False if missing."""
+        raise NotImplementedError
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def sweep(self) -> int:
+        """Purge expired sessions; returns how many were removed."""
+        return 0
+
+    def live_count(self) -> Optional[int]:
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.kind,
+            "live": self.live_count(),
+            "ttl_seconds": self.ttl,
+            "evicted_ttl": self.evicted_ttl,
+            "evicted_lru": self.evicted_lru,
+        }
+
+
+class MemoryBackend(SessionBackend):
+    """
+    In-process LRU with idle TTL. Values are stored by reference (no
+    serialization), so it only works with a single worker process.
+
+    Every get()/put() moves the key to the back and restarts its TTL (the
+    entry's own ttl from put(), else the backend default), so while every
+    entry uses the default TTL the OrderedDict is also ordered by expiry and
+    sweep() pops from the front, stopping at the first live entry. Once a
+    put() passes a different ttl that order no longer holds, and sweep()
+    scans every entry instead. Above max_entries the least recently
+    used sessions are evicted.
+    """
+
+    kind = "memory"
+    in_process = True
+
+    def __init__(self, namespace: str = "", ttl: int = SESSION_TTL,
+                 max_entries: int = SESSION_MAX_ENTRIES):
+        super().__init__(namespace, ttl)
+        self.max_entries = int(max_entries)
+        # key -> (expires_at, ttl, value), least recently used first
+        self._data: "OrderedDict[str, Tuple[float, float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # False once any entry got a non-default ttl (insertion order != expiry order)
+        self._expiry_ordered = True
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._data[key]
+                self.evicted_ttl += 1
+                return None
+            self._data[key] = (now + entry[1], entry[1], entry[2])
+            self._data.move_to_end(key)
+            return entry[2]
+
+    def put(self, key: str, value: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl
+        with self._lock:
+            if ttl != self.ttl:
+                self._expiry_ordered = False
+            self._data[key] = (expires_at, ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evicted_lru += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def touch(self, key: str, ttl: Optional[int] = None) -> bool:
+        """Restart the entry's TTL (its own ttl unless a new one is given)."""
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= now:
+                return False
+            ttl = entry[1] if ttl is None else ttl
+            if ttl != self.ttl:
+                self._expiry_ordered = False
+            self._data[key] = (now + ttl, ttl, entry[2])
+            self._data.move_to_end(key)
+            return True
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def sweep(self) -> int:
+        now = time.time()
+        removed = 0
+        with self._lock:
+            if self._expiry_ordered:
+                while self._data:
+                    key, (expires_at, _ttl, _value) = next(iter(self._data.items()))
+                    if expires_at > now:
+                        break
+                    del self._data[key]
+                    removed += 1
+            else:
+                expired = [key for key, (expires_at, _ttl, _value) in self._data.items() if expires_at <= now]
+                for key in expired:
+                    del self._data[key]
+                removed = len(expired)
+            self.evicted_ttl += removed
+        return removed
+
+    def live_count(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        out = super().stats()
+        out["max_entries"] = self.max_entries
+        return out
+
+
+class SQLiteBackend(SessionBackend):
+    """
+    SQLite file in WAL mode: survives restarts and is shared by every worker
+    process on the same host.
+    """
+
+    kind = "sqlite"
+
+    def __init__(self, path: str, namespace: str = "", ttl: int = SESSION_TTL):
+        super().__init__(namespace, ttl)
+        self.path = path
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires ON sessions(expires_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; autocommit, each statement is its own transaction
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            "SELECT value FROM sessions WHERE key = ? AND expires_at > ?",
+            (self._key(key), time.time()),
+        ).fetchone()
+        return unpack_state(row[0]) if row else None
+
+    def put(self, key: str, value: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        self._conn().execute(
+            "INSERT OR REPLACE INTO sessions (key, value, expires_at) VALUES (?, ?, ?)",
+            (self._key(key), pack_state(value), expires_at),
+        )
+
+    def delete(self, key: str) -> None:
+        self._conn().execute("DELETE FROM sessions WHERE key = ?", (self._key(key),))
+
+    def touch(self, key: str, ttl: Optional[int] = None) -> bool:
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        cur = self._conn().execute(
+            "UPDATE sessions SET expires_at = ? WHERE key = ? AND expires_at > ?",
+            (expires_at, self._key(key), time.time()),
+        )
+        return cur.rowcount > 0
+
+    def purge_expired(self) -> int:
+        prefix = self._key("")
+        cur = self._conn().execute(
+            "DELETE FROM sessions WHERE expires_at <= ? AND substr(key, 1, ?) = ?",
+            (time.time(), len(prefix), prefix),
+        )
+        return cur.rowcount
+
+    def sweep(self) -> int:
+        removed = self.purge_expired()
+        self.evicted_ttl += removed
+        return removed
+
+    def live_count(self) -> int:
+        prefix = self._key("")
+        row = self._conn().execute(
+            "SELECT COUNT(*) FROM sessions WHERE expires_at > ? AND substr(key, 1, ?) = ?",
+            (time.time(), len(prefix), prefix),
+        ).fetchone()
+        return int(row[0])
+
+
+class RedisBackend(SessionBackend):
+    """
+    Minimal RESP2 client (GET / SET EX / DEL / EXPIRE) over a plain socket,
+    so any Redis-protocol server works without an extra dependency. Keys
+    expire server-side, which makes sessions shareable across hosts, and the
+    server's own maxmemory policy acts as the size cap.
+    """
+
+    kind = "redis"
+
+    def __init__(self, url: str, namespace: str = "", ttl: int = SESSION_TTL,
+                 timeout: float = 5.0):
+        super().__init__(namespace, ttl)
+        u = urlparse(url)
+        self.host = u.hostname or "localhost"
+        self.port = u.port or 6379
+        self.password = unquote(u.password) if u.password else None
+        self.db = int(u.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    # ---- RESP plumbing ----
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        conn = (sock, sock.makefile("rb"))
+        self._local.conn = conn
+        try:
+            if self.password:
+                self._roundtrip(conn, "AUTH", self.password)
+            if self.db:
+                self._roundtrip(conn, "SELECT", str(self.db))
+        except Exception:
+            self._close()
+            raise
+        return conn
+
+    @staticmethod
+    def _encode(*args) -> bytes:
+        out = [b"*%d\r\n" % len(args)]
+        for a in args:
+            b = a if isinstance(a, bytes) else str(a).encode()
+            out.append(b"$%d\r\n%s\r\n" % (len(b), b))
+        return b"".join(out)
+
+    @staticmethod
+    def _read_reply(rfile):
+        line = rfile.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest
+        if kind == b"-":
+            raise RuntimeError(f"Redis error: {rest.decode(errors='replace')}")
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            n = int(rest)
+            if n < 0:
+                return None
+            data = rfile.read(n + 2)
+            return data[:-2]
+        if kind == b"*":
+            n = int(rest)
+            return None if n < 0 else [RedisBackend._read_reply(rfile) for _ in range(n)]
+        raise RuntimeError(f"Unexpected Redis reply: {line!r}")
+
+    def _roundtrip(self, conn, *args):
+        sock, rfile = conn
+        sock.sendall(self._encode(*args))
+        return self._read_reply(rfile)
+
+    def _command(self, *args):
+        conn = getattr(self._local, "conn", None)
+        try:
+            return self._roundtrip(conn or self._connect(), *args)
+        except (ConnectionError, OSError):
+            # Stale connection (server restart, idle timeout): close it, reconnect once
+            self._close()
+            return self._roundtrip(self._connect(), *args)
+
+    def _close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            sock, rfile = conn
+            for f in (rfile, sock):
+                try:
+                    f.close()
+                except OSError:
+                    pass
+
+    # ---- SessionBackend ----
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = self._command("GET", self._key(key))
+        return unpack_state(raw) if raw is not None else None
+
+    def put(self, key: str, value: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        self._command(
+            "SET", self._key(key),
+            pack_state(value),
+            "EX", str(max(1, int(ttl))),
+        )
+
+    def delete(self, key: str) -> None:
+        self._command("DEL", self._key(key))
 
-# Secret key for signing tokens (in production, use environment variable)
-SECRET_KEY = os.getenv("SESSION_SECRET", "your-secret-key-change-in-production")
+    def touch(self, key: str, ttl: Optional[int] = None) -> bool:
+        ttl = self.ttl if ttl is None else ttl
+        return self._command("EXPIRE", self._key(key), str(max(1, int(ttl)))) == 1
 
 
-def encode_session(session_data: Dict[str, Any]) -> str:
+# Every backend built by make_backend, keyed by namespace (for sweeping + stats)
+_BACKENDS: Dict[str, SessionBackend] = {}
+
+
+def make_backend(url: str = SESSION_BACKEND_URL, namespace: str = "",
+                 ttl: int = SESSION_TTL) -> SessionBackend:
+    """
+    Build a backend from a URL:
+      memory                 -> MemoryBackend (default)
+      sqlite:///logs/s.db    -> SQLiteBackend (relative path; sqlite:////abs for absolute)
+      redis://[:pw@]host:port/db -> RedisBackend
     """
-    Encode session data into a signed token.
+    url = (url or "memory").strip()
+    scheme = url.split(":", 1)[0].lower()
+    if scheme == "memory":
+        backend = MemoryBackend(namespace=namespace, ttl=ttl)
+    elif scheme == "sqlite":
+        path = url[len("sqlite:///"):] if url.startswith("sqlite:///") else url[len("sqlite:"):]
+        backend = SQLiteBackend(path or "sessions.db", namespace=namespace, ttl=ttl)
+    elif scheme == "redis":
+        backend = RedisBackend(url, namespace=namespace, ttl=ttl)
+    elif scheme == "rediss":
+        raise ValueError("TLS Redis URLs (rediss://) are not supported")
+    else:
+        raise ValueError(f"Unknown session backend: {url!r}")
+    _BACKENDS[namespace] = backend
+    return backend
+
+
+def sweep_sessions() -> int:
+    """Purge expired sessions from every registered backend."""
+    removed = 0
+    for backend in list(_BACKENDS.values()):
+        try:
+            removed += backend.sweep()
+        except Exception as e:
+            print(f"[warn] session sweep failed for {backend.namespace or backend.kind}: {e}")
+    return removed
+
+
+def session_stats() -> Dict[str, Dict[str, Any]]:
+    """Live/evicted counters per namespace, e.g. {"mbti": {...}, "riasec": {...}}."""
+    out = {}
+    for namespace, backend in list(_BACKENDS.items()):
+        try:
+            out[namespace] = backend.stats()
+        except Exception as e:
+            out[namespace] = {"backend": backend.kind, "error": str(e)}
+    return out
+
+
+_sweeper_thread: Optional[threading.Thread] = None
+_sweeper_stop = threading.Event()
+
+
+def start_sweeper(interval: float = SESSION_SWEEP_INTERVAL) -> None:
+    """Start the daemon thread that calls sweep_sessions() every `interval` seconds (idempotent)."""
+    global _sweeper_thread
+    if interval <= 0 or (_sweeper_thread is not None and _sweeper_thread.is_alive()):
+        return
+    _sweeper_stop.clear()
+
+    def _run():
+        while not _sweeper_stop.wait(interval):
+            sweep_sessions()
+
+    _sweeper_thread = threading.Thread(target=_run, name="session-sweeper", daemon=True)
+    _sweeper_thread.start()
+
+
+def stop_sweeper() -> None:
+    global _sweeper_thread
+    _sweeper_stop.set()
+    if _sweeper_thread is not None:
+        _sweeper_thread.join(timeout=5.0)
+    _sweeper_thread = None
+
+
+# -----------------------------
+# SESSION TOKENS
+# -----------------------------
+# v1 token = base64url( version | flags | body | mac ), no padding:
+#   version : 1 byte (TOKEN_VERSION)
+#   flags   : 1 byte, bit 0 set when body is zlib-compressed
+#   body    : tagged binary encoding of the session dict (see _pack_value)
+#   mac     : HMAC-SHA256 over version|flags|body, truncated to TOKEN_MAC_BYTES
+# Legacy v0 tokens ("<base64 json>.<hex sha256>") are still accepted by decode_session.
+TOKEN_VERSION = 1
+TOKEN_MAC_BYTES = 16
+TOKEN_MAX_BYTES = 16 * 1024          # reject oversized tokens / zlib bombs
+TOKEN_COMPRESS_MIN = 256             # only try zlib on bodies at least this long
+_FLAG_ZLIB = 0x01
+
+# value tags
+_T_NONE, _T_FALSE, _T_TRUE, _T_INT, _T_FLOAT, _T_STR, _T_BYTES = range(7)
+_T_LIST, _T_U8_LIST, _T_I8_LIST, _T_DICT = range(7, 11)
+
+
+def _pack_varint(n: int, out: bytearray) -> None:
+    """Unsigned LEB128."""
+    while True:
+        b = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return
+
+
+def _unpack_varint(buf: bytes, pos: int) -> Tuple[int, int]:
+    n = shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if not b & 0x80:
+            return n, pos
+        shift += 7
+
+
+def _pack_value(v: Any, out: bytearray) -> None:
+    if v is None:
+        out.append(_T_NONE)
+    elif v is True:
+        out.append(_T_TRUE)
+    elif v is False:
+        out.append(_T_FALSE)
+    elif isinstance(v, int):
+        out.append(_T_INT)
+        _pack_varint(v << 1 if v >= 0 else (-v << 1) - 1, out)  # zigzag
+    elif isinstance(v, float):
+        out.append(_T_FLOAT)
+        out += struct.pack("<d", v)
+    elif isinstance(v, str):
+        b = v.encode()
+        out.append(_T_STR)
+        _pack_varint(len(b), out)
+        out += b
+    elif isinstance(v, (bytes, bytearray)):
+        out.append(_T_BYTES)
+        _pack_varint(len(v), out)
+        out += v
+    elif isinstance(v, (list, tuple)):
+        # Lists of small ints (answer vectors, counters) are packed one byte per
+        # item; bytes()/array() do the range and type checks in C
+        if v and not any(type(x) is not int for x in v):
+            try:
+                packed, tag = bytes(v), _T_U8_LIST
+            except ValueError:
+                try:
+                    packed, tag = array("b", v).tobytes(), _T_I8_LIST
+                except OverflowError:
+                    packed = None
+            if packed is not None:
+                out.append(tag)
+                _pack_varint(len(v), out)
+                out += packed
+                return
+        out.append(_T_LIST)
+        _pack_varint(len(v), out)
+        for x in v:
+            _pack_value(x, out)
+    elif isinstance(v, dict):
+        out.append(_T_DICT)
+        _pack_varint(len(v), out)
+        for k, x in v.items():
+            kb = str(k).encode()
+            _pack_varint(len(kb), out)
+            out += kb
+            _pack_value(x, out)
+    else:
+        raise TypeError(f"Cannot encode {type(v).__name__} in a session token")
+
+
+def _unpack_value(buf: bytes, pos: int) -> Tuple[Any, int]:
+    tag = buf[pos]
+    pos += 1
+    if tag == _T_NONE:
+        return None, pos
+    if tag == _T_TRUE:
+        return True, pos
+    if tag == _T_FALSE:
+        return False, pos
+    if tag == _T_INT:
+        z, pos = _unpack_varint(buf, pos)
+        return (-((z + 1) >> 1) if z & 1 else z >> 1), pos
+    if tag == _T_FLOAT:
+        return struct.unpack_from("<d", buf, pos)[0], pos + 8
+    if tag in (_T_STR, _T_BYTES, _T_U8_LIST, _T_I8_LIST):
+        n, pos = _unpack_varint(buf, pos)
+        raw = buf[pos:pos + n]
+        if len(raw) != n:
+            raise ValueError("Truncated session token")
+        pos += n
+        if tag == _T_STR:
+            return raw.decode(), pos
+        if tag == _T_BYTES:
+            return bytes(raw), pos
+        if tag == _T_U8_LIST:
+            return list(raw), pos
+        return array("b", raw).tolist(), pos
+    if tag == _T_LIST:
+        n, pos = _unpack_varint(buf, pos)
+        items = []
+        for _ in range(n):
+            x, pos = _unpack_value(buf, pos)
+            items.append(x)
+        return items, pos
+    if tag == _T_DICT:
+        n, pos = _unpack_varint(buf, pos)
+        d = {}
+        for _ in range(n):
+            kn, pos = _unpack_varint(buf, pos)
+            k = buf[pos:pos + kn].decode()
+            pos += kn
+            d[k], pos = _unpack_value(buf, pos)
+        return d, pos
+    raise ValueError(f"Unknown tag {tag} in session token")
+
+
+def pack_state(state: Dict[str, Any]) -> bytes:
+    """Unsigned binary encoding of a plain-data dict (token body format), for stored sessions."""
+    out = bytearray()
+    _pack_value(state, out)
+    return bytes(out)
+
+
+def unpack_state(data: bytes) -> Optional[Dict[str, Any]]:
+    """Inverse of pack_state(); None for anything that does not decode to a dict."""
+    try:
+        state, pos = _unpack_value(bytes(data), 0)
+    except (ValueError, IndexError, UnicodeDecodeError, struct.error):
+        return None
+    return state if isinstance(state, dict) and pos == len(data) else None
+
+
+_SECRET_KEY_BYTES = SECRET_KEY.encode()
+
+
+def _token_mac(data: bytes) -> bytes:
+    return hmac.digest(_SECRET_KEY_BYTES, data, "sha256")[:TOKEN_MAC_BYTES]
+
+
+def encode_session(session_data: Dict[str, Any], compress: bool = True) -> str:
+    """
+    Encode session data into a signed, versioned binary token (see layout above).
     Client stores this token and sends it back with each request.
     """
+    body = bytearray()
+    _pack_value(session_data, body)
+    body = bytes(body)
+
+    flags = 0
+    if compress and len(body) >= TOKEN_COMPRESS_MIN:
+        packed = zlib.compress(body, 6)
+        if len(packed) < len(body):
+            body, flags = packed, flags | _FLAG_ZLIB
+
+    signed = bytes((TOKEN_VERSION, flags)) + body
+    raw = signed + _token_mac(signed)
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_session(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Decode and verify a session token (v1 binary, or legacy v0 JSON).
+    Returns None if token is invalid or tampered with.
+    """
+    if not token or len(token) > TOKEN_MAX_BYTES * 4 // 3 + 4:
+        return None
+    if "." in token:
+        return _decode_session_v0(token)
+
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (ValueError, TypeError):
+        return None
+    if len(raw) < 2 + TOKEN_MAC_BYTES or raw[0] != TOKEN_VERSION:
+        return None
+
+    signed, mac = raw[:-TOKEN_MAC_BYTES], raw[-TOKEN_MAC_BYTES:]
+    if not hmac.compare_digest(mac, _token_mac(signed)):
+        return None
+
+    try:
+        flags, body = signed[1], signed[2:]
+        if flags & _FLAG_ZLIB:
+            d = zlib.decompressobj()
+            body = d.decompress(body, TOKEN_MAX_BYTES)
+            if d.unconsumed_tail:
+                return None
+        data, _pos = _unpack_value(body, 0)
+        return data if isinstance(data, dict) else None
+    except Exception as e:
+        print(f"Error decoding session: {e}")
+        return None
+
+
+def token_int(value: Any, lo: int, hi: Optional[int] = None) -> bool:
+    """True if a decoded token field is an int (not bool) in [lo, hi]; engines use it to vet token state."""
+    return (
+        isinstance(value, int) and not isinstance(value, bool)
+        and value >= lo and (hi is None or value <= hi)
+    )
+
+
+def _encode_session_v0(session_data: Dict[str, Any]) -> str:
+    """Legacy JSON token: base64(json).hex(sha256 hmac). Kept for benchmarks/compat."""
     # Convert to JSON and base64 encode
     json_str = json.dumps(session_data, separators=(',', ':'))
     payload = base64.urlsafe_b64encode(json_str.encode()).decode()
@@ -35,11 +732,7 @@ def encode_session(session_data: Dict[str, Any]) -> str:
     return f"{payload}.{signature}"
 
 
-def decode_session(token: str) -> Optional[Dict[str, Any]]:
-    """
-    Decode and verify a session token.
-    Returns None if token is invalid or tampered with.
-    """
+def _decode_session_v0(token: str) -> Optional[Dict[str, Any]]:
     try:
         # Split token
         parts = token.split('.')
@@ -92,10 +785,9 @@ def get_session(session_id_or_token: str) -> Optional[Dict[str, Any]]:
     Retrieve session data from token or session ID.
     """
     # Try as token first
-    if '.' in session_id_or_token:
-        data = decode_session(session_id_or_token)
-        if data:
-            return data
+    data = decode_session(session_id_or_token)
+    if data:
+        return data
     
     # Fall back to memory (development mode)
     return _memory_sessions.get(session_id_or_token)
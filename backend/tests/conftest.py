@@ -0,0 +1,14 @@
+# backend/tests/conftest.py
+"""
+Run the tests the way the app runs: from backend/, with its modules importable
+(data and artifact paths are relative to the working directory).
+"""
+
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
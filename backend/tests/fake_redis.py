@@ -0,0 +1,134 @@
+# backend/tests/fake_redis.py
+"""
+Local Redis stand-in for RedisBackend tests.
+
+Speaks just enough RESP2 (AUTH, SELECT, GET, SET [EX], DEL, EXPIRE) on a
+loopback port, with per-db keyspaces and server-side expiry. drop_connections()
+closes every client socket, the way a server restart or idle timeout would.
+"""
+
+import socket
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class FakeRedisServer:
+    def __init__(self, password: Optional[str] = None):
+        self.password = password
+        self.dbs: Dict[int, Dict[bytes, Tuple[bytes, Optional[float]]]] = {}
+        self.commands: List[List[bytes]] = []
+        self.connections = 0
+        self._clients: List[socket.socket] = []
+        self._lock = threading.Lock()
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.listen(16)
+        self.port = self._sock.getsockname()[1]
+        self._running = True
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def url(self, db: int = 0) -> str:
+        auth = f":{self.password}@" if self.password else ""
+        return f"redis://{auth}127.0.0.1:{self.port}/{db}"
+
+    def close(self) -> None:
+        self._running = False
+        self.drop_connections()
+        self._sock.close()
+
+    def drop_connections(self) -> None:
+        with self._lock:
+            clients, self._clients = self._clients, []
+        for c in clients:
+            try:
+                c.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            c.close()
+
+    # -- server loop ------------------------------------------------------------
+
+    def _accept(self) -> None:
+        while self._running:
+            try:
+                conn, _addr = self._sock.accept()
+            except OSError:
+                return
+            with self._lock:
+                self._clients.append(conn)
+                self.connections += 1
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn: socket.socket) -> None:
+        rfile = conn.makefile("rb")
+        state = {"db": 0, "authed": self.password is None}
+        try:
+            while True:
+                args = self._read_command(rfile)
+                if args is None:
+                    return
+                with self._lock:
+                    self.commands.append(args)
+                    reply = self._execute(args, state)
+                conn.sendall(reply)
+        except OSError:
+            return
+        finally:
+            rfile.close()
+            conn.close()
+
+    @staticmethod
+    def _read_command(rfile) -> Optional[List[bytes]]:
+        line = rfile.readline()
+        if not line:
+            return None
+        assert line[:1] == b"*", line
+        args = []
+        for _ in range(int(line[1:-2])):
+            n = int(rfile.readline()[1:-2])
+            args.append(rfile.read(n + 2)[:-2])
+        return args
+
+    def _keyspace(self, state) -> Dict[bytes, Tuple[bytes, Optional[float]]]:
+        return self.dbs.setdefault(state["db"], {})
+
+    def _live(self, state, key: bytes) -> Optional[Tuple[bytes, Optional[float]]]:
+        entry = self._keyspace(state).get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.time():
+            del self._keyspace(state)[key]
+            return None
+        return entry
+
+    def _execute(self, args: List[bytes], state) -> bytes:
+        cmd = args[0].upper()
+        if cmd == b"AUTH":
+            if args[1].decode() != self.password:
+                return b"-WRONGPASS invalid password\r\n"
+            state["authed"] = True
+            return b"+OK\r\n"
+        if not state["authed"]:
+            return b"-NOAUTH Authentication required.\r\n"
+        if cmd == b"SELECT":
+            state["db"] = int(args[1])
+            return b"+OK\r\n"
+        if cmd == b"GET":
+            entry = self._live(state, args[1])
+            return b"$-1\r\n" if entry is None else b"$%d\r\n%s\r\n" % (len(entry[0]), entry[0])
+        if cmd == b"SET":
+            expires = None
+            if len(args) >= 5 and args[3].upper() == b"EX":
+                expires = time.time() + int(args[4])
+            self._keyspace(state)[args[1]] = (args[2], expires)
+            return b"+OK\r\n"
+        if cmd == b"DEL":
+            removed = sum(self._keyspace(state).pop(k, None) is not None for k in args[1:])
+            return b":%d\r\n" % removed
+        if cmd == b"EXPIRE":
+            entry = self._live(state, args[1])
+            if entry is None:
+                return b":0\r\n"
+            self._keyspace(state)[args[1]] = (entry[0], time.time() + int(args[2]))
+            return b":1\r\n"
+        return b"-ERR unknown command '%s'\r\n" % cmd
@@ -0,0 +1,23 @@
+# backend/tests/test_recommender_cache.py
+import numpy as np
+
+from services.recommender import CareerClusterRecommender
+
+
+def test_cache_counts_only_real_lookups():
+    rec = CareerClusterRecommender(cache_size=16)
+    a = [5.0, 3.0, 1.0, 2.0, 4.0, 1.0]
+    b = [1.0, 1.0, 5.0, 2.0, 2.0, 3.0]
+    types = ["INTJ", "INTJ", "ENFP", "INTJ"]
+    raw = np.array([a, a, b, a])
+
+    first = rec.recommend_batch(types, raw)
+    stats = rec.cache_stats()
+    assert (stats["hits"], stats["misses"], stats["deduped"]) == (0, 2, 2)
+    assert stats["entries"] == 2
+
+    second = rec.recommend_batch(types, raw)
+    stats = rec.cache_stats()
+    assert (stats["hits"], stats["misses"], stats["deduped"]) == (4, 2, 2)
+    assert stats["hit_rate"] == round(4 / 6, 4)
+    assert [[r.cluster for r in recs] for recs in first] == [[r.cluster for r in recs] for recs in second]
@@ -0,0 +1,98 @@
+# backend/tests/test_riasec_reliability.py
+import numpy as np
+import pytest
+
+from services.riasec_reliability import (
+    PercentileIndex,
+    RunningMoments,
+    compute_percentile_rank,
+)
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(42)
+
+
+def _scores(rng, n):
+    # Quiz percentages are stored rounded to 0.01, with many exact ties
+    return np.round(rng.uniform(0, 100, n) // 2.5 * 2.5 + rng.choice([0, 0.01, 0.37], n), 2)
+
+
+def test_percentile_index_matches_sorted_array(rng):
+    scores = _scores(rng, 2000)
+    index = PercentileIndex()
+    for s in scores:
+        index.add(s)
+    ordered = np.sort(scores)
+
+    probes = np.concatenate([scores[:200], [0.0, 0.005, 33.33, 50.0, 99.99, 100.0, -5.0, 120.0]])
+    probes = np.round(probes, 2)
+    for p in probes:
+        q = min(max(p, 0.0), 100.0)   # out-of-range scores rank as the nearest end of the scale
+        below = np.searchsorted(ordered, q, side="left")
+        equal = np.searchsorted(ordered, q, side="right") - below
+        expected = (below + 0.5 * equal) / len(ordered) * 100.0
+        assert index.percentile(p) == pytest.approx(expected)
+        if 0 <= p <= 100:
+            assert index.percentile(p) == pytest.approx(compute_percentile_rank(p, scores))
+    np.testing.assert_allclose(index.percentile_array(probes), [index.percentile(p) for p in probes])
+
+
+def test_percentile_index_merge_and_snapshot(rng):
+    a, b = _scores(rng, 700), _scores(rng, 300)
+    left, right, whole = PercentileIndex(), PercentileIndex(), PercentileIndex()
+    for s in a:
+        left.add(s)
+        whole.add(s)
+    for s in b:
+        right.add(s)
+        whole.add(s)
+    left.merge(right)
+    restored = PercentileIndex.from_dict(whole.to_dict())
+    assert left.total == restored.total == 1000
+    for p in np.linspace(0, 100, 101):
+        assert left.percentile(p) == whole.percentile(p) == restored.percentile(p)
+
+
+def test_empty_percentile_index_is_median():
+    assert PercentileIndex().percentile(12.5) == 50.0
+    assert (PercentileIndex().percentile_array(np.array([1.0, 99.0])) == 50.0).all()
+
+
+def _two_pass(X):
+    mean = X.mean(axis=0)
+    return mean, np.cov(X, rowvar=False, ddof=1)
+
+
+def test_running_moments_welford_matches_two_pass(rng):
+    X = rng.normal(3.0, 2.0, size=(500, 6)) + rng.integers(1, 6, size=(500, 6))
+    m = RunningMoments(6)
+    for row in X:
+        m.update(row)
+    mean, cov = _two_pass(X)
+    assert m.n == 500
+    np.testing.assert_allclose(m.mean, mean, rtol=1e-12)
+    np.testing.assert_allclose(m.covariance(), cov, rtol=1e-10)
+
+
+def test_running_moments_chan_merges_match_two_pass(rng):
+    X = rng.normal(1e3, 5.0, size=(901, 4))   # large offset stresses cancellation
+    m = RunningMoments(4)
+    for block in np.array_split(X, [1, 2, 50, 50, 400, 777]):   # includes an empty block
+        m.update_batch(block)
+
+    parts = [RunningMoments(4) for _ in range(3)]
+    for part, block in zip(parts, np.array_split(X, 3)):
+        for row in block:
+            part.update(row)
+    merged = RunningMoments(4)
+    for part in parts:
+        merged.merge(part)
+    merged.merge(RunningMoments(4))
+
+    mean, cov = _two_pass(X)
+    for acc in (m, merged, RunningMoments.from_dict(merged.to_dict())):
+        assert acc.n == len(X)
+        np.testing.assert_allclose(acc.mean, mean, rtol=1e-12)
+        np.testing.assert_allclose(acc.covariance(), cov, rtol=1e-8)
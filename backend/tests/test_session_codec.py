@@ -0,0 +1,110 @@
+# backend/tests/test_session_codec.py
+import base64
+
+import pytest
+
+from services import session_store as ss
+from services.session_store import decode_session, encode_session, token_int
+
+STATE = {
+    "k": "mbti", "u": "alice", "seed": 123456789, "c": 3, "neg": -70000,
+    "q": [3, 17, -1], "a": [1, 0, 1], "tc": [0, 2, 255], "ac": [-3, 0, 127],
+    "big": [1000, -1000], "le": 0.6931471805599453, "la": None,
+    "ok": True, "done": False, "blob": b"\x00\xff", "nested": {"x": [1.5, "y", None]},
+}
+
+
+def _raw(token):
+    return base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+
+
+def _token(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _resign(version, flags, body):
+    signed = bytes((version, flags)) + body
+    return _token(signed + ss._token_mac(signed))
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_roundtrip(compress):
+    state = dict(STATE, pad="r" * (ss.TOKEN_COMPRESS_MIN if compress else 0))
+    token = encode_session(state, compress=compress)
+    assert decode_session(token) == state
+    assert bool(_raw(token)[1] & ss._FLAG_ZLIB) == compress
+
+
+def test_tampered_tokens_are_rejected():
+    raw = _raw(encode_session(STATE))
+    for i in range(len(raw)):
+        flipped = bytearray(raw)
+        flipped[i] ^= 0x01
+        assert decode_session(_token(bytes(flipped))) is None
+
+
+def test_truncated_tokens_are_rejected():
+    token = encode_session(STATE)
+    for n in range(len(token)):
+        assert decode_session(token[:n]) is None
+    # Validly signed but cut-off bodies must not decode either
+    body = _raw(token)[2:-ss.TOKEN_MAC_BYTES]
+    for n in range(len(body)):
+        assert decode_session(_resign(ss.TOKEN_VERSION, 0, body[:n])) is None
+
+
+def test_wrong_version_and_oversized_tokens_are_rejected():
+    body = _raw(encode_session(STATE, compress=False))[2:-ss.TOKEN_MAC_BYTES]
+    assert decode_session(_resign(ss.TOKEN_VERSION, 0, body)) == STATE
+    assert decode_session(_resign(ss.TOKEN_VERSION + 1, 0, body)) is None
+    assert decode_session("A" * (ss.TOKEN_MAX_BYTES * 2)) is None
+
+
+def test_zlib_bomb_is_rejected():
+    import zlib
+
+    bomb = bytes((ss._T_STR,)) + b"\xff\xff\x7f" + b"a" * (ss.TOKEN_MAX_BYTES * 4)
+    assert decode_session(_resign(ss.TOKEN_VERSION, ss._FLAG_ZLIB, zlib.compress(bomb))) is None
+
+
+def test_non_dict_payload_is_rejected():
+    out = bytearray()
+    ss._pack_value([1, 2, 3], out)
+    assert decode_session(_resign(ss.TOKEN_VERSION, 0, bytes(out))) is None
+
+
+def test_legacy_v0_tokens_still_decode():
+    state = {"k": "riasec", "u": "bob", "a": [1, 5, 3]}
+    token = ss._encode_session_v0(state)
+    assert decode_session(token) == state
+    assert decode_session(token[:-1] + ("0" if token[-1] != "0" else "1")) is None
+
+
+def test_token_int():
+    assert token_int(3, 0, 5)
+    assert token_int(0, 0) and token_int(10**9, 0)
+    assert not token_int(6, 0, 5)
+    assert not token_int(-1, 0)
+    assert not token_int(True, 0, 5)
+    assert not token_int(2.0, 0, 5)
+    assert not token_int("2", 0, 5)
+    assert not token_int(None, 0)
+
+
+def test_engines_reject_malformed_token_state():
+    from services import adaptive_engine, riasec
+
+    good = adaptive_engine._to_token_state(adaptive_engine._load_session(
+        adaptive_engine.start_session("u1")["sessionID"]))
+    assert adaptive_engine._from_token_state(good)["user_id"] == "u1"
+    for field, bad in [("seed", True), ("c", -1), ("q", "xyz"), ("la", 99), ("le", "hi")]:
+        with pytest.raises(KeyError):
+            adaptive_engine._from_token_state(dict(good, **{field: bad}))
+    with pytest.raises(KeyError):
+        adaptive_engine._from_token_state({k: v for k, v in good.items() if k != "tc"})
+
+    good = riasec._to_token_state(riasec._ensure_session(riasec.start_session("u1")["sessionID"]))
+    assert riasec._from_token_state(good)["user_id"] == "u1"
+    for field, bad in [("a", "not-a-list"), ("a", good["a"][:-1]), ("a", [riasec.LIKERT_MAX + 1] * len(good["a"]))]:
+        with pytest.raises(KeyError):
+            riasec._from_token_state(dict(good, **{field: bad}))
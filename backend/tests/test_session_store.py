@@ -0,0 +1,139 @@
+# backend/tests/test_session_store.py
+import time
+
+import pytest
+
+from fake_redis import FakeRedisServer
+from services.session_store import (
+    MemoryBackend,
+    RedisBackend,
+    SQLiteBackend,
+    pack_state,
+    unpack_state,
+)
+
+STATE = {"k": "mbti", "u": "alice", "seed": 7, "q": [3, -1, 12], "a": [1, 0, 1], "le": 0.25, "la": None}
+
+
+@pytest.fixture
+def redis_server():
+    server = FakeRedisServer(password="s3cret")
+    yield server
+    server.close()
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def backend(request, tmp_path, redis_server):
+    if request.param == "sqlite":
+        return SQLiteBackend(str(tmp_path / "sessions.db"), namespace="t", ttl=60)
+    return RedisBackend(redis_server.url(db=2), namespace="t", ttl=60)
+
+
+def test_roundtrip_touch_delete(backend):
+    assert backend.get("missing") is None
+    backend.put("s1", STATE)
+    assert backend.get("s1") == STATE
+    assert "s1" in backend
+    assert backend.touch("s1", ttl=120)
+    backend.delete("s1")
+    assert backend.get("s1") is None
+    assert not backend.touch("s1")
+
+
+def test_ttl_expiry(backend):
+    backend.put("short", STATE, ttl=1)
+    backend.put("long", STATE)
+    time.sleep(1.1)
+    assert backend.get("short") is None
+    assert backend.get("long") == STATE
+
+
+def test_values_are_plain_data_not_pickles(backend):
+    class Opaque:
+        pass
+
+    with pytest.raises(TypeError):
+        backend.put("s1", {"obj": Opaque()})
+
+
+def test_redis_auth_select_and_namespacing(redis_server):
+    backend = RedisBackend(redis_server.url(db=3), namespace="mbti")
+    backend.put("s1", STATE)
+    assert b"mbti:s1" in redis_server.dbs[3]
+    assert redis_server.commands[0] == [b"AUTH", b"s3cret"]
+    assert redis_server.commands[1] == [b"SELECT", b"3"]
+
+
+def test_redis_reconnects_and_closes_stale_socket(redis_server):
+    backend = RedisBackend(redis_server.url())
+    backend.put("s1", STATE)
+    stale_sock, stale_rfile = backend._local.conn
+
+    redis_server.drop_connections()
+    assert backend.get("s1") == STATE
+    assert redis_server.connections == 2
+    assert stale_sock.fileno() == -1 and stale_rfile.closed
+    assert backend._local.conn[0] is not stale_sock
+
+
+def test_redis_error_reply_raises(redis_server):
+    backend = RedisBackend(redis_server.url())
+    with pytest.raises(RuntimeError, match="unknown command"):
+        backend._command("FLUSHALL")
+
+
+def test_memory_backend_keeps_per_entry_ttl():
+    backend = MemoryBackend(ttl=100)
+    backend.put("short", STATE, ttl=1)
+    backend.put("long", STATE)
+    assert backend.get("short") is STATE  # refreshes with its own ttl, not 100s
+    time.sleep(1.1)
+    assert backend.sweep() == 1
+    assert backend.get("short") is None and backend.get("long") is STATE
+
+
+def test_unpack_state_rejects_garbage():
+    assert unpack_state(pack_state(STATE)) == STATE
+    assert unpack_state(b"\x99garbage") is None
+    assert unpack_state(pack_state(STATE)[:-3]) is None
+    assert unpack_state(pack_state(STATE) + b"\x00") is None
+
+
+def test_engines_store_token_state_out_of_process(tmp_path, monkeypatch):
+    from services import adaptive_engine, riasec
+
+    db = str(tmp_path / "sessions.db")
+    monkeypatch.setattr(adaptive_engine, "SESSIONS", SQLiteBackend(db, namespace="mbti"))
+    monkeypatch.setattr(riasec, "SESSIONS", SQLiteBackend(db, namespace="riasec"))
+
+    q = adaptive_engine.start_session("u1")
+    sid = q["sessionID"]
+    while not q.get("sentinel"):
+        adaptive_engine.capture_response(sid, q["questionID"], "yes")
+        q = adaptive_engine.get_next_question(sid)
+    assert adaptive_engine.SESSIONS.get(sid)["k"] == "mbti"
+    assert len(adaptive_engine.get_session_responses(sid)) == adaptive_engine.TOTAL_QUESTIONS
+
+    q = riasec.start_session("u1")
+    sid = q["sessionID"]
+    q = riasec.capture_answer(sid, q["questionID"], 4)
+    assert riasec.SESSIONS.get(sid)["k"] == "riasec"
+    assert q["index"] == 2
+
+
+def test_mbti_result_inputs_read_the_session_once(tmp_path, monkeypatch):
+    from services import adaptive_engine
+
+    backend = SQLiteBackend(str(tmp_path / "sessions.db"), namespace="mbti")
+    monkeypatch.setattr(adaptive_engine, "SESSIONS", backend)
+    q = adaptive_engine.start_session("u1")
+    sid = q["sessionID"]
+    adaptive_engine.capture_response(sid, q["questionID"], "yes")
+
+    reads = []
+    get = backend.get
+    monkeypatch.setattr(backend, "get", lambda key: reads.append(key) or get(key))
+    responses, features = adaptive_engine.get_session_result_inputs(sid)
+    assert reads == [sid]
+    assert responses == adaptive_engine.get_session_responses(sid)
+    assert (features == adaptive_engine.get_session_features(sid)).all()
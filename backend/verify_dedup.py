@@ -31,6 +31,9 @@ def test_deduplication_and_tiebreaking():
     recommender.riasec_matrix_df.loc["Finance"] = original_it
     recommender.mbti_prior_df["Finance"] = recommender.mbti_prior_df["Information Technology"]
     
+    # Re-align the scoring arrays with the edited tables
+    recommender.compile_tables()
+
     # User data
     mbti_type = "ENFJ"
     riasec_raw = {"R": 8, "I": 14, "A": 24, "S": 20, "E": 12, "C": 6}
@@ -89,8 +89,12 @@ function MBTIQuiz() {
       const next = await mbtiCapture(sessionID, question.questionID, ans);
       console.log('MBTI next question response:', next);
 
+      // The backend may hand back a new session token with every payload (stateless mode)
+      const nextSessionID = (next && next.sessionID) || sessionID;
+      setSessionID(nextSessionID);
+
       if (next && (next.sentinel === 1 || next.result_ready)) {
-        const res = await mbtiResult(sessionID);
+        const res = await mbtiResult(nextSessionID);
         console.log('MBTI result:', res);
         // Add questions answered count to result
         const questionsAnswered = parseInt(localStorage.getItem('mbtiQuestionsAnswered') || '0', 10);
@@ -73,8 +73,12 @@ function RIASECQuiz() {
       // api.js expects (sessionID, questionID, value)
       const next = await riasecCapture(sessionID, question.questionID, value);
 
+      // The backend may hand back a new session token with every payload (stateless mode)
+      const nextSessionID = next.sessionID || sessionID;
+      setSessionID(nextSessionID);
+
       if (next.sentinel === 1 || next.result_ready) {
-        const res = await riasecResult(sessionID);
+        const res = await riasecResult(nextSessionID);
         setResult(res);
         setQuestion(null);
         // Store RIASEC results in localStorage for use in MBTI ResultCard